@@ -0,0 +1,373 @@
+import os
+import sys
+import json
+import time
+import random
+import datetime
+import threading
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+
+# Test obciążeniowy callbacków dashboardu przez endpoint /_dash-update-component.
+# Każdy wirtualny użytkownik odtwarza typową sesję analityka: przejście na stronę,
+# zmiana roku, "Generuj analizę" i aktualizacja modelu ARIMA. Callbacki wyzwalane
+# tym samym wejściem (wykresy strony wizualnej) są wysyłane równolegle, jak robi to
+# przeglądarka; dla takiej grupy raportowany jest też czas do pierwszej i ostatniej odpowiedzi.
+#
+# Przykłady:
+#   python src/benchmarks/load_test.py --users 20 --duration 60                 (Flask test client)
+#   python src/benchmarks/load_test.py --url http://127.0.0.1:8050 --users 50   (uruchomiony serwer)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+DASH_DIR = os.path.join(project_root, 'dash')
+
+YEARS = list(range(2008, 2018))
+
+
+# losowy zakres dat (od tygodnia do kwartału) dla wyboru "Zakres dat"
+def random_dates(rng):
+    start = datetime.date(rng.choice(YEARS), 1, 1) + datetime.timedelta(days=rng.randrange(365))
+    end = start + datetime.timedelta(days=rng.choice([6, 29, 89]))
+    return start.isoformat(), end.isoformat()
+
+
+class DashClient:
+    """Wysyła żądania callbacków Dash przez Flask test client lub HTTP"""
+
+    def __init__(self, url=None, server=None):
+        self.url = url.rstrip('/') if url else None
+        self.test_client = server.test_client() if server is not None else None
+
+    def get_json(self, path):
+        if self.test_client is not None:
+            return self.test_client.get(path).get_json()
+        with urllib.request.urlopen(self.url + path) as response:
+            return json.loads(response.read())
+
+    def post_json(self, path, payload):
+        """Zwraca (status, treść odpowiedzi w bajtach)"""
+        if self.test_client is not None:
+            response = self.test_client.post(path, json=payload)
+            return response.status_code, response.data
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def _parse_outputs(output):
+    """Zamienia opis wyjść z _dash-dependencies na listę {id, property}"""
+    multi = output.startswith('..')
+    parts = output[2:-2].split('...') if multi else [output]
+    outputs = []
+    for part in parts:
+        component_id, prop = part.rsplit('.', 1)
+        outputs.append({'id': component_id, 'property': prop.split('@')[0]})
+    return outputs if multi else outputs[0]
+
+
+class CallbackMap:
+    """Indeks callbacków aplikacji według wejścia wyzwalającego"""
+
+    @staticmethod
+    def _output_names(dependency):
+        outputs = _parse_outputs(dependency['output'])
+        return {f"{item['id']}.{item['property']}" for item in (outputs if isinstance(outputs, list) else [outputs])}
+
+    def __init__(self, dependencies):
+        self.by_trigger = defaultdict(list)
+        for dependency in dependencies:
+            for callback_input in dependency['inputs']:
+                key = f"{callback_input['id']}.{callback_input['property']}"
+                self.by_trigger[key].append(dependency)
+
+    def payload(self, trigger, values, output=None):
+        """Treść żądania; output ("id.właściwość" jednego z wyjść) wybiera callback, gdy wejście wyzwala kilka"""
+        candidates = self.by_trigger[trigger]
+        if output is None:
+            dependency = candidates[-1]
+        else:
+            dependency = next(d for d in candidates if output in self._output_names(d))
+
+        def with_values(items):
+            return [dict(item, value=values.get(f"{item['id']}.{item['property']}")) for item in items]
+
+        return {
+            'output': dependency['output'],
+            'outputs': _parse_outputs(dependency['output']),
+            'inputs': with_values(dependency['inputs']),
+            'changedPropIds': [trigger],
+            'state': with_values(dependency['state']),
+        }
+
+
+# sekwencje kliknięć: (etykieta callbacku, wejście wyzwalające, czy wartość wejścia
+# pochodzi z odpowiedzi poprzedniego kroku - łańcuch "ładowanie -> dane", wyjście
+# callbacku albo None); lista w miejscu kroku to grupa łańcuchów kroków wysyłanych równolegle,
+# a słownik - zmiana wartości kontrolek przez użytkownika (bez żądania).
+# Wartości zwrócone przez callbacki (np. sygnatury wykresów) są zapamiętywane jak w przeglądarce
+VISUAL_CHARTS = ['yearly', 'monthly', 'hourly', 'locations', 'arrests', 'map']
+# stany filtrów krzyżowych strony wizualnej (kliknięcia na wykresach i listy wyboru)
+CROSSFILTERS = [
+    {},
+    {},
+    {'PrimaryType': ['THEFT']},
+    {'PrimaryType': ['BATTERY'], 'Arrest': [1]},
+    {'LocationDescription': ['STREET'], 'District': [11, 12]},
+    {'Domestic': [1]},
+]
+
+
+def visual_session(rng):
+    start_date, end_date = random_dates(rng)
+    values = {
+        'url.pathname': '/analiza-wizualna',
+        'date-range-type.value': rng.choice(['single', 'single', 'range', 'dates']),
+        'single-year-dropdown.value': rng.choice(YEARS),
+        'year-range-slider.value': sorted(rng.sample(YEARS, 2)),
+        'date-picker.start_date': start_date,
+        'date-picker.end_date': end_date,
+        'generate-button.n_clicks': 1,
+        'visual-crossfilter.data': rng.choice(CROSSFILTERS),
+        'visual-approximate.value': rng.choice([['approximate'], []]),
+    }
+    steps = [
+        ('app.display_page', 'url.pathname', False, None),
+        ('visual_analysis.toggle_year_selector', 'date-range-type.value', False, None),
+        ('visual_analysis.update_graphs', 'generate-button.n_clicks', False, None),
+        visual_charts_group(''),
+        # zmiana roku przy zamontowanych wykresach - odpowiedzi to dash.Patch z samymi danymi serii
+        {'date-range-type.value': 'single', 'single-year-dropdown.value': rng.choice(YEARS),
+         'generate-button.n_clicks': 2},
+        ('visual_analysis.update_graphs [zmiana roku]', 'generate-button.n_clicks', False, None),
+        visual_charts_group(' [zmiana roku]'),
+    ]
+    return values, steps
+
+
+# każdy wykres: podgląd z próbki, potem dokładny wynik
+def visual_charts_group(suffix):
+    return [[(f'visual_analysis.preview_{chart}{suffix}', 'visual-filter.data', True, f'chart-{chart}-exact.data'),
+             (f'visual_analysis.load_{chart}{suffix}', f'chart-{chart}-exact.data', True, None)]
+            for chart in VISUAL_CHARTS]
+
+
+def statistics_session(rng):
+    start_date, end_date = random_dates(rng)
+    values = {
+        'url.pathname': '/analiza-statystyczna',
+        'stats-date-range-type.value': rng.choice(['single', 'range', 'dates']),
+        'stats-single-year-dropdown.value': rng.choice(YEARS),
+        'stats-year-range-slider.value': sorted(rng.sample(YEARS, 2)),
+        'stats-date-picker.start_date': start_date,
+        'stats-date-picker.end_date': end_date,
+        'stats-generate-button.n_clicks': 1,
+        'stats-approximate.value': rng.choice([['approximate'], []]),
+    }
+    steps = [
+        ('app.display_page', 'url.pathname', False, None),
+        ('statistical_analysis.toggle_year_selector', 'stats-date-range-type.value', False, None),
+        ('statistical_analysis.update_statistics', 'stats-generate-button.n_clicks', False, None),
+        ('statistical_analysis.load_statistics_data', 'stats-content.children', True, None),
+    ]
+    return values, steps
+
+
+def advanced_session(rng):
+    values = {
+        'url.pathname': '/zaawansowana-analiza',
+        'advanced-date-range-type.value': 'range',
+        'advanced-single-year-dropdown.value': rng.choice(YEARS),
+        'advanced-year-range-slider.value': sorted(rng.sample(YEARS, 2)),
+        'arima-p.value': rng.randint(0, 3),
+        'arima-d.value': rng.randint(0, 2),
+        'arima-q.value': rng.randint(0, 3),
+        'update-arima-button.n_clicks': 1,
+    }
+    steps = [
+        ('app.display_page', 'url.pathname', False, None),
+        ('advanced_analysis.update_analysis', 'update-arima-button.n_clicks', False, None),
+    ]
+    return values, steps
+
+
+SESSIONS = [visual_session, statistics_session, advanced_session]
+
+
+class LoadTest:
+    def __init__(self, client_factory, users, duration, think_time, seed):
+        self.client_factory = client_factory
+        self.users = users
+        self.duration = duration
+        self.think_time = think_time
+        self.seed = seed
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _record(self, label, latency, ok, size):
+        with self._lock:
+            self.samples[label].append(latency)
+            self.bytes[label] += size
+            if not ok:
+                self.errors[label] += 1
+
+    # wysyła jedno żądanie callbacku; zwraca treść odpowiedzi albo None, gdy brak wartości wejścia
+    def _send(self, client, callbacks, step, values, previous_response):
+        label, trigger, chained, output = step
+        if chained:
+            component_id, prop = trigger.rsplit('.', 1)
+            if prop not in previous_response.get(component_id, {}):
+                return None
+            values = dict(values, **{trigger: previous_response[component_id][prop]})
+        payload = callbacks.payload(trigger, values, output)
+        start = time.perf_counter()
+        status, body = client.post_json('/_dash-update-component', payload)
+        latency = time.perf_counter() - start
+        ok = status in (200, 204)
+        self._record(label, latency, ok, len(body))
+        return json.loads(body).get('response', {}) if status == 200 else {}
+
+    # zapamiętuje wartości zwrócone przez callback, tak jak przeglądarka
+    @staticmethod
+    def _remember(values, response):
+        for component_id, props in response.items():
+            for prop, value in props.items():
+                values[f"{component_id}.{prop}"] = value
+
+    def _user(self, user_id, callbacks, deadline):
+        rng = random.Random(self.seed * 10_000 + user_id)
+        client = self.client_factory()
+        pool = ThreadPoolExecutor(max_workers=len(VISUAL_CHARTS))
+        while time.monotonic() < deadline:
+            values, steps = rng.choice(SESSIONS)(rng)
+            previous_response = {}
+            for step in steps:
+                if isinstance(step, dict):
+                    values.update(step)
+                    continue
+                if isinstance(step, list):
+                    previous_response = self._send_group(pool, client, callbacks, step, values, previous_response)
+                else:
+                    previous_response = self._send(client, callbacks, step, values, previous_response)
+                if previous_response is None:
+                    break
+                self._remember(values, previous_response)
+                if self.think_time:
+                    time.sleep(rng.uniform(*self.think_time))
+        pool.shutdown()
+
+    # łańcuch kroków wysyłanych jeden po drugim; zwraca odpowiedź ostatniego
+    def _send_chain(self, client, callbacks, chain, values, previous_response):
+        for step in chain:
+            previous_response = self._send(client, callbacks, step, values, previous_response)
+            if previous_response is None:
+                return None
+            self._remember(values, previous_response)
+        return previous_response
+
+    # grupa łańcuchów wyzwalanych tym samym wejściem, wysyłanych równocześnie
+    def _send_group(self, pool, client, callbacks, chains, values, previous_response):
+        # etykieta grupy: moduł strony i opis kroku w nawiasie, np. "visual_analysis [zmiana roku]"
+        label = chains[0][0][0]
+        group = label.split('.')[0] + (label[label.index(' ['):] if ' [' in label else '')
+        start = time.perf_counter()
+        futures = [pool.submit(self._send_chain, client, callbacks, chain, values, previous_response)
+                   for chain in chains]
+        finished = []
+        for future in as_completed(futures):
+            if future.result() is None:
+                return None
+            finished.append(time.perf_counter() - start)
+        self._record(f"{group} [pierwszy]", finished[0], True, 0)
+        self._record(f"{group} [wszystkie]", finished[-1], True, 0)
+        return {}
+
+    def run(self):
+        callbacks = CallbackMap(self.client_factory().get_json('/_dash-dependencies'))
+        deadline = time.monotonic() + self.duration
+        threads = [threading.Thread(target=self._user, args=(i, callbacks, deadline), daemon=True)
+                   for i in range(self.users)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed):
+        rows = []
+        for label in sorted(self.samples):
+            latencies = np.array(self.samples[label]) * 1000
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            rows.append({
+                'callback': label,
+                'requests': len(latencies),
+                'errors': self.errors[label],
+                'throughput_rps': round(len(latencies) / elapsed, 3),
+                'p50_ms': round(p50, 1),
+                'p95_ms': round(p95, 1),
+                'p99_ms': round(p99, 1),
+                'mean_ms': round(latencies.mean(), 1),
+                'avg_response_bytes': int(self.bytes[label] / len(latencies)),
+            })
+        total = sum(row['requests'] for row in rows)
+        return {
+            'users': self.users,
+            'duration_s': round(elapsed, 2),
+            'total_requests': total,
+            'total_throughput_rps': round(total / elapsed, 3),
+            'callbacks': rows,
+        }
+
+
+def print_report(report):
+    print(f"Użytkownicy: {report['users']}, czas: {report['duration_s']} s, "
+          f"żądania: {report['total_requests']} ({report['total_throughput_rps']} req/s)")
+    print(f"{'callback':<45} {'żądania':>8} {'błędy':>6} {'req/s':>8} "
+          f"{'p50 [ms]':>9} {'p95 [ms]':>9} {'p99 [ms]':>9} {'śr. bajty':>11}")
+    for row in report['callbacks']:
+        print(f"{row['callback']:<45} {row['requests']:>8} {row['errors']:>6} {row['throughput_rps']:>8.2f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['avg_response_bytes']:>11,}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Test obciążeniowy callbacków dashboardu")
+    parser.add_argument('--url', help="adres uruchomionego serwera; bez niego używany jest Flask test client")
+    parser.add_argument('--users', type=int, default=10, help="liczba równoczesnych wirtualnych użytkowników")
+    parser.add_argument('--duration', type=float, default=30, help="czas trwania testu w sekundach")
+    parser.add_argument('--think-time', type=float, nargs=2, default=(0.0, 0.0), metavar=('MIN', 'MAX'),
+                        help="przerwa między kliknięciami w sekundach")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="plik JSON z wynikami")
+    args = parser.parse_args()
+
+    if args.url:
+        def client_factory():
+            return DashClient(url=args.url)
+    else:
+        if DASH_DIR not in sys.path:
+            sys.path.append(DASH_DIR)
+        from app import app
+
+        def client_factory():
+            return DashClient(server=app.server)
+
+    think_time = tuple(args.think_time) if any(args.think_time) else None
+    result = LoadTest(client_factory, args.users, args.duration, think_time, args.seed).run()
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,280 @@
+import os
+import sys
+import gc
+import shutil
+import sqlite3
+import json
+import time
+import platform
+import statistics
+import subprocess
+import importlib.util
+from datetime import datetime
+
+# Benchmarki potoku danych i funkcji stron dashboardu na danych syntetycznych.
+#
+# Przykłady:
+#   python src/benchmarks/run_benchmarks.py --scales 1M 10M 50M
+#   python src/benchmarks/run_benchmarks.py --scales 1M --skip-pipeline --repeat 5
+#   python src/benchmarks/run_benchmarks.py --compare wyniki_a.json wyniki_b.json
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+DASH_DIR = os.path.join(project_root, 'dash')
+for path in (current_dir, project_root, DASH_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import synthetic_data
+from merge import preprocess_and_merge
+from storage import database, cache, backend, snapshot, sampling, anomalies
+import pages.visual_analysis as visual_analysis
+import pages.statistical_analysis as statistical_analysis
+import pages.advanced_analysis as advanced_analysis
+
+LOAD_DATA_SCRIPT = os.path.join(project_root, 'scripts', 'load-data.py')
+SHARD_DB_SCRIPT = os.path.join(project_root, 'scripts', 'shard-db.py')
+DEFAULT_WORKDIR = os.path.join(project_root, '..', 'bench_data')
+
+# filtry okresu, dla których mierzone są funkcje stron
+PAGE_CASES = {
+    'year=2016': 2016,
+    'range=2008-2017': (2008, 2017),
+}
+CROSSFILTER = database.normalize_filters({'PrimaryType': ['THEFT'], 'District': [11, 12], 'Arrest': [1]})
+
+
+def _load_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _rows(result):
+    return len(result) if hasattr(result, '__len__') and hasattr(result, 'columns') else None
+
+
+# mierzy czas wykonania funkcji `repeat` razy
+def measure(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def _record(results, scale, name, case, timings, result=None):
+    entry = {
+        'scale': scale,
+        'name': name,
+        'case': case,
+        'runs': [round(t, 6) for t in timings],
+        'min': round(min(timings), 6),
+        'median': round(statistics.median(timings), 6),
+        'mean': round(statistics.mean(timings), 6),
+        'rows': _rows(result),
+    }
+    results.append(entry)
+    print(f"  {name:<55} {case:<18} mediana {entry['median'] * 1000:10.1f} ms")
+    return entry
+
+
+# mierzy potok: merge.py (surowe CSV -> przetworzony CSV) i load-data.py (CSV -> SQLite)
+def run_pipeline(n_rows, workdir, seed, results):
+    raw1 = os.path.join(workdir, f'raw_2008_2011_{n_rows}.csv')
+    raw2 = os.path.join(workdir, f'raw_2012_2017_{n_rows}.csv')
+    processed = os.path.join(workdir, f'processed_{n_rows}.csv')
+    db_path = os.path.join(workdir, f'chicago_crimes_{n_rows}.db')
+    snapshot_dir = os.path.join(workdir, f'snapshot_{n_rows}')
+    shard_dir = os.path.join(workdir, f'shards_{n_rows}')
+
+    print(f"Generowanie surowych plików CSV ({n_rows:,} wierszy)...")
+    synthetic_data.write_raw_csvs(n_rows, raw1, raw2, seed=seed)
+
+    timings, _ = measure(lambda: preprocess_and_merge(raw1, raw2, processed), 1)
+    _record(results, n_rows, 'merge.preprocess_and_merge', 'full', timings)
+
+    create_db = synthetic_data._load_create_db_module()
+    load_data_module = _load_script(LOAD_DATA_SCRIPT, 'load_data_script')
+    load_data_module.CSV_FILE = processed
+    load_data_module.DB_NAME = db_path
+    load_data_module.SNAPSHOT_DIR = snapshot_dir
+    load_data_module.SHARDED = database.use_shards()
+    load_data_module.SHARD_DIR = shard_dir
+
+    def load():
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        shutil.rmtree(shard_dir, ignore_errors=True)
+        create_db.DB_NAME = db_path
+        create_db.create_table()
+        load_data_module.load_data()
+
+    timings, _ = measure(load, 1)
+    _record(results, n_rows, 'load-data.load_data', 'full', timings)
+
+    for path in (raw1, raw2, processed):
+        os.remove(path)
+    return db_path, snapshot_dir
+
+
+# mierzy zapytania i budowanie wykresów/tabel na każdej stronie
+def run_pages(n_rows, db_path, snapshot_dir, repeat, results):
+    database.DB_PATH = db_path
+    snapshot.SNAPSHOT_DIR = snapshot_dir
+    # mierzone są obliczenia, a nie odczyt ze współdzielonego cache
+    cache.shared_cache = None
+
+    if backend.use_columnar():
+        backend.reset_engine()
+        timings, _ = measure(backend.get_engine, 1)
+        _record(results, n_rows, 'columnar.load_engine', 'full', timings)
+
+    for case, year_filter in PAGE_CASES.items():
+        include_map = not isinstance(year_filter, tuple)
+
+        if backend.use_columnar():
+            timings, _ = measure(lambda: backend.get_engine().chart_aggregates(year_filter), repeat)
+            _record(results, n_rows, 'columnar.chart_aggregates', case, timings)
+
+        timings, df = measure(lambda: visual_analysis.query_database(year_filter), repeat)
+        _record(results, n_rows, 'visual_analysis.query_database', case, timings, df)
+        timings, _ = measure(lambda: visual_analysis.create_charts(df, include_map), repeat)
+        _record(results, n_rows, 'visual_analysis.create_charts', case, timings)
+        # wykresy liczone osobno (tak jak callbacki strony) - czas do pierwszego wykresu
+        for chart in visual_analysis.CHARTS:
+            if chart == 'map' and not include_map:
+                continue
+            timings, _ = measure(lambda: visual_analysis.build_chart(chart, year_filter), repeat)
+            _record(results, n_rows, f'visual_analysis.build_chart[{chart}]', case, timings)
+        # filtry krzyżowe (kliknięcie typu przestępstwa + lista wyboru)
+        timings, _ = measure(lambda: visual_analysis.build_chart('hourly', year_filter, CROSSFILTER), repeat)
+        _record(results, n_rows, 'visual_analysis.build_chart[hourly+crossfilter]', case, timings)
+        # podgląd z próbki (tryb przybliżony) - czas do pierwszego wyniku przy zimnym cache
+        if not backend.use_columnar():
+            timings, _ = measure(lambda: visual_analysis.build_approximate_chart('hourly', year_filter), repeat)
+            _record(results, n_rows, 'visual_analysis.build_approximate_chart[hourly]', case, timings)
+            timings, _ = measure(lambda: statistical_analysis.build_approximate_dashboard(year_filter), repeat)
+            _record(results, n_rows, 'statistical_analysis.build_approximate_dashboard', case, timings)
+
+        timings, df = measure(lambda: statistical_analysis.query_arrests_data(year_filter), repeat)
+        _record(results, n_rows, 'statistical_analysis.query_arrests_data', case, timings, df)
+        timings, _ = measure(lambda: statistical_analysis.create_statistics_dashboard(df), repeat)
+        _record(results, n_rows, 'statistical_analysis.create_statistics_dashboard', case, timings)
+
+        timings, df = measure(lambda: advanced_analysis.query_database(year_filter), repeat)
+        _record(results, n_rows, 'advanced_analysis.query_database', case, timings, df)
+        timings, _ = measure(lambda: advanced_analysis.create_time_series_analysis(df), repeat)
+        _record(results, n_rows, 'advanced_analysis.create_time_series_analysis', case, timings)
+
+    # anomalie liczone są zawsze dla wszystkich szeregów i całej historii
+    for granularity in anomalies.GRANULARITIES:
+        timings, _ = measure(lambda: anomalies.score_series(granularity), repeat)
+        _record(results, n_rows, f'anomalies.score_series[{granularity}]', 'full', timings)
+
+
+def run(scales, workdir, output, repeat, seed, skip_pipeline, data_backend, storage):
+    backend.DATA_BACKEND = data_backend
+    database.STORAGE_MODE = storage
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+
+    for scale in scales:
+        n_rows = synthetic_data.parse_scale(scale)
+        print(f"=== Skala: {n_rows:,} wierszy")
+        # katalog baz lat (--storage sharded), ten sam co w run_pipeline
+        database.SHARD_DIR = os.path.join(workdir, f'shards_{n_rows}')
+        if skip_pipeline:
+            db_path = os.path.join(workdir, f'chicago_crimes_{n_rows}.db')
+            snapshot_dir = os.path.join(workdir, f'snapshot_{n_rows}')
+            print("Generowanie bazy danych...")
+            synthetic_data.write_database(n_rows, db_path, seed=seed)
+            with sqlite3.connect(db_path) as conn:
+                sampling.build_sample(conn)
+            if database.use_shards():
+                shutil.rmtree(database.SHARD_DIR, ignore_errors=True)
+                _load_script(SHARD_DB_SCRIPT, 'shard_db_script').split_database(db_path, database.SHARD_DIR)
+            database.DB_PATH = db_path
+            snapshot.write_snapshot_from_sqlite(database.database_paths(), snapshot_dir)
+        else:
+            db_path, snapshot_dir = run_pipeline(n_rows, workdir, seed, results)
+
+        run_pages(n_rows, db_path, snapshot_dir, repeat, results)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+            'backend': data_backend,
+            'storage': storage,
+        },
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wyniki zapisane do pliku: {output}")
+    return report
+
+
+# porównuje dwa pliki wyników (mediany czasów)
+def compare(baseline_file, current_file):
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(current_file, encoding='utf-8') as f:
+        current = json.load(f)
+
+    def index(report):
+        return {(r['scale'], r['name'], r['case']): r for r in report['results']}
+
+    baseline_results = index(baseline)
+    print(f"{'skala':>10}  {'benchmark':<55} {'przypadek':<18} {'przed [ms]':>11} {'po [ms]':>11} {'zmiana':>8}")
+    for key, entry in index(current).items():
+        before = baseline_results.get(key)
+        if before is None:
+            continue
+        ratio = entry['median'] / before['median'] if before['median'] else float('nan')
+        print(f"{key[0]:>10,}  {key[1]:<55} {key[2]:<18} "
+              f"{before['median'] * 1000:11.1f} {entry['median'] * 1000:11.1f} {ratio:7.2f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarki dashboardu na danych syntetycznych")
+    parser.add_argument('--scales', nargs='+', default=['1M', '10M', '50M'])
+    parser.add_argument('--repeat', type=int, default=3, help="liczba powtórzeń pomiaru funkcji stron")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR, help="katalog na wygenerowane dane")
+    parser.add_argument('--output', default=f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    parser.add_argument('--skip-pipeline', action='store_true',
+                        help="pomija merge.py i load-data.py, baza jest generowana bezpośrednio")
+    parser.add_argument('--backend', choices=['sqlite', 'columnar'], default=backend.DATA_BACKEND,
+                        help="źródło danych stron (storage/backend.py)")
+    parser.add_argument('--storage', choices=['single', 'sharded'], default=database.STORAGE_MODE,
+                        help="jedna baza albo osobne bazy lat (storage/database.py)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="porównuje dwa pliki wyników zamiast uruchamiać benchmarki")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args.scales, args.workdir, args.output, args.repeat, args.seed, args.skip_pipeline, args.backend,
+            args.storage)
@@ -0,0 +1,295 @@
+import os
+import sqlite3
+import importlib.util
+import numpy as np
+import pandas as pd
+
+# Generator syntetycznych danych o przestępstwach w Chicago.
+# Rozkłady są przybliżone na podstawie danych z Kaggle (lata 2008–2017):
+# skośny rozkład typów przestępstw, sezonowość miesięczna i godzinowa,
+# współrzędne ograniczone do obszaru Chicago i skupione wokół dystryktów.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+CREATE_DB_SCRIPT = os.path.join(project_root, 'scripts', 'create-db.py')
+
+# typ przestępstwa: (udział, p. aresztowania, p. przemocy domowej, kod FBI, opisy)
+CRIME_TYPES = {
+    'THEFT': (0.215, 0.11, 0.03, '06', ['$500 AND UNDER', 'OVER $500', 'FROM BUILDING', 'RETAIL THEFT']),
+    'BATTERY': (0.185, 0.22, 0.45, '08B', ['SIMPLE', 'DOMESTIC BATTERY SIMPLE', 'AGGRAVATED: OTHER DANG WEAPON']),
+    'CRIMINAL DAMAGE': (0.110, 0.07, 0.12, '14', ['TO PROPERTY', 'TO VEHICLE']),
+    'NARCOTICS': (0.095, 0.99, 0.002, '18', ['POSS: CANNABIS 30GMS OR LESS', 'POSS: HEROIN(WHITE)', 'POSS: CRACK']),
+    'ASSAULT': (0.062, 0.24, 0.20, '08A', ['SIMPLE', 'AGGRAVATED: HANDGUN']),
+    'OTHER OFFENSE': (0.062, 0.18, 0.30, '26', ['TELEPHONE THREAT', 'HARASSMENT BY TELEPHONE']),
+    'BURGLARY': (0.058, 0.06, 0.01, '05', ['FORCIBLE ENTRY', 'UNLAWFUL ENTRY']),
+    'MOTOR VEHICLE THEFT': (0.045, 0.09, 0.01, '07', ['AUTOMOBILE', 'TRUCK, BUS, MOTOR HOME']),
+    'DECEPTIVE PRACTICE': (0.040, 0.15, 0.01, '11', ['FINANCIAL IDENTITY THEFT OVER $ 300', 'CREDIT CARD FRAUD']),
+    'ROBBERY': (0.038, 0.10, 0.02, '03', ['ARMED: HANDGUN', 'STRONGARM - NO WEAPON']),
+    'CRIMINAL TRESPASS': (0.028, 0.72, 0.05, '26', ['TO LAND', 'TO RESIDENCE']),
+    'WEAPONS VIOLATION': (0.011, 0.80, 0.01, '15', ['UNLAWFUL POSS OF HANDGUN']),
+    'PUBLIC PEACE VIOLATION': (0.008, 0.60, 0.05, '24', ['RECKLESS CONDUCT']),
+    'OFFENSE INVOLVING CHILDREN': (0.007, 0.20, 0.60, '20', ['CHILD ABUSE']),
+    'PROSTITUTION': (0.006, 0.99, 0.0, '16', ['SOLICIT ON PUBLIC WAY']),
+    'CRIM SEXUAL ASSAULT': (0.004, 0.15, 0.20, '02', ['NON-AGGRAVATED']),
+    'INTERFERENCE WITH PUBLIC OFFICER': (0.004, 0.95, 0.01, '24', ['RESIST/OBSTRUCT/DISARM OFFICER']),
+    'SEX OFFENSE': (0.004, 0.25, 0.15, '17', ['PUBLIC INDECENCY']),
+    'GAMBLING': (0.002, 0.99, 0.0, '19', ['GAME/DICE']),
+    'LIQUOR LAW VIOLATION': (0.002, 0.99, 0.0, '22', ['SELL/GIVE/DEL LIQUOR TO MINOR']),
+    'ARSON': (0.0017, 0.10, 0.02, '09', ['BY FIRE']),
+    'HOMICIDE': (0.0015, 0.45, 0.05, '01A', ['FIRST DEGREE MURDER']),
+    'KIDNAPPING': (0.0008, 0.10, 0.30, '20', ['CHILD ABDUCTION/STRANGER']),
+    'STALKING': (0.0006, 0.10, 0.40, '26', ['SIMPLE']),
+    'INTIMIDATION': (0.0006, 0.15, 0.10, '26', ['INTIMIDATION']),
+}
+
+LOCATIONS = {
+    'STREET': 0.260, 'RESIDENCE': 0.170, 'APARTMENT': 0.110, 'SIDEWALK': 0.100,
+    'OTHER': 0.040, 'PARKING LOT/GARAGE(NON.RESID.)': 0.028, 'ALLEY': 0.022,
+    'SCHOOL, PUBLIC, BUILDING': 0.020, 'RESIDENCE-GARAGE': 0.019, 'SMALL RETAIL STORE': 0.018,
+    'RESTAURANT': 0.017, 'RESIDENCE PORCH/HALLWAY': 0.016, 'VEHICLE NON-COMMERCIAL': 0.016,
+    'GROCERY FOOD STORE': 0.014, 'DEPARTMENT STORE': 0.012, 'GAS STATION': 0.010,
+    'COMMERCIAL / BUSINESS OFFICE': 0.009, 'PARK PROPERTY': 0.008, 'CHA PARKING LOT/GROUNDS': 0.007,
+    'CTA PLATFORM': 0.006, 'BAR OR TAVERN': 0.005, 'DRUG STORE': 0.005, 'HOSPITAL BUILDING/GROUNDS': 0.004,
+    'CTA TRAIN': 0.004, 'CONVENIENCE STORE': 0.004, 'BANK': 0.003, 'HOTEL/MOTEL': 0.003,
+    'CHURCH/SYNAGOGUE/PLACE OF WORSHIP': 0.002,
+}
+
+# dystrykt: (udział, środek szerokości, środek długości geograficznej)
+DISTRICTS = {
+    1: (0.040, 41.880, -87.630), 2: (0.045, 41.810, -87.610), 3: (0.050, 41.770, -87.580),
+    4: (0.058, 41.710, -87.560), 5: (0.045, 41.690, -87.620), 6: (0.060, 41.750, -87.640),
+    7: (0.058, 41.780, -87.660), 8: (0.068, 41.780, -87.710), 9: (0.050, 41.820, -87.670),
+    10: (0.045, 41.850, -87.710), 11: (0.070, 41.880, -87.720), 12: (0.050, 41.870, -87.660),
+    14: (0.038, 41.920, -87.700), 15: (0.042, 41.880, -87.760), 16: (0.032, 41.970, -87.800),
+    17: (0.028, 41.960, -87.720), 18: (0.045, 41.900, -87.630), 19: (0.042, 41.940, -87.660),
+    20: (0.017, 41.980, -87.670), 22: (0.032, 41.700, -87.670), 24: (0.028, 42.000, -87.670),
+    25: (0.057, 41.920, -87.760),
+}
+
+LAT_BOUNDS = (41.644, 42.023)
+LON_BOUNDS = (-87.940, -87.524)
+
+YEAR_WEIGHTS = {
+    2008: 1.00, 2009: 0.92, 2010: 0.88, 2011: 0.83, 2012: 0.80,
+    2013: 0.72, 2014: 0.65, 2015: 0.62, 2016: 0.63, 2017: 0.60,
+}
+MONTH_WEIGHTS = [0.85, 0.78, 0.92, 0.95, 1.05, 1.08, 1.12, 1.12, 1.04, 1.02, 0.95, 0.90]
+HOUR_WEIGHTS = [0.90, 0.60, 0.50, 0.40, 0.30, 0.25, 0.30, 0.45, 0.70, 0.80, 0.85, 0.90,
+                1.10, 0.95, 0.95, 1.00, 1.00, 1.00, 1.05, 1.05, 1.00, 0.95, 0.95, 0.80]
+
+MISSING_COORDINATES_RATE = 0.01
+
+
+def _normalize(weights):
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+# losuje kolumny bazowe dla `n_rows` zdarzeń
+def _generate_columns(rng, n_rows, start_id):
+    type_names = list(CRIME_TYPES)
+    type_params = list(CRIME_TYPES.values())
+    type_idx = rng.choice(len(type_names), size=n_rows, p=_normalize([t[0] for t in type_params]))
+
+    years = np.array(list(YEAR_WEIGHTS))
+    year = years[rng.choice(len(years), size=n_rows, p=_normalize(list(YEAR_WEIGHTS.values())))]
+    month = rng.choice(12, size=n_rows, p=_normalize(MONTH_WEIGHTS)) + 1
+    hour = rng.choice(24, size=n_rows, p=_normalize(HOUR_WEIGHTS))
+
+    month_start = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    days_in_month = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(int)
+    day = (rng.random(n_rows) * days_in_month).astype(int) + 1
+    timestamp = (
+        month_start.astype('datetime64[s]')
+        + ((day - 1) * 86400 + hour * 3600 + rng.integers(0, 3600, size=n_rows)).astype('timedelta64[s]')
+    )
+
+    arrest = rng.random(n_rows) < np.array([t[1] for t in type_params])[type_idx]
+    domestic = rng.random(n_rows) < np.array([t[2] for t in type_params])[type_idx]
+
+    # opis zależny od typu przestępstwa
+    description_options = [t[4] for t in type_params]
+    description_counts = np.array([len(options) for options in description_options])
+    description_idx = (rng.random(n_rows) * description_counts[type_idx]).astype(int)
+    flat_descriptions = np.array([d for options in description_options for d in options], dtype=object)
+    description_offsets = np.concatenate([[0], np.cumsum(description_counts)[:-1]])
+    description = flat_descriptions[description_offsets[type_idx] + description_idx]
+
+    location_names = np.array(list(LOCATIONS), dtype=object)
+    location = location_names[rng.choice(len(location_names), size=n_rows, p=_normalize(list(LOCATIONS.values())))]
+
+    district_ids = np.array(list(DISTRICTS))
+    district_params = np.array(list(DISTRICTS.values()))
+    district_idx = rng.choice(len(district_ids), size=n_rows, p=_normalize(district_params[:, 0]))
+    district = district_ids[district_idx]
+    beat = district * 100 + rng.integers(11, 35, size=n_rows)
+
+    latitude = np.clip(district_params[district_idx, 1] + rng.normal(0, 0.018, n_rows), *LAT_BOUNDS)
+    longitude = np.clip(district_params[district_idx, 2] + rng.normal(0, 0.022, n_rows), *LON_BOUNDS)
+    missing = rng.random(n_rows) < MISSING_COORDINATES_RATE
+    latitude[missing] = np.nan
+    longitude[missing] = np.nan
+
+    ids = np.arange(start_id, start_id + n_rows)
+
+    return {
+        'ID': ids,
+        'CaseNumber': 'JA' + pd.Series(ids).astype(str).str.zfill(8).to_numpy(),
+        'Date': timestamp,
+        'PrimaryType': np.array(type_names, dtype=object)[type_idx],
+        'Description': description,
+        'LocationDescription': location,
+        'Arrest': arrest,
+        'Domestic': domestic,
+        'Beat': beat,
+        'District': district,
+        'Ward': rng.integers(1, 51, size=n_rows),
+        'CommunityArea': rng.integers(1, 78, size=n_rows),
+        'FBICode': np.array([t[3] for t in type_params], dtype=object)[type_idx],
+        'Latitude': latitude,
+        'Longitude': longitude,
+        'XCoordinate': np.round(1165000 + (longitude + 87.65) * 275000),
+        'YCoordinate': np.round(1900000 + (latitude - 41.88) * 364000),
+    }
+
+
+def _location_strings(latitude, longitude):
+    location = ('(' + pd.Series(latitude).round(9).astype(str) + ', '
+                + pd.Series(longitude).round(9).astype(str) + ')')
+    return location.where(~np.isnan(latitude), None)
+
+
+# tworzy ramkę w formacie surowych plików CSV z Kaggle (wejście dla merge.py)
+def generate_raw_frame(n_rows, seed=0, start_id=0):
+    rng = np.random.default_rng([seed, start_id])
+    columns = _generate_columns(rng, n_rows, start_id)
+    date = pd.Series(columns['Date'])
+
+    return pd.DataFrame({
+        'ID': columns['ID'],
+        'Case Number': columns['CaseNumber'],
+        'Date': date.dt.strftime('%m/%d/%Y %I:%M:%S %p'),
+        'Primary Type': columns['PrimaryType'],
+        'Description': columns['Description'],
+        'Location Description': columns['LocationDescription'],
+        'Arrest': columns['Arrest'],
+        'Domestic': columns['Domestic'],
+        'Beat': columns['Beat'],
+        'District': columns['District'].astype(float),
+        'Ward': columns['Ward'].astype(float),
+        'Community Area': columns['CommunityArea'].astype(float),
+        'FBI Code': columns['FBICode'],
+        'X Coordinate': columns['XCoordinate'],
+        'Y Coordinate': columns['YCoordinate'],
+        'Year': date.dt.year,
+        'Latitude': columns['Latitude'],
+        'Longitude': columns['Longitude'],
+        'Location': _location_strings(columns['Latitude'], columns['Longitude']),
+    })
+
+
+# tworzy ramkę zgodną ze schematem tabeli ChicagoCrimes z create-db.py
+def generate_table_frame(n_rows, seed=0, start_id=0):
+    rng = np.random.default_rng([seed, start_id])
+    columns = _generate_columns(rng, n_rows, start_id)
+    date = pd.Series(columns['Date'])
+
+    return pd.DataFrame({
+        'ID': columns['ID'],
+        'CaseNumber': columns['CaseNumber'],
+        'Date': date.dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'PrimaryType': columns['PrimaryType'],
+        'Description': columns['Description'],
+        'LocationDescription': columns['LocationDescription'],
+        'Arrest': columns['Arrest'].astype(int),
+        'Domestic': columns['Domestic'].astype(int),
+        'Beat': columns['Beat'],
+        'District': columns['District'],
+        'Ward': columns['Ward'],
+        'CommunityArea': columns['CommunityArea'],
+        'FBICode': columns['FBICode'],
+        'Latitude': columns['Latitude'],
+        'Longitude': columns['Longitude'],
+        'Year': date.dt.year,
+        'Month': date.dt.month,
+        'Day': date.dt.day,
+        'Hour': date.dt.hour,
+        'XCoordinate': columns['XCoordinate'],
+        'YCoordinate': columns['YCoordinate'],
+        'Location': _location_strings(columns['Latitude'], columns['Longitude']),
+        'Timestamp': (date - pd.Timestamp(0)) // pd.Timedelta(seconds=1),
+    })
+
+
+def _chunks(n_rows, chunk_size):
+    for start in range(0, n_rows, chunk_size):
+        yield start, min(chunk_size, n_rows - start)
+
+
+# zapisuje surowe dane do dwóch plików CSV, podzielonych jak dane z Kaggle (do 2011 i od 2012)
+def write_raw_csvs(n_rows, output_file1, output_file2, seed=0, chunk_size=1_000_000, split_year=2012):
+    for path in (output_file1, output_file2):
+        if os.path.exists(path):
+            os.remove(path)
+
+    for start, size in _chunks(n_rows, chunk_size):
+        df = generate_raw_frame(size, seed=seed, start_id=start)
+        early = df['Year'] < split_year
+        for path, part in ((output_file1, df[early]), (output_file2, df[~early])):
+            part.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+def _load_create_db_module():
+    spec = importlib.util.spec_from_file_location('create_db', CREATE_DB_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# tworzy bazę SQLite ze schematem z create-db.py i wypełnia ją syntetycznymi danymi
+def write_database(n_rows, db_path, seed=0, chunk_size=1_000_000):
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    create_db = _load_create_db_module()
+    create_db.DB_NAME = db_path
+    create_db.create_table()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for start, size in _chunks(n_rows, chunk_size):
+            df = generate_table_frame(size, seed=seed, start_id=start)
+            df.to_sql('ChicagoCrimes', conn, if_exists='append', index=False)
+    finally:
+        conn.close()
+
+
+# zamienia zapis skali ("1M", "500k", "2000") na liczbę wierszy
+def parse_scale(value):
+    value = str(value).strip().upper()
+    multipliers = {'K': 1_000, 'M': 1_000_000}
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generowanie syntetycznych danych ChicagoCrimes")
+    parser.add_argument('--rows', default='1M', help="liczba wierszy, np. 1M, 10M, 50M")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help="ścieżka do tworzonej bazy SQLite")
+    parser.add_argument('--raw-csv', nargs=2, metavar=('CSV_2008_2011', 'CSV_2012_2017'),
+                        help="ścieżki do surowych plików CSV w formacie Kaggle")
+    args = parser.parse_args()
+
+    n_rows = parse_scale(args.rows)
+    if args.db:
+        write_database(n_rows, args.db, seed=args.seed)
+        print(f"Zapisano {n_rows:,} wierszy do bazy: {args.db}")
+    if args.raw_csv:
+        write_raw_csvs(n_rows, *args.raw_csv, seed=args.seed)
+        print(f"Zapisano {n_rows:,} wierszy do plików: {', '.join(args.raw_csv)}")
+    if not args.db and not args.raw_csv:
+        parser.error("podaj --db i/lub --raw-csv")
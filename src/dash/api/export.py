@@ -0,0 +1,217 @@
+import io
+import os
+import threading
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request
+
+from storage.cache import memoize
+from storage.database import DateRange
+from monitoring.metrics import current_callback
+import pages.visual_analysis as visual_analysis
+import pages.statistical_analysis as statistical_analysis
+import pages.advanced_analysis as advanced_analysis
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# API eksportu agregatów liczonych przez strony dashboardu (bez pobierania dashboardu).
+#
+#   GET /api/export                    lista zbiorów
+#   GET /api/export/<zbiór>?format=csv|arrow&year=2015
+#                                   &from_year=2010&to_year=2015
+#                                   &start=2015-01-01&end=2015-06-30
+#   zbiory: yearly, monthly (wykresy strony wizualnej), arrests (statystyki aresztowań
+#   według typu), forecast (szereg miesięczny i prognoza ARIMA, parametry p, d, q)
+#
+# Agregaty pochodzą z tych samych funkcji co strony i są zapamiętywane we współdzielonym
+# cache (storage/cache.py). Odpowiedź jest wysyłana kawałkami z generatora (CSV albo
+# strumień Arrow IPC, gdy zainstalowano pyarrow), więc nie powstaje pełna kopia pliku w pamięci.
+# pyarrow jest opcjonalny (nie ma go w requirements.txt; np. pip install pyarrow==14.0.2) -
+# bez niego format=arrow zwraca 501, a eksport CSV działa bez zmian.
+# Liczba jednoczesnych eksportów w procesie jest ograniczona (EXPORT_MAX_CONCURRENT) -
+# kolejne żądania dostają 503 zamiast zajmować wątki potrzebne callbackom dashboardu.
+
+EXPORT_MAX_CONCURRENT = int(os.environ.get("EXPORT_MAX_CONCURRENT", "2"))
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "10000"))
+# zakres parametrów ARIMA taki jak na suwakach strony zaawansowanej
+ARIMA_ORDER_LIMITS = {'p': 3, 'd': 2, 'q': 3}
+
+FORMATS = {
+    'csv': ("text/csv", "csv"),
+    'arrow': ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+export_api = Blueprint("export_api", __name__, url_prefix="/api/export")
+_export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+
+class ExportError(Exception):
+    """Agregatu nie da się policzyć dla podanych parametrów"""
+
+
+def yearly_counts(year_filter, options):
+    return visual_analysis.chart_data('yearly', year_filter)
+
+
+def monthly_counts(year_filter, options):
+    return visual_analysis.chart_data('monthly', year_filter)
+
+
+# liczba przestępstw, aresztowań i wskaźnik aresztowań według typu (jak tabela strony statystycznej)
+def arrest_statistics(year_filter, options):
+    df = statistical_analysis.query_arrests_data(year_filter)
+    if df is None or df.empty:
+        return None
+    stats = df.groupby('Typ', as_index=False)[['Liczba', 'Aresztowania']].sum()
+    stats.columns = ['PrimaryType', 'count', 'arrests']
+    stats['arrest_rate'] = stats['arrests'] / stats['count']
+    return stats.sort_values('count', ascending=False)
+
+
+# miesięczny szereg (kind=history) i prognoza ARIMA z 95% przedziałem (kind=forecast)
+def forecast(year_filter, options):
+    df = advanced_analysis.query_database(year_filter)
+    if df.empty:
+        return None
+    series = advanced_analysis.monthly_series(df)['count']
+    try:
+        mean, ci = advanced_analysis.arima_forecast(series, *options)
+    except Exception as e:
+        raise ExportError(f"Błąd w tworzeniu modelu ARIMA: {e}")
+
+    history = pd.DataFrame({'date': series.index, 'kind': 'history', 'count': series.to_numpy(dtype=float)})
+    future = pd.DataFrame({'date': mean.index, 'kind': 'forecast', 'count': mean.to_numpy(),
+                           'lower': ci.iloc[:, 0].to_numpy(), 'upper': ci.iloc[:, 1].to_numpy()})
+    return pd.concat([history, future], ignore_index=True)
+
+
+EXPORTS = {
+    'yearly': yearly_counts,
+    'monthly': monthly_counts,
+    'arrests': arrest_statistics,
+    'forecast': forecast,
+}
+
+
+# agregat zbioru dla okresu, wynik współdzielony przez workery (None, gdy brak danych)
+@memoize("api.export")
+def export_frame(dataset, year_filter, options=()):
+    df = EXPORTS[dataset](year_filter, options)
+    return None if df is None or df.empty else df.reset_index(drop=True)
+
+
+# filtr okresu z parametrów zapytania: start i end (RRRR-MM-DD), from_year i to_year albo year;
+# None - cały zakres danych
+def period_from_args(args):
+    if 'start' in args or 'end' in args:
+        return DateRange.from_dates(*_required(args, 'start', 'end'))
+    elif 'from_year' in args or 'to_year' in args:
+        return tuple(int(value) for value in _required(args, 'from_year', 'to_year'))
+    elif 'year' in args:
+        return int(args['year'])
+    return None
+
+
+def _required(args, *names):
+    missing = [name for name in names if not args.get(name)]
+    if missing:
+        raise ValueError(f"brak parametru {', '.join(missing)}")
+    return [args[name] for name in names]
+
+
+def options_from_args(dataset, args):
+    if dataset != 'forecast':
+        return ()
+    order = tuple(int(args.get(name, 1)) for name in ARIMA_ORDER_LIMITS)
+    if any(not 0 <= value <= limit for value, limit in zip(order, ARIMA_ORDER_LIMITS.values())):
+        raise ValueError(f"parametry ARIMA poza zakresem {ARIMA_ORDER_LIMITS}")
+    return order
+
+
+def csv_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    yield df.head(0).to_csv(index=False)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False, date_format='%Y-%m-%d')
+
+
+# strumień Arrow IPC - każdy blok wierszy to osobny RecordBatch wysyłany od razu po zapisaniu
+def arrow_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            writer.write_batch(batch)
+            yield drain()
+    yield drain()
+
+
+def _error(status, message, headers=None):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers.update(headers or {})
+    return response
+
+
+@export_api.route("")
+def list_exports():
+    formats = [name for name in FORMATS if name != 'arrow' or pa is not None]
+    return jsonify({'datasets': list(EXPORTS), 'formats': formats})
+
+
+@export_api.route("/<dataset>")
+def export(dataset):
+    if dataset not in EXPORTS:
+        return _error(404, f"Nieznany zbiór: {dataset}")
+    export_format = request.args.get('format', 'csv')
+    if export_format not in FORMATS:
+        return _error(400, f"Nieznany format: {export_format}")
+    if export_format == 'arrow' and pa is None:
+        return _error(501, "Format Arrow wymaga pakietu pyarrow")
+    try:
+        year_filter = period_from_args(request.args)
+        options = options_from_args(dataset, request.args)
+    except ValueError as e:
+        return _error(400, f"Niepoprawne parametry: {e}")
+
+    if not _export_slots.acquire(blocking=False):
+        return _error(503, "Za dużo jednoczesnych eksportów", {'Retry-After': '5'})
+
+    # zapytania eksportu są widoczne w metrykach jako osobny "callback"
+    token = current_callback.set(f"api.export_{dataset}")
+    try:
+        df = export_frame(dataset, year_filter, options)
+    except ExportError as e:
+        _export_slots.release()
+        return _error(422, str(e))
+    except BaseException:
+        _export_slots.release()
+        raise
+    finally:
+        current_callback.reset(token)
+
+    if df is None:
+        _export_slots.release()
+        return _error(404, "Brak danych dla wybranego okresu.")
+
+    mimetype, extension = FORMATS[export_format]
+    chunks = csv_chunks(df) if export_format == 'csv' else arrow_chunks(df)
+    response = Response(chunks, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{dataset}.{extension}"'
+    })
+    # miejsce zwalniane po wysłaniu odpowiedzi albo po zerwaniu połączenia
+    response.call_on_close(_export_slots.release)
+    return response
+
+
+# rejestruje API eksportu na serwerze Flask
+def register_export_api(server):
+    server.register_blueprint(export_api)
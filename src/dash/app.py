@@ -1,5 +1,6 @@
 import sys
 import os
+import logging
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
@@ -7,19 +8,39 @@ if current_dir not in sys.path:
 
 from dash import Dash, Input, Output
 import dash_bootstrap_components as dbc
+import plotly.io as pio
 from layout.base_layout import base_layout
+from monitoring.metrics import instrument_callback, register_metrics_endpoint
+from api.export import register_export_api
+from storage import backend
 import pages.home as home
 import pages.visual_analysis as visual_analysis
 import pages.statistical_analysis as statistical_analysis
 import pages.advanced_analysis as advanced_analysis
 import pages.not_found as not_found
 
+# Poziom logów aplikacji (np. LOG_LEVEL=DEBUG pokazuje rozmiary wszystkich odpowiedzi callbacków)
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 app = Dash(
     __name__,
     external_stylesheets=[dbc.themes.BOOTSTRAP],
     suppress_callback_exceptions=True
 )
 app.title = "Analiza Danych"
+server = app.server
+
+# Wczesna inicjalizacja serializacji JSON plotly - leniwy import orjson
+# przy pierwszych równoległych żądaniach kończy się błędem częściowo
+# zainicjalizowanego modułu
+pio.json.to_json_plotly({})
+
+# Silnik kolumnowy wczytuje tabelę raz, przy starcie aplikacji
+if backend.use_columnar():
+    backend.get_engine()
 
 # Rejestracja callbacków przed zdefiniowaniem layoutu
 visual_analysis.register_callbacks(app)
@@ -29,11 +50,18 @@ advanced_analysis.register_callbacks(app)
 # Ustawienie głównego layoutu
 app.layout = base_layout()
 
+# Metryki callbacków i zapytań w formacie Prometheusa
+register_metrics_endpoint(app.server)
+
+# Eksport agregatów stron (CSV, Arrow IPC) pod adresem /api/export
+register_export_api(app.server)
+
 
 @app.callback(
     Output("page-content", "children"),
     Input("url", "pathname")
 )
+@instrument_callback("app.display_page")
 def display_page(pathname):
     if pathname == "/":
         return home.layout()
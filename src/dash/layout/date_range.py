@@ -0,0 +1,124 @@
+import sqlite3
+import pandas as pd
+from dash import html, dcc, Input, Output
+from storage import backend, database
+from storage.database import DateRange
+
+# Wybór zakresu dat (z dokładnością do dnia) wspólny dla stron analizy.
+# Identyfikatory komponentów mają prefiks strony, np. "stats-date-picker".
+
+# zakresy "ostatnie N dni" liczone od najnowszego zdarzenia w bazie
+DATE_PRESETS = [
+    {'label': 'Ostatnie 7 dni', 'value': 7},
+    {'label': 'Ostatnie 30 dni', 'value': 30},
+    {'label': 'Ostatnie 90 dni', 'value': 90},
+    {'label': 'Ostatni rok', 'value': 365},
+]
+
+
+# tworzy kontener z wyborem zakresu dat (domyślnie ukryty);
+# kalendarz pozwala wybrać tylko dni z zakresu danych
+def create_date_range_container(prefix):
+    oldest, newest = oldest_date(), newest_date()
+    return html.Div(
+        id=f'{prefix}date-picker-container',
+        style={'display': 'none'},
+        children=[
+            html.P("Wybierz zakres dat:", className="mt-3"),
+            dcc.Dropdown(
+                id=f'{prefix}date-preset',
+                options=DATE_PRESETS,
+                placeholder="Gotowy zakres",
+                className="mb-2"
+            ),
+            dcc.DatePickerRange(
+                id=f'{prefix}date-picker',
+                display_format='YYYY-MM-DD',
+                first_day_of_week=1,
+                min_date_allowed=oldest.strftime('%Y-%m-%d') if oldest is not None else None,
+                max_date_allowed=newest.strftime('%Y-%m-%d') if newest is not None else None,
+                initial_visible_month=newest.strftime('%Y-%m-%d') if newest is not None else None,
+                start_date_placeholder_text="Od",
+                end_date_placeholder_text="Do"
+            )
+        ]
+    )
+
+
+# style kontenerów wyboru: jeden rok, zakres lat, zakres dat
+def selector_styles(selector_type):
+    visible, hidden = {'display': 'block'}, {'display': 'none'}
+    return (
+        visible if selector_type == 'single' else hidden,
+        visible if selector_type == 'range' else hidden,
+        visible if selector_type == 'dates' else hidden,
+    )
+
+
+# najnowsza i najstarsza data zdarzenia w danych, na których pracują strony
+def newest_date():
+    return _bound_date(-1, database.newest_timestamp)
+
+
+def oldest_date():
+    return _bound_date(0, database.oldest_timestamp)
+
+
+# position - indeks w posortowanej kolumnie Timestamp silnika kolumnowego;
+# None, gdy baza jest pusta albo jeszcze niewczytana (kalendarz pozostaje wtedy bez ograniczeń)
+def _bound_date(position, sqlite_timestamp):
+    if backend.use_columnar():
+        timestamps = backend.get_engine().columns['Timestamp']
+        value = int(timestamps[position]) if len(timestamps) else None
+    else:
+        try:
+            value = sqlite_timestamp()
+        except sqlite3.OperationalError as e:
+            print(f"Błąd bazy danych: {e} | Ścieżka: {database.DB_PATH}")
+            value = None
+    return pd.Timestamp(value, unit='s').normalize() if value is not None else None
+
+
+# rejestruje callback ustawiający zakres dat po wybraniu gotowego zakresu
+def register_date_preset_callback(app, prefix):
+    @app.callback(
+        [Output(f'{prefix}date-picker', 'start_date'),
+         Output(f'{prefix}date-picker', 'end_date')],
+        Input(f'{prefix}date-preset', 'value'),
+        prevent_initial_call=True
+    )
+    def apply_date_preset(days):
+        end = newest_date()
+        if not days or end is None:
+            return None, None
+        start = end - pd.Timedelta(days=days - 1)
+        return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+# zamienia stan kontrolek na filtr okresu (rok, krotka z zakresem lat lub DateRange);
+# None, gdy nie wybrano dat
+def period_filter(range_type, single_year, year_range, start_date, end_date):
+    if range_type == 'single':
+        return single_year
+    elif range_type == 'dates':
+        if not start_date or not end_date:
+            return None
+        return DateRange.from_dates(start_date, end_date)
+    return tuple(year_range)
+
+
+# zapis filtra okresu w dcc.Store (JSON) i odczyt
+def period_to_json(period):
+    if isinstance(period, DateRange):
+        return {'start': period.start, 'end': period.end}
+    elif isinstance(period, tuple):
+        return list(period)
+    return period
+
+
+def period_from_json(value):
+    if isinstance(value, dict):
+        return DateRange(value['start'], value['end'])
+    elif isinstance(value, list):
+        return tuple(value)
+    return value
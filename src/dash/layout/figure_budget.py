@@ -0,0 +1,67 @@
+import os
+import json
+import logging
+import numpy as np
+from plotly.utils import PlotlyJSONEncoder
+
+# Budżet rozmiaru figur wysyłanych do przeglądarki.
+# Figura z setkami tysięcy punktów (mapa) to kilka-kilkanaście MB JSON-a na każde
+# odświeżenie. Współrzędne są zaokrąglane (COORDINATE_DECIMALS miejsc to ok. 10 m),
+# a gdy figura mimo to przekracza MAX_FIGURE_BYTES, punkty są agregowane do coraz
+# rzadszej siatki (GRID_STEPS w stopniach), aż zmieszczą się w budżecie.
+# Rozmiar rzadszej siatki jest szacowany z liczby punktów, więc wielomegabajtowa figura
+# jest serializowana tylko dla pierwszego kandydata i dla wybranej siatki.
+
+MAX_FIGURE_BYTES = int(os.environ.get("MAX_FIGURE_BYTES", str(3 * 1024 * 1024)))
+COORDINATE_DECIMALS = 4
+GRID_STEPS = (0.002, 0.005, 0.01, 0.02)
+
+logger = logging.getLogger(__name__)
+
+
+# rozmiar figury po serializacji do JSON (tak jak wysyła ją Dash)
+def figure_bytes(figure):
+    return len(json.dumps(figure.to_plotly_json(), cls=PlotlyJSONEncoder).encode("utf-8"))
+
+
+# punkty ze współrzędnymi zaokrąglonymi do decimals miejsc (albo do środka pola siatki step)
+# i zsumowaną kolumną value_column w obrębie tych samych współrzędnych i group_columns;
+# wiersze bez współrzędnych są pomijane
+def compact_points(df, group_columns, value_column='count', decimals=COORDINATE_DECIMALS, step=None,
+                   lat='Latitude', lon='Longitude'):
+    df = df.dropna(subset=[lat, lon])
+    coordinates = {}
+    for column in (lat, lon):
+        values = df[column].to_numpy(dtype=np.float64)
+        if step:
+            values = (np.floor(values / step) + 0.5) * step
+        coordinates[column] = values.round(decimals)
+
+    df = df.assign(**coordinates)
+    return df.groupby([lat, lon] + group_columns, as_index=False, sort=False)[value_column].sum()
+
+
+# figura z punktów df mieszcząca się w budżecie; build(points, step) tworzy figurę
+# (step=None - punkty bez siatki); name identyfikuje figurę w ostrzeżeniu o przekroczeniu budżetu
+def fit_figure(df, group_columns, build, name, max_bytes=None):
+    limit = MAX_FIGURE_BYTES if max_bytes is None else max_bytes
+    points = compact_points(df, group_columns)
+    figure = build(points, None)
+    size = figure_bytes(figure)
+    for step in GRID_STEPS:
+        if size <= limit:
+            return figure
+        # rozmiar proporcjonalny do liczby punktów (z zapasem - stała część figury też jest liczona);
+        # ostatnia siatka jest budowana zawsze
+        bytes_per_point = size / max(len(points), 1)
+        coarser = compact_points(df, group_columns, step=step)
+        if len(coarser) * bytes_per_point > limit and step != GRID_STEPS[-1]:
+            continue
+        points = coarser
+        figure = build(points, step)
+        size = figure_bytes(figure)
+
+    if size > limit:
+        logger.warning("Figura %s przekracza budżet po agregacji do siatki %s°: %d B > %d B",
+                       name, GRID_STEPS[-1], size, limit)
+    return figure
@@ -0,0 +1,53 @@
+import json
+import hashlib
+import plotly
+from dash import Patch
+
+# Aktualizacja wykresów bez ponownego wysyłania całej figury.
+# Po stronie przeglądarki zapamiętywana jest sygnatura wyświetlanej figury (dcc.Store):
+# skróty każdej właściwości każdej serii i każdego klucza layoutu. Jeśli nowa figura ma
+# tyle samo serii tych samych typów, wysyłany jest dash.Patch z samymi zmienionymi,
+# dodanymi i usuniętymi właściwościami - zwykle tylko wartości y - zamiast pełnej figury
+# z layoutem, etykietami osi i kolorami.
+
+
+def _digest(value):
+    encoded = json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder, sort_keys=True)
+    return hashlib.md5(encoded.encode("utf-8")).hexdigest()
+
+
+# skróty właściwości serii i kluczy layoutu figury
+def figure_signature(figure):
+    figure = figure.to_plotly_json()
+    return {
+        'data': [{key: _digest(value) for key, value in trace.items()} for trace in figure['data']],
+        'layout': {key: _digest(value) for key, value in figure['layout'].items()},
+    }
+
+
+def _same_traces(signature, previous):
+    return (len(signature['data']) == len(previous['data'])
+            and all(trace.get('type') == old.get('type') for trace, old in zip(signature['data'], previous['data'])))
+
+
+# operacje Patch zamieniające obiekt o skrótach previous na obiekt o skrótach current
+def _patch_object(patch, values, current, previous):
+    for key, digest in current.items():
+        if digest != previous.get(key):
+            patch[key] = values[key]
+    for key in previous.keys() - current.keys():
+        del patch[key]
+
+
+# zwraca (figura albo Patch, nowa sygnatura); previous - sygnatura figury wyświetlanej w przeglądarce
+def figure_update(figure, previous):
+    signature = figure_signature(figure)
+    if not previous or not _same_traces(signature, previous):
+        return figure, signature
+
+    plotly_json = figure.to_plotly_json()
+    patch = Patch()
+    for index, (trace, old) in enumerate(zip(signature['data'], previous['data'])):
+        _patch_object(patch['data'][index], plotly_json['data'][index], trace, old)
+    _patch_object(patch['layout'], plotly_json['layout'], signature['layout'], previous['layout'])
+    return patch, signature
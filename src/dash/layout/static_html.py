@@ -0,0 +1,96 @@
+import html
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+# Zapis komponentów stron (html, dbc, dcc.Graph) jako statycznego, samodzielnego pliku HTML -
+# bez serwera Dash i bez zasobów z sieci. Wykresy są osadzane przez plotly.io.to_html,
+# a biblioteka plotly.js jest wklejana raz na plik.
+
+# komponenty dash_bootstrap_components: typ -> (znacznik, klasy CSS)
+BOOTSTRAP_TAGS = {
+    'Container': ('div', 'container'),
+    'Row': ('div', 'row'),
+    'Col': ('div', 'col'),
+    'Card': ('div', 'card'),
+    'CardBody': ('div', 'card-body'),
+    'Table': ('table', 'table'),
+    'Badge': ('span', 'badge'),
+}
+
+# style zastępujące arkusz Bootstrapa (wczytywany na stronach z CDN)
+STYLES = """
+body { font-family: system-ui, -apple-system, "Segoe UI", Roboto, sans-serif; margin: 2rem; color: #212529; }
+.container { max-width: 1200px; margin: 0 auto; }
+.card { border: 1px solid #dee2e6; border-radius: .375rem; margin-bottom: 1rem; }
+.card-body { padding: 1rem; }
+.table { border-collapse: collapse; width: 100%; margin-bottom: 1rem; }
+.table th, .table td { border: 1px solid #dee2e6; padding: .4rem .6rem; text-align: left; }
+.table tbody tr:nth-child(odd) { background: #f8f9fa; }
+.alert { padding: .75rem 1rem; border-radius: .375rem; margin: 1rem 0; border: 1px solid #ffe69c; background: #fff3cd; }
+.alert-danger { border-color: #f1aeb5; background: #f8d7da; }
+.alert-info { border-color: #9eeaf9; background: #cff4fc; }
+"""
+
+_VOID_TAGS = {'br', 'hr', 'img'}
+# właściwości komponentów html przepisywane jako atrybuty znacznika
+_ATTRIBUTES = ['id', 'href', 'title']
+GRAPH_HEIGHT = "450px"
+
+
+def _attributes(props, classes):
+    classes = " ".join(filter(None, [classes, props.get('className')]))
+    attributes = f' class="{html.escape(classes)}"' if classes else ""
+    for name in _ATTRIBUTES:
+        if props.get(name) is not None:
+            attributes += f' {name}="{html.escape(str(props[name]))}"'
+    if props.get('style'):
+        style = "; ".join(f"{key}: {value}" for key, value in props['style'].items())
+        attributes += f' style="{html.escape(style)}"'
+    return attributes
+
+
+def _graph(props):
+    figure = props.get('figure')
+    if figure is None:
+        return ""
+    # wysokość wykresów bez ustawionej wysokości w layoucie (jak domyślnie w dcc.Graph)
+    return pio.to_html(figure, full_html=False, include_plotlyjs=False, default_height=GRAPH_HEIGHT)
+
+
+# HTML komponentu (lub listy komponentów, napisu, liczby)
+def render_component(component):
+    if component is None:
+        return ""
+    if isinstance(component, (list, tuple)):
+        return "".join(render_component(child) for child in component)
+    if not hasattr(component, 'to_plotly_json'):
+        return html.escape(str(component))
+
+    spec = component.to_plotly_json()
+    props, namespace, component_type = spec['props'], spec['namespace'], spec['type']
+    if namespace == 'dash_core_components':
+        return _graph(props) if component_type == 'Graph' else ""
+
+    if namespace == 'dash_bootstrap_components':
+        if component_type == 'Alert':
+            tag, classes = 'div', f"alert alert-{props.get('color', 'warning')}"
+        else:
+            tag, classes = BOOTSTRAP_TAGS.get(component_type, ('div', ''))
+    else:
+        tag, classes = component_type.lower(), ''
+
+    if tag in _VOID_TAGS:
+        return f"<{tag}>"
+    return f"<{tag}{_attributes(props, classes)}>{render_component(props.get('children'))}</{tag}>"
+
+
+# pełny dokument HTML; plotly.js jest wbudowany, chyba że strona nie ma wykresów (include_plotlyjs=False)
+def render_page(title, body, include_plotlyjs=True):
+    script = f'<script type="text/javascript">{get_plotlyjs()}</script>' if include_plotlyjs else ""
+    return (
+        "<!DOCTYPE html>\n"
+        f'<html lang="pl"><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+        f"<style>{STYLES}</style>"
+        f"{script}"
+        f"</head><body>{render_component(body)}</body></html>\n"
+    )
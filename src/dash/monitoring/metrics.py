@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from plotly.utils import PlotlyJSONEncoder
+
+from monitoring.profiling import profile_callback
+
+logger = logging.getLogger(__name__)
+
+# Zapytania wolniejsze niż próg są logowane razem z SQL i parametrami
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "500"))
+# Odpowiedzi callbacków większe niż próg są logowane jako ostrzeżenie (pozostałe na poziomie DEBUG)
+LARGE_RESPONSE_BYTES = int(os.environ.get("LARGE_RESPONSE_BYTES", str(1024 * 1024)))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7)
+ROWS_BUCKETS = (1, 10, 100, 1e3, 1e4, 1e5, 1e6, 1e7)
+
+# nazwa callbacku, w którym aktualnie wykonuje się kod (do etykiet zapytań i etapów)
+current_callback = ContextVar("current_callback", default="none")
+
+
+class Histogram:
+    """Histogram w formacie Prometheusa (kumulatywne kubełki, suma, licznik)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Rejestr histogramów z etykietami, bezpieczny dla wątków"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def define(self, name, help_text, buckets, label_names):
+        self._metrics[name] = {
+            "help": help_text,
+            "buckets": buckets,
+            "labels": tuple(label_names),
+            "series": {},
+        }
+
+    def observe(self, name, value, **labels):
+        metric = self._metrics[name]
+        key = tuple(str(labels.get(label, "")) for label in metric["labels"])
+        with self._lock:
+            histogram = metric["series"].get(key)
+            if histogram is None:
+                histogram = metric["series"][key] = Histogram(metric["buckets"])
+            histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(metric["series"].items()):
+                    labels = ",".join(f'{label}="{_escape(value)}"'
+                                      for label, value in zip(metric["labels"], key))
+                    prefix = f"{labels}," if labels else ""
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+registry.define("dash_callback_duration_seconds", "Czas wykonania callbacku Dash",
+                LATENCY_BUCKETS, ["callback"])
+registry.define("dash_callback_stage_duration_seconds",
+                "Czas etapów callbacku (sqlite, pandas, plotly, serialization)",
+                LATENCY_BUCKETS, ["callback", "stage"])
+registry.define("dash_callback_response_bytes", "Rozmiar odpowiedzi callbacku po serializacji do JSON",
+                BYTES_BUCKETS, ["callback"])
+registry.define("sqlite_query_duration_seconds", "Czas wykonania zapytania SQLite",
+                LATENCY_BUCKETS, ["query", "callback"])
+registry.define("sqlite_query_rows", "Liczba wierszy zwróconych przez zapytanie SQLite",
+                ROWS_BUCKETS, ["query", "callback"])
+
+
+# mierzy czas etapu w bieżącym callbacku
+@contextmanager
+def timed_stage(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("dash_callback_stage_duration_seconds", time.perf_counter() - start,
+                         callback=current_callback.get(), stage=stage)
+
+
+# rejestruje wykonane zapytanie SQL i loguje wolne zapytania
+def record_query(name, sql, params, duration, rows):
+    callback = current_callback.get()
+    registry.observe("sqlite_query_duration_seconds", duration, query=name, callback=callback)
+    registry.observe("sqlite_query_rows", rows, query=name, callback=callback)
+    if duration * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        logger.warning("Wolne zapytanie %s (%.0f ms, %d wierszy, callback %s): %s | parametry: %s",
+                       name, duration * 1000, rows, callback, " ".join(sql.split()), params)
+
+
+# rozmiar odpowiedzi liczony tak samo, jak serializuje ją Dash
+def payload_size(result):
+    return len(json.dumps(result, cls=PlotlyJSONEncoder).encode("utf-8"))
+
+
+def log_response_size(name, size):
+    level = logging.WARNING if size >= LARGE_RESPONSE_BYTES else logging.DEBUG
+    logger.log(level, "Odpowiedź callbacku %s: %d B", name, size)
+
+
+# dekorator mierzący czas callbacku, jego etapy i rozmiar odpowiedzi;
+# przy włączonym profilowaniu wywołanie jest dodatkowo profilowane (monitoring.profiling)
+def instrument_callback(name):
+    def decorator(func):
+        func = profile_callback(name)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = current_callback.set(name)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                try:
+                    with timed_stage("serialization"):
+                        size = payload_size(result)
+                    registry.observe("dash_callback_response_bytes", size, callback=name)
+                    log_response_size(name, size)
+                except (TypeError, ValueError):
+                    # np. dash.no_update - nie jest wysyłany jako JSON
+                    pass
+                return result
+            finally:
+                registry.observe("dash_callback_duration_seconds", time.perf_counter() - start,
+                                 callback=name)
+                current_callback.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+# udostępnia metryki pod adresem /metrics serwera Flask
+def register_metrics_endpoint(server, path="/metrics"):
+    from flask import Response
+
+    @server.route(path)
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,147 @@
+import os
+import sys
+import logging
+import threading
+import functools
+import cProfile
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Profilowanie pojedynczych wywołań callbacków (domyślnie wyłączone).
+#
+# PROFILE_CALLBACKS=visual_analysis.load_map,advanced_analysis.update_analysis
+#     profiluje każde wywołanie wymienionych callbacków ("*" - wszystkich); wykresy strony
+#     wizualnej mają osobne callbacki visual_analysis.load_<wykres> i visual_analysis.preview_<wykres>
+# PROFILE_HEADER=1
+#     profiluje wywołanie, gdy żądanie ma nagłówek X-Profile-Callback
+#     z nazwą callbacku (lub "*")
+# PROFILE_MODE=sampling|cprofile
+#     sampling - próbkowanie stosu, plik .folded (flamegraph.pl, speedscope, inferno)
+#     cprofile - profiler deterministyczny, plik .prof (snakeviz, flameprof)
+#
+# Gdy żadna ze zmiennych PROFILE_CALLBACKS / PROFILE_HEADER nie jest ustawiona,
+# callbacki nie są w ogóle opakowywane.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+
+PROFILE_CALLBACKS = {name.strip() for name in os.environ.get("PROFILE_CALLBACKS", "").split(",") if name.strip()}
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "") not in ("", "0")
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "sampling")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(project_root, "profiles"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", "2")) / 1000
+
+HEADER_NAME = "X-Profile-Callback"
+
+
+def profiling_enabled():
+    return bool(PROFILE_CALLBACKS) or PROFILE_HEADER
+
+
+def _matches(requested, name):
+    return requested == "*" or requested == name
+
+
+# sprawdza, czy dane wywołanie callbacku ma być profilowane
+def _should_profile(name):
+    if any(_matches(requested, name) for requested in PROFILE_CALLBACKS):
+        return True
+    if PROFILE_HEADER:
+        from flask import has_request_context, request
+        if has_request_context():
+            requested = request.headers.get(HEADER_NAME)
+            return requested is not None and _matches(requested.strip(), name)
+    return False
+
+
+def _output_path(name, extension):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return os.path.join(PROFILE_DIR, f"{name}-{timestamp}.{extension}")
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":").replace(" ", "_")
+
+
+class StackSampler:
+    """Próbkuje stos wskazanego wątku i zlicza stosy w formacie "folded".
+
+    Stos jest obcinany do ramek wywołanych z `root_code`, aby profil obejmował
+    tylko sam callback, a nie obsługę żądania przez Flask i Dash.
+    """
+
+    def __init__(self, thread_id, interval, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _run_sampling(name, func, args, kwargs):
+    sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL, root_code=_run_sampling.__code__)
+    try:
+        with sampler:
+            return func(*args, **kwargs)
+    finally:
+        path = _output_path(name, "folded")
+        sampler.write(path)
+        logger.info("Profil callbacku %s zapisany do %s (%d próbek)", name, path, sum(sampler.stacks.values()))
+
+
+def _run_cprofile(name, func, args, kwargs):
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        path = _output_path(name, "prof")
+        profiler.dump_stats(path)
+        logger.info("Profil callbacku %s zapisany do %s", name, path)
+
+
+# dekorator profilujący wywołania callbacku, gdy profilowanie jest włączone
+def profile_callback(name):
+    def decorator(func):
+        if not profiling_enabled():
+            return func
+
+        run_profiled = _run_cprofile if PROFILE_MODE == "cprofile" else _run_sampling
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _should_profile(name):
+                return func(*args, **kwargs)
+            return run_profiled(name, func, args, kwargs)
+
+        return wrapper
+
+    return decorator
@@ -4,18 +4,22 @@ import pandas as pd
 import sqlite3
 import plotly.graph_objects as go
 from statsmodels.tsa.arima.model import ARIMA
-import os
+from storage import database, backend, anomalies
+from storage.cache import memoize
+from layout.date_range import (create_date_range_container, selector_styles, register_date_preset_callback,
+                               period_filter)
+from monitoring.metrics import instrument_callback, timed_stage
 
-# Konfiguracja ścieżek
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(current_dir))
-DB_PATH = os.path.join(project_root, 'scripts', 'chicago_crimes.db')
 
-
-# tworzy zapytanie do bazy danych
+# tworzy zapytanie do bazy danych (wynik współdzielony przez workery, ponownie
+# używany przy zmianie parametrów ARIMA)
+@memoize("advanced_analysis.query_database", should_cache=lambda df: not df.empty)
 def query_database(year_filter=None):
+    if backend.use_columnar():
+        with timed_stage("columnar"):
+            return backend.get_engine().monthly_type_counts(year_filter)
+
     try:
-        conn = sqlite3.connect(DB_PATH)
         base_query = """
         SELECT 
             Year, Month, PrimaryType, COUNT(*) as count
@@ -23,19 +27,15 @@ def query_database(year_filter=None):
         WHERE 1=1
         """
 
-        if isinstance(year_filter, tuple):
-            base_query += f" AND Year >= {year_filter[0]} AND Year <= {year_filter[1]}"
-        elif year_filter:
-            base_query += f" AND Year = {year_filter}"
+        where, params = database.year_filter_clause(year_filter)
+        base_query += where
 
         base_query += """ 
         GROUP BY Year, Month, PrimaryType
         ORDER BY Year, Month
         """
 
-        df = pd.read_sql_query(base_query, conn)
-        conn.close()
-        return df
+        return database.read_sql("advanced_analysis.query_database", base_query, params, year_filter)
     except sqlite3.OperationalError as e:
         print(f"Błąd bazy danych: {e}")
         return pd.DataFrame()
@@ -99,6 +99,52 @@ def create_arima_controls():
     )
 
 
+# tworzy kontrolki wykrywania anomalii
+def create_anomaly_controls():
+    return dbc.Card(
+        dbc.CardBody([
+            html.H4("Wykrywanie anomalii (typ przestępstwa × dystrykt)", className="mb-3"),
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Okres szeregów"),
+                    dcc.RadioItems(
+                        id='anomaly-granularity',
+                        options=[
+                            {'label': ' Miesiące', 'value': 'month'},
+                            {'label': ' Tygodnie', 'value': 'week'}
+                        ],
+                        value='month',
+                        className="mb-3"
+                    )
+                ], width=4),
+                dbc.Col([
+                    html.Label("Próg |z|"),
+                    dcc.Slider(
+                        id='anomaly-threshold',
+                        min=anomalies.MIN_STORED_Z,
+                        max=5,
+                        step=0.5,
+                        value=3,
+                        marks={i: str(i) for i in range(2, 6)},
+                        className="mb-3"
+                    )
+                ], width=8)
+            ]),
+            dbc.Row([
+                dbc.Col([
+                    dbc.Button(
+                        "Wykryj anomalie",
+                        id="detect-anomalies-button",
+                        color="primary",
+                        className="w-100"
+                    )
+                ])
+            ])
+        ]),
+        className="mb-4"
+    )
+
+
 # tworzy kontrolki do wyboru roku
 def create_year_selector():
     return dbc.Card(
@@ -108,7 +154,8 @@ def create_year_selector():
                 id='advanced-date-range-type',
                 options=[
                     {'label': ' Jeden rok', 'value': 'single'},
-                    {'label': ' Zakres lat', 'value': 'range'}
+                    {'label': ' Zakres lat', 'value': 'range'},
+                    {'label': ' Zakres dat', 'value': 'dates'}
                 ],
                 value='single',
                 className="mb-3"
@@ -141,25 +188,35 @@ def create_year_selector():
                                    for year in range(2008, 2018)}
                         )
                     ]
-                )
+                ),
+                create_date_range_container('advanced-')
             ])
         ]),
         className="mb-4"
     )
 
 
-# tworzy analizę szeregów czasowych
-def create_time_series_analysis(df, p=1, d=1, q=1):
+# miesięczna suma przestępstw (indeks - pierwszy dzień miesiąca)
+def monthly_series(df):
     df_ts = df.groupby(['Year', 'Month'])['count'].sum().reset_index()
     df_ts['date'] = pd.to_datetime(df_ts['Year'].astype(str) + '-' + df_ts['Month'].astype(str) + '-01')
-    df_ts = df_ts.set_index('date').sort_index()
+    return df_ts.set_index('date').sort_index()
+
+
+# prognoza ARIMA szeregu na steps miesięcy: (średnia, przedział ufności)
+def arima_forecast(series, p=1, d=1, q=1, steps=12):
+    model = ARIMA(series, order=(p, d, q))
+    model_fit = model.fit()
+    forecast = model_fit.get_forecast(steps=steps)
+    return forecast.predicted_mean, forecast.conf_int()
+
+
+# tworzy analizę szeregów czasowych
+def create_time_series_analysis(df, p=1, d=1, q=1):
+    df_ts = monthly_series(df)
 
     try:
-        model = ARIMA(df_ts['count'], order=(p, d, q))
-        model_fit = model.fit()
-        forecast = model_fit.get_forecast(steps=12)
-        forecast_mean = forecast.predicted_mean
-        forecast_ci = forecast.conf_int()
+        forecast_mean, forecast_ci = arima_forecast(df_ts['count'], p, d, q)
 
         fig = go.Figure()
 
@@ -219,6 +276,63 @@ def create_time_series_analysis(df, p=1, d=1, q=1):
         )
 
 
+# buduje analizę dla okresu i parametrów modelu, wynik jest współdzielony przez workery
+@memoize("advanced_analysis.time_series")
+def build_time_series_analysis(year_filter, p, d, q):
+    df = query_database(year_filter)
+
+    if df.empty:
+        return None
+
+    with timed_stage("arima"):
+        return create_time_series_analysis(df, p, d, q)
+
+
+# tworzy widok anomalii: liczba nietypowych szeregów w okresach i najsilniejsze odchylenia
+def create_anomaly_view(result, selected, granularity, threshold):
+    period_name = 'tydzień' if granularity == 'week' else 'miesiąc'
+    summary = html.P(
+        f"Przeanalizowano {result['series']} szeregów po {result['periods']} okresów - "
+        f"{len(selected)} nietypowych wartości (|z| ≥ {threshold}) w wybranym okresie.",
+        className="mb-3"
+    )
+    if selected.empty:
+        return dbc.Card(dbc.CardBody([summary]), className="mt-4")
+
+    rising = selected['z'] > 0
+    fig = go.Figure()
+    for mask, name, color in [(rising, 'Więcej niż oczekiwano', '#e74c3c'),
+                              (~rising, 'Mniej niż oczekiwano', '#3498db')]:
+        counts = selected[mask].groupby('Start').size()
+        if not counts.empty:
+            fig.add_trace(go.Bar(x=counts.index, y=counts.values, name=name, marker_color=color))
+    fig.update_layout(
+        title=f'Liczba nietypowych szeregów (okres: {period_name})',
+        xaxis_title="Data",
+        yaxis_title="Liczba szeregów",
+        barmode='stack'
+    )
+
+    top = selected.head(25)
+    table = pd.DataFrame({
+        'Typ przestępstwa': top['PrimaryType'],
+        'Dystrykt': top['District'],
+        'Początek okresu': top['Start'].dt.strftime('%Y-%m-%d'),
+        'Liczba': top['count'],
+        'Oczekiwana': top['expected'].round(1),
+        'z': top['z'].round(2),
+    })
+
+    return dbc.Card([
+        dbc.CardBody([
+            summary,
+            dcc.Graph(figure=fig),
+            html.H5("Największe odchylenia", className="mt-3"),
+            dbc.Table.from_dataframe(table, striped=True, bordered=True, hover=True, className="text-start")
+        ])
+    ], className="mt-4")
+
+
 def layout():
     return html.Div([
         html.H1("Zaawansowana Analiza Danych", className="mb-4 text-center"),
@@ -226,21 +340,24 @@ def layout():
             dbc.Col(create_year_selector(), width=12),
             dbc.Col(create_arima_controls(), width=12)
         ]),
-        html.Div(id="advanced-content")
+        html.Div(id="advanced-content"),
+        dbc.Row(dbc.Col(create_anomaly_controls(), width=12), className="mt-4"),
+        html.Div(id="anomaly-content")
     ])
 
 
 # rejestruje funkcje zwrotne
 def register_callbacks(app):
     @app.callback(
-        [Output('advanced-year-range-container', 'style'),
-         Output('advanced-single-year-container', 'style')],
+        [Output('advanced-single-year-container', 'style'),
+         Output('advanced-year-range-container', 'style'),
+         Output('advanced-date-picker-container', 'style')],
         Input('advanced-date-range-type', 'value')
     )
     def toggle_year_selector(selector_type):
-        if selector_type == 'range':
-            return {'display': 'block'}, {'display': 'none'}
-        return {'display': 'none'}, {'display': 'block'}
+        return selector_styles(selector_type)
+
+    register_date_preset_callback(app, 'advanced-')
 
     @app.callback(
         Output("advanced-content", "children"),
@@ -248,26 +365,55 @@ def register_callbacks(app):
         [State("advanced-single-year-dropdown", "value"),
          State("advanced-year-range-slider", "value"),
          State("advanced-date-range-type", "value"),
+         State("advanced-date-picker", "start_date"),
+         State("advanced-date-picker", "end_date"),
          State("arima-p", "value"),
          State("arima-d", "value"),
          State("arima-q", "value")],
         prevent_initial_call=True
     )
     # aktualizuje analizę
-    def update_analysis(n_clicks, single_year, year_range, range_type, p, d, q):
-        year_filter = None
-        if range_type == 'single':
-            year_filter = single_year
-        else:
-            year_filter = tuple(year_range)
+    @instrument_callback("advanced_analysis.update_analysis")
+    def update_analysis(n_clicks, single_year, year_range, range_type, start_date, end_date, p, d, q):
+        year_filter = period_filter(range_type, single_year, year_range, start_date, end_date)
+        if year_filter is None:
+            return dbc.Alert("Wybierz zakres dat.", color="warning", className="mt-3")
 
-        df = query_database(year_filter)
+        analysis = build_time_series_analysis(year_filter, p, d, q)
 
-        if df.empty:
+        if analysis is None:
             return dbc.Alert(
                 "Brak danych dla wybranego okresu.",
                 color="warning",
                 className="mt-3"
             )
 
-        return create_time_series_analysis(df, p, d, q)
+        return analysis
+
+    @app.callback(
+        Output("anomaly-content", "children"),
+        [Input("detect-anomalies-button", "n_clicks")],
+        [State("advanced-single-year-dropdown", "value"),
+         State("advanced-year-range-slider", "value"),
+         State("advanced-date-range-type", "value"),
+         State("advanced-date-picker", "start_date"),
+         State("advanced-date-picker", "end_date"),
+         State("anomaly-granularity", "value"),
+         State("anomaly-threshold", "value")],
+        prevent_initial_call=True
+    )
+    # wykrywa anomalie we wszystkich szeregach (storage/anomalies.py) i pokazuje te z wybranego okresu
+    @instrument_callback("advanced_analysis.update_anomalies")
+    def update_anomalies(n_clicks, single_year, year_range, range_type, start_date, end_date,
+                         granularity, threshold):
+        year_filter = period_filter(range_type, single_year, year_range, start_date, end_date)
+        if year_filter is None:
+            return dbc.Alert("Wybierz zakres dat.", color="warning", className="mt-3")
+
+        result = anomalies.score_series(granularity)
+        if result is None:
+            return dbc.Alert("Brak danych do wykrywania anomalii.", color="warning", className="mt-3")
+
+        with timed_stage("pandas"):
+            selected = anomalies.select_anomalies(result['anomalies'], year_filter, threshold)
+            return create_anomaly_view(result, selected, granularity, threshold)
@@ -1,13 +1,16 @@
 from dash import html, dcc, Output, Input, State
 import dash_bootstrap_components as dbc
+import numpy as np
 import pandas as pd
 import sqlite3
-import os
+from storage import database, backend, sampling, significance
+from storage.cache import memoize
+from layout.date_range import (create_date_range_container, selector_styles, register_date_preset_callback,
+                               period_filter, oldest_date, newest_date)
+from monitoring.metrics import instrument_callback, timed_stage
 
-# Konfiguracja ścieżek
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(current_dir))
-DB_PATH = os.path.join(project_root, 'scripts', 'chicago_crimes.db')
+# średnia długość miesiąca w dniach - czas obserwacji okresów porównania
+DAYS_PER_MONTH = 365.25 / 12
 
 
 # tworzy komponent z komunikatem ładowania
@@ -17,29 +20,32 @@ def create_loading_message():
     ])
 
 
-# funkcja do pobierania danych z bazy danych
+# funkcja do pobierania danych z bazy danych - liczba przestępstw i aresztowań
+# według typu, roku i miesiąca
 def query_arrests_data(year_filter=None):
-    try:
-        conn = sqlite3.connect(DB_PATH)
+    if backend.use_columnar():
+        with timed_stage("columnar"):
+            return backend.get_engine().arrest_counts(year_filter)
 
+    try:
         query = """
         SELECT 
             PrimaryType as Typ,
-            Arrest as Aresztowanie,
+            Year as Rok,
             Month as Miesiac,
-            Year as Rok
+            COUNT(*) as Liczba,
+            SUM(Arrest) as Aresztowania
         FROM ChicagoCrimes
-        WHERE 1=1
+        WHERE PrimaryType IS NOT NULL
         """
 
-        if isinstance(year_filter, tuple):
-            query += f" AND Year BETWEEN {year_filter[0]} AND {year_filter[1]}"
-        elif year_filter:
-            query += f" AND Year = {year_filter}"
+        where, params = database.year_filter_clause(year_filter)
+        query += where
+        query += """
+        GROUP BY PrimaryType, Year, Month
+        """
 
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+        return database.read_sql("statistical_analysis.query_arrests_data", query, params, year_filter)
 
     except sqlite3.OperationalError as e:
         print(f"Błąd bazy danych: {e}")
@@ -47,36 +53,35 @@ def query_arrests_data(year_filter=None):
 
 
 # funkcja do tworzenia statystyk aresztowań
-def create_arrest_statistics(df):
+# errors: opcjonalne przedziały ufności według typu (kolumny 'Typ przestępstwa' i opisy błędów)
+def create_arrest_statistics(df, errors=None):
     # Podstawowe statystyki aresztowań według typu przestępstwa
     crime_stats = df.groupby('Typ').agg({
-        'Aresztowanie': ['count', 'sum', 'mean']
-    }).round(3)
+        'Liczba': 'sum',
+        'Aresztowania': 'sum'
+    })
+    crime_stats['Wskaźnik'] = (crime_stats['Aresztowania'] / crime_stats['Liczba']).round(3)
 
     crime_stats = crime_stats.reset_index()
     crime_stats.columns = ['Typ przestępstwa', 'Liczba przestępstw', 'Liczba aresztowań', 'Wskaźnik aresztowań']
     crime_stats = crime_stats.sort_values('Liczba przestępstw', ascending=False)
     crime_stats['Wskaźnik aresztowań'] = crime_stats['Wskaźnik aresztowań'].map(lambda x: f"{x:.1%}")
 
+    if errors is not None:
+        crime_stats = crime_stats.merge(errors, on='Typ przestępstwa', how='left')
+
     return crime_stats
 
 
 # funkcja do tworzenia szczegółowych statystyk
 def create_detailed_statistics(df):
-    # Najpierw utworzmy miesięczne agregacje
-    monthly_counts = df.groupby(['Typ', 'Rok', 'Miesiac']).size().reset_index(name='count')
-
-    # Teraz możemy obliczyć statystyki dla każdego typu
-    detailed_stats = pd.DataFrame()
+    # Dane są już miesięcznymi agregacjami (typ, rok, miesiąc)
+    monthly_counts = df.rename(columns={'Liczba': 'count'})
 
     # Podstawowe obliczenia dla każdego typu
-    type_stats = df.groupby('Typ').agg({
-        'Aresztowanie': [
-            ('Całkowita liczba', 'count'),
-            ('% wszystkich przestępstw', lambda x: len(x) / len(df) * 100)
-        ]
-    })
-    type_stats.columns = type_stats.columns.get_level_values(1)
+    type_stats = monthly_counts.groupby('Typ')[['count']].sum()
+    type_stats.columns = ['Całkowita liczba']
+    type_stats['% wszystkich przestępstw'] = type_stats['Całkowita liczba'] / monthly_counts['count'].sum() * 100
 
     # Obliczenia na podstawie miesięcznych danych
     monthly_stats = monthly_counts.groupby('Typ').agg({
@@ -113,13 +118,13 @@ def create_detailed_statistics(df):
 
 
 # funkcja do tworzenia dashboardu statystycznego
-def create_statistics_dashboard(df):
-    crime_stats = create_arrest_statistics(df)
+def create_statistics_dashboard(df, errors=None):
+    crime_stats = create_arrest_statistics(df, errors)
     detailed_stats = create_detailed_statistics(df)
 
     # Obliczanie sumarycznych statystyk
-    total_crimes = df['Aresztowanie'].count()
-    total_arrests = df['Aresztowanie'].sum()
+    total_crimes = int(df['Liczba'].sum())
+    total_arrests = int(df['Aresztowania'].sum())
     overall_rate = total_arrests / total_crimes
     unique_types = df['Typ'].nunique()
     avg_crimes_per_type = total_crimes / unique_types
@@ -178,6 +183,172 @@ def create_statistics_dashboard(df):
     ])
 
 
+# funkcja budująca dashboard dla okresu, wynik jest współdzielony przez workery serwera
+@memoize("statistical_analysis.dashboard")
+def build_statistics_dashboard(year_filter):
+    df = query_arrests_data(year_filter)
+
+    if df is None or df.empty:
+        return None
+
+    with timed_stage("pandas"):
+        return create_statistics_dashboard(df)
+
+
+# funkcja budująca przybliżony dashboard z próbki warstwowej (storage/sampling.py);
+# liczby przestępstw według typu i roku są dokładne, szacowane są aresztowania i podział na miesiące
+def build_approximate_dashboard(year_filter):
+    sample = sampling.query_sample(year_filter)
+    if sample is None or sample.empty:
+        return None
+
+    with timed_stage("sample"):
+        df = sampling.estimate(sample, ['PrimaryType', 'Year', 'Month'], arrests=True)
+        df = df.rename(columns={'PrimaryType': 'Typ', 'Year': 'Rok', 'Month': 'Miesiac',
+                                'count': 'Liczba', 'arrests': 'Aresztowania'})
+        type_errors = sampling.estimate(sample, ['PrimaryType'], arrests=True)
+        errors = pd.DataFrame({
+            'Typ przestępstwa': type_errors['PrimaryType'],
+            'Liczba aresztowań ± (95%)': type_errors['arrests_error'].map(lambda x: f"±{x:,.0f}"),
+        })
+
+    with timed_stage("pandas"):
+        dashboard = create_statistics_dashboard(df[['Typ', 'Rok', 'Miesiac', 'Liczba', 'Aresztowania']], errors)
+
+    return html.Div([
+        dbc.Alert("Wynik przybliżony z próbki danych - trwa liczenie dokładnych statystyk...",
+                  color="info", className="mt-3"),
+        dashboard
+    ])
+
+
+# liczba przestępstw i aresztowań według typu i miesiąca dla jednego roku (współdzielona przez workery);
+# okresy porównania to sumy lat, więc kolejne porównania nie skanują ponownie tabeli
+@memoize("statistical_analysis.year_counts")
+def query_year_arrests(year):
+    return query_arrests_data(year)
+
+
+# liczba przestępstw i aresztowań według typu oraz czas obserwacji zakresu lat w miesiącach -
+# dni zakresu objęte danymi (niepełny pierwszy lub ostatni miesiąc danych liczy się częściowo)
+def period_type_counts(first, last):
+    frames = [df for df in map(query_year_arrests, range(first, last + 1)) if df is not None and not df.empty]
+    if not frames:
+        return None, 0
+    df = pd.concat(frames, ignore_index=True)
+
+    start, end = pd.Timestamp(first, 1, 1), pd.Timestamp(last, 12, 31)
+    oldest, newest = oldest_date(), newest_date()
+    if oldest is not None:
+        start = max(start, oldest)
+    if newest is not None:
+        end = min(end, newest)
+    months = ((end - start).days + 1) / DAYS_PER_MONTH
+    return df.groupby('Typ')[['Liczba', 'Aresztowania']].sum(), months
+
+
+# czy zakresy lat (od, do) mają wspólne lata
+def periods_overlap(first_period, second_period):
+    return first_period[0] <= second_period[1] and second_period[0] <= first_period[1]
+
+
+# wartości p z oznaczeniem istotnych po korekcie (*)
+def format_pvalues(p_values):
+    text = pd.Series(p_values).map(lambda p: "-" if np.isnan(p) else "<0.001" if p < 0.001 else f"{p:.3f}")
+    return text.where(~(p_values < significance.ALPHA), text + " *")
+
+
+# funkcja do tworzenia tabeli porównania dwóch okresów: zmiana miesięcznej liczby przestępstw
+# (test Poissona) i wskaźnika aresztowań (test dwóch proporcji) z korektą Benjaminiego-Hochberga,
+# liczone jednocześnie dla wszystkich typów
+def create_period_comparison(first, months1, second, months2, labels):
+    types = first.index.union(second.index)
+    first = first.reindex(types, fill_value=0)
+    second = second.reindex(types, fill_value=0)
+
+    ratio, volume_p = significance.poisson_rate_test(first['Liczba'], months1, second['Liczba'], months2)
+    rate_change, arrest_p = significance.two_proportion_test(
+        first['Aresztowania'], first['Liczba'], second['Aresztowania'], second['Liczba'])
+    volume_p = significance.adjust_pvalues(volume_p)
+    arrest_p = significance.adjust_pvalues(arrest_p)
+
+    label1, label2 = labels
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate1 = first['Aresztowania'].to_numpy() / first['Liczba'].to_numpy()
+        rate2 = second['Aresztowania'].to_numpy() / second['Liczba'].to_numpy()
+    table = pd.DataFrame({
+        'Typ przestępstwa': types,
+        f'Średnio / miesiąc ({label1})': (first['Liczba'].to_numpy() / months1).round(1),
+        f'Średnio / miesiąc ({label2})': (second['Liczba'].to_numpy() / months2).round(1),
+        'Zmiana liczby': pd.Series(ratio - 1).map(lambda x: f"{x:+.1%}" if np.isfinite(x) else "-"),
+        'p liczby (BH)': format_pvalues(volume_p),
+        f'Wskaźnik aresztowań ({label1})': pd.Series(rate1).map(lambda x: f"{x:.1%}" if np.isfinite(x) else "-"),
+        f'Wskaźnik aresztowań ({label2})': pd.Series(rate2).map(lambda x: f"{x:.1%}" if np.isfinite(x) else "-"),
+        'Zmiana wskaźnika (pp)': (rate_change * 100).round(1),
+        'p wskaźnika (BH)': format_pvalues(arrest_p),
+    })
+    order = np.argsort(-(first['Liczba'].to_numpy() + second['Liczba'].to_numpy()), kind='stable')
+    table = table.iloc[order]
+
+    significant_volume = int(np.sum(volume_p < significance.ALPHA))
+    significant_arrests = int(np.sum(arrest_p < significance.ALPHA))
+    return dbc.Container([
+        html.H3(f"Porównanie okresów {label1} i {label2}", className="mt-4 mb-3"),
+        html.P([
+            f"Istotna zmiana miesięcznej liczby przestępstw: {significant_volume} z {len(types)} typów, "
+            f"wskaźnika aresztowań: {significant_arrests} z {len(types)} typów.",
+            html.Br(),
+            f"* p < {significance.ALPHA} po korekcie Benjaminiego-Hochberga; liczba przestępstw - "
+            f"dokładny test Poissona ({months1:.1f} i {months2:.1f} miesięcy danych), "
+            "aresztowania - test z dla dwóch proporcji."
+        ]),
+        dbc.Table.from_dataframe(table, striped=True, bordered=True, hover=True, className="text-start")
+    ])
+
+
+# funkcja budująca porównanie dwóch zakresów lat, wynik jest współdzielony przez workery serwera
+@memoize("statistical_analysis.comparison")
+def build_period_comparison(first_period, second_period):
+    first, months1 = period_type_counts(*first_period)
+    second, months2 = period_type_counts(*second_period)
+    if first is None or second is None:
+        return None
+
+    labels = [f"{start}-{end}" if start != end else str(start) for start, end in (first_period, second_period)]
+    with timed_stage("stats"):
+        return create_period_comparison(first, months1, second, months2, labels)
+
+
+# funkcja do tworzenia komponentu wyboru dwóch okresów do porównania
+def create_comparison_selector():
+    def year_slider(component_id, value):
+        return dcc.RangeSlider(
+            id=component_id,
+            min=2008,
+            max=2017,
+            step=1,
+            value=value,
+            marks={str(year): str(year) for year in range(2008, 2018)}
+        )
+
+    return dbc.Card(
+        dbc.CardBody([
+            html.H4("Porównanie dwóch okresów", className="mb-3"),
+            html.P("Okres 1:"),
+            year_slider('stats-compare-first', [2008, 2012]),
+            html.P("Okres 2:", className="mt-3"),
+            year_slider('stats-compare-second', [2013, 2017]),
+            dbc.Button(
+                "Porównaj okresy",
+                id="stats-compare-button",
+                color="primary",
+                className="mt-3 w-100"
+            )
+        ]),
+        className="mt-4 mb-4"
+    )
+
+
 # funkcja do tworzenia komponentu wyboru roku
 def create_year_selector():
     return dbc.Card(
@@ -187,7 +358,8 @@ def create_year_selector():
                 id='stats-date-range-type',
                 options=[
                     {'label': ' Jeden rok', 'value': 'single'},
-                    {'label': ' Zakres lat', 'value': 'range'}
+                    {'label': ' Zakres lat', 'value': 'range'},
+                    {'label': ' Zakres dat', 'value': 'dates'}
                 ],
                 value='single',
                 className="mb-3"
@@ -219,8 +391,17 @@ def create_year_selector():
                                    for year in range(2008, 2018)}
                         )
                     ]
-                )
+                ),
+                create_date_range_container('stats-')
             ]),
+            dcc.Checklist(
+                id='stats-approximate',
+                options=[{'label': ' Szybki podgląd z próbki (wynik przybliżony, potem dokładny)',
+                          'value': 'approximate'}],
+                value=['approximate'],
+                className="mt-3",
+                style={'display': 'none'} if backend.use_columnar() else {}
+            ),
             dbc.Button(
                 "Generuj analizę",
                 id="stats-generate-button",
@@ -239,33 +420,50 @@ def layout():
         dbc.Row([
             dbc.Col(create_year_selector(), width=12)
         ]),
-        html.Div(id="stats-content")
+        html.Div(id="stats-content"),
+        dbc.Row([
+            dbc.Col(create_comparison_selector(), width=12)
+        ]),
+        dcc.Loading(html.Div(id="stats-comparison"), type="circle")
     ])
 
 
 # funkcja do rejestrowania callbacków
 def register_callbacks(app):
     @app.callback(
-        [Output('stats-year-range-container', 'style'),
-         Output('stats-single-year-container', 'style')],
+        [Output('stats-single-year-container', 'style'),
+         Output('stats-year-range-container', 'style'),
+         Output('stats-date-picker-container', 'style')],
         Input('stats-date-range-type', 'value')
     )
     def toggle_year_selector(selector_type):
-        if selector_type == 'range':
-            return {'display': 'block'}, {'display': 'none'}
-        return {'display': 'none'}, {'display': 'block'}
+        return selector_styles(selector_type)
+
+    register_date_preset_callback(app, 'stats-')
 
     @app.callback(
         Output("stats-content", "children"),
         [Input("stats-generate-button", "n_clicks")],
         [State("stats-single-year-dropdown", "value"),
          State("stats-year-range-slider", "value"),
-         State("stats-date-range-type", "value")]
+         State("stats-date-range-type", "value"),
+         State("stats-date-picker", "start_date"),
+         State("stats-date-picker", "end_date"),
+         State("stats-approximate", "value")]
     )
-    def update_statistics(n_clicks, single_year, year_range, range_type):
+    @instrument_callback("statistical_analysis.update_statistics")
+    def update_statistics(n_clicks, single_year, year_range, range_type, start_date, end_date, approximate):
         if n_clicks is None:
             return html.Div()
 
+        # podgląd z próbki zamiast komunikatu ładowania; dokładny wynik podmienia go w load_statistics_data
+        year_filter = period_filter(range_type, single_year, year_range, start_date, end_date)
+        if (approximate and year_filter is not None and not backend.use_columnar()
+                and not build_statistics_dashboard.is_cached(year_filter)):
+            preview = build_approximate_dashboard(year_filter)
+            if preview is not None:
+                return preview
+
         return create_loading_message()
 
     @app.callback(
@@ -273,24 +471,46 @@ def register_callbacks(app):
         [Input("stats-content", "children")],
         [State("stats-single-year-dropdown", "value"),
          State("stats-year-range-slider", "value"),
-         State("stats-date-range-type", "value")],
+         State("stats-date-range-type", "value"),
+         State("stats-date-picker", "start_date"),
+         State("stats-date-picker", "end_date")],
         prevent_initial_call=True
     )
     # funkcja do ładowania danych statystycznych
-    def load_statistics_data(_, single_year, year_range, range_type):
-        year_filter = None
-        if range_type == 'single':
-            year_filter = single_year
-        else:
-            year_filter = tuple(year_range)
+    @instrument_callback("statistical_analysis.load_statistics_data")
+    def load_statistics_data(_, single_year, year_range, range_type, start_date, end_date):
+        year_filter = period_filter(range_type, single_year, year_range, start_date, end_date)
+        if year_filter is None:
+            return dbc.Alert("Wybierz zakres dat.", color="warning", className="mt-3")
 
-        df = query_arrests_data(year_filter)
+        dashboard = build_statistics_dashboard(year_filter)
 
-        if df is None:
+        if dashboard is None:
             return dbc.Alert(
-                "Błąd podczas pobierania danych.",
-                color="danger",
+                "Brak danych dla wybranego okresu.",
+                color="warning",
                 className="mt-3"
             )
 
-        return create_statistics_dashboard(df)
+        return dashboard
+
+    @app.callback(
+        Output("stats-comparison", "children"),
+        Input("stats-compare-button", "n_clicks"),
+        [State("stats-compare-first", "value"),
+         State("stats-compare-second", "value")],
+        prevent_initial_call=True
+    )
+    # funkcja do porównania dwóch okresów (testy istotności dla wszystkich typów naraz)
+    @instrument_callback("statistical_analysis.compare_periods")
+    def compare_periods(n_clicks, first_period, second_period):
+        # testy zakładają niezależne próby - wspólne lata trafiłyby do obu okresów
+        if periods_overlap(first_period, second_period):
+            return dbc.Alert("Okresy porównania nie mogą mieć wspólnych lat.", color="warning", className="mt-3")
+
+        comparison = build_period_comparison(tuple(first_period), tuple(second_period))
+
+        if comparison is None:
+            return dbc.Alert("Brak danych dla jednego z okresów.", color="warning", className="mt-3")
+
+        return comparison
@@ -1,21 +1,22 @@
-from dash import html, dcc, Output, Input, State
+from dash import html, dcc, Output, Input, State, no_update
 import dash_bootstrap_components as dbc
 import pandas as pd
 import sqlite3
 import plotly.express as px
-import os
-
-# Konfiguracja ścieżek
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(current_dir))
-DB_PATH = os.path.join(project_root, 'scripts', 'chicago_crimes.db')
+from storage import database, backend, sampling
+from storage.cache import memoize
+from storage.database import DateRange, normalize_filters
+from layout.date_range import (create_date_range_container, selector_styles, register_date_preset_callback,
+                               period_filter, period_to_json, period_from_json)
+from layout.figure_patch import figure_update
+from layout import figure_budget
+from monitoring.metrics import instrument_callback, timed_stage
 
 
 # Funkcja do pobierania danych z bazy danych z opcjonalnym filtrem lat
 def query_database(year_filter=None):
     """Pobieranie danych z bazy z opcjonalnym filtrem lat"""
     try:
-        conn = sqlite3.connect(DB_PATH)
         base_query = """
         SELECT 
             Year, Month, PrimaryType, LocationDescription, Description,
@@ -23,12 +24,12 @@ def query_database(year_filter=None):
             Hour, Latitude, Longitude, COUNT(*) as count, 
             SUM(Arrest) as arrests
         FROM ChicagoCrimes
+        WHERE 1=1
         """
 
-        if isinstance(year_filter, tuple):  # zakres lat
-            base_query += f" WHERE Year BETWEEN {year_filter[0]} AND {year_filter[1]}"
-        elif year_filter:  # pojedynczy rok
-            base_query += f" WHERE Year = {year_filter}"
+        # zakres lat lub pojedynczy rok
+        where, params = database.year_filter_clause(year_filter)
+        base_query += where
 
         base_query += """
         GROUP BY Year, Month, PrimaryType, LocationDescription, Description,
@@ -36,22 +37,12 @@ def query_database(year_filter=None):
                  Latitude, Longitude
         """
 
-        df = pd.read_sql_query(base_query, conn)
-        conn.close()
-        return df
+        return database.read_sql("visual_analysis.query_database", base_query, params, year_filter)
     except sqlite3.OperationalError as e:
-        print(f"Błąd bazy danych: {e} | Ścieżka: {DB_PATH}")
+        print(f"Błąd bazy danych: {e} | Ścieżka: {database.DB_PATH}")
         return pd.DataFrame()
 
 
-# Funkcja tworząca komunikat o ładowaniu danych
-def create_loading_message():
-    """Tworzenie komponentu z komunikatem ładowania"""
-    return html.Div([
-        html.H4("Ładowanie danych...", className="text-center mt-4")
-    ])
-
-
 # Funkcja tworząca komponent do wyboru lat analizy
 def create_year_selector():
     """Tworzenie komponentu do wyboru lat"""
@@ -62,7 +53,8 @@ def create_year_selector():
                 id='date-range-type',
                 options=[
                     {'label': ' Jeden rok', 'value': 'single'},
-                    {'label': ' Zakres lat', 'value': 'range'}
+                    {'label': ' Zakres lat', 'value': 'range'},
+                    {'label': ' Zakres dat', 'value': 'dates'}
                 ],
                 value='single',
                 className="mb-3"
@@ -95,8 +87,18 @@ def create_year_selector():
                                    for year in range(2008, 2018)}
                         )
                     ]
-                )
+                ),
+                create_date_range_container('')
             ]),
+            dcc.Checklist(
+                id='visual-approximate',
+                options=[{'label': ' Szybki podgląd z próbki (wynik przybliżony, potem dokładny)',
+                          'value': 'approximate'}],
+                value=['approximate'],
+                className="mt-3",
+                # silnik kolumnowy liczy dokładne wyniki w milisekundach - podgląd niepotrzebny
+                style={'display': 'none'} if backend.use_columnar() else {}
+            ),
             dbc.Button(
                 "Generuj analizę",
                 id="generate-button",
@@ -108,19 +110,152 @@ def create_year_selector():
     )
 
 
-# Funkcja tworząca wykresy na podstawie danych
-def create_charts(df, include_map):
-    """Tworzenie wykresów na podstawie danych"""
-    # Sumaryczna liczba przestępstw na rok
-    yearly_stats = px.bar(
-        df.groupby('Year')['count'].sum().reset_index(),
-        x='Year', y='count',
+# Funkcja tworząca panel filtrów krzyżowych
+def create_crossfilter_panel():
+    """Filtry zawężające wszystkie wykresy (kliknięcia na wykresach i listy wyboru)"""
+    yes_no_options = [
+        {'label': ' Wszystkie', 'value': 'all'},
+        {'label': ' Tak', 'value': 1},
+        {'label': ' Nie', 'value': 0}
+    ]
+    return dbc.Card(
+        dbc.CardBody([
+            html.H4("Filtry krzyżowe", className="mb-2"),
+            html.P("Kliknij słupek na wykresie \"Przestępstwa vs Aresztowania\" lub pole mapy lokalizacji, "
+                   "aby zawęzić pozostałe wykresy.", className="text-muted"),
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Dystrykt"),
+                    dcc.Dropdown(
+                        id='crossfilter-district',
+                        options=[{'label': str(district), 'value': district} for district in query_districts()],
+                        multi=True,
+                        placeholder="Wszystkie dystrykty"
+                    )
+                ], width=6),
+                dbc.Col([
+                    html.Label("Aresztowanie"),
+                    dcc.RadioItems(id='crossfilter-arrest', options=yes_no_options, value='all', inline=True)
+                ], width=3),
+                dbc.Col([
+                    html.Label("Przemoc domowa"),
+                    dcc.RadioItems(id='crossfilter-domestic', options=yes_no_options, value='all', inline=True)
+                ], width=3)
+            ]),
+            html.Div(id='crossfilter-active', className="mt-3"),
+            dbc.Button("Wyczyść filtry", id="crossfilter-reset", color="secondary", size="sm", className="mt-2")
+        ]),
+        className="mb-4"
+    )
+
+
+# Lista dystryktów do filtra (wynik współdzielony przez workery serwera)
+@memoize("visual_analysis.districts")
+def query_districts():
+    if backend.use_columnar():
+        return sorted(int(value) for value in backend.get_engine().dictionaries['District'] if pd.notna(value))
+    try:
+        df = database.read_sql(
+            "visual_analysis.query_districts",
+            "SELECT DISTINCT District FROM ChicagoCrimes WHERE District IS NOT NULL ORDER BY District",
+            merge_by=['District']
+        )
+        return [int(value) for value in df['District']]
+    except sqlite3.OperationalError as e:
+        print(f"Błąd bazy danych: {e} | Ścieżka: {database.DB_PATH}")
+        return []
+
+
+# Zapytania zwracające gotowe agregacje dla pojedynczych wykresów;
+# {where} to filtr okresu z database.year_filter_clause i filtry krzyżowe z database.filters_clause
+CHART_QUERIES = {
+    'yearly': """
+        SELECT Year, COUNT(*) as count FROM ChicagoCrimes
+        WHERE 1=1{where}
+        GROUP BY Year ORDER BY Year
+    """,
+    'monthly': """
+        SELECT Year, Month, COUNT(*) as count FROM ChicagoCrimes
+        WHERE 1=1{where}
+        GROUP BY Year, Month ORDER BY Year, Month
+    """,
+    'hourly': """
+        SELECT Hour, COUNT(*) as count FROM ChicagoCrimes
+        WHERE 1=1{where}
+        GROUP BY Hour ORDER BY Hour
+    """,
+    'locations': """
+        SELECT LocationDescription, COUNT(*) as count FROM ChicagoCrimes
+        WHERE LocationDescription IS NOT NULL{where}
+        GROUP BY LocationDescription ORDER BY LocationDescription
+    """,
+    'types': """
+        SELECT PrimaryType, COUNT(*) as count, SUM(Arrest) as arrests FROM ChicagoCrimes
+        WHERE PrimaryType IS NOT NULL{where}
+        GROUP BY PrimaryType ORDER BY PrimaryType
+    """,
+    'map': """
+        SELECT Latitude, Longitude, PrimaryType, COUNT(*) as count FROM ChicagoCrimes
+        WHERE 1=1{where}
+        GROUP BY Latitude, Longitude, PrimaryType
+    """,
+}
+
+# kolumny grupowania zapytań bez roku - wyniki z baz lat są według nich sumowane
+CHART_MERGE_BY = {
+    'hourly': ['Hour'],
+    'locations': ['LocationDescription'],
+    'types': ['PrimaryType'],
+    'map': ['Latitude', 'Longitude', 'PrimaryType'],
+}
+
+
+# Funkcja pobierająca dane jednego wykresu z bazy danych
+def query_chart_data(chart, year_filter=None, filters=()):
+    """Pobieranie agregacji dla jednego wykresu z opcjonalnym filtrem lat i filtrami krzyżowymi"""
+    try:
+        where, params = database.year_filter_clause(year_filter)
+        filters_where, filters_params = database.filters_clause(filters)
+        query = CHART_QUERIES[chart].format(where=where + filters_where)
+        params = params + filters_params
+        return database.read_sql(f"visual_analysis.chart_{chart}", query, params, year_filter,
+                                 merge_by=CHART_MERGE_BY.get(chart))
+    except sqlite3.OperationalError as e:
+        print(f"Błąd bazy danych: {e} | Ścieżka: {database.DB_PATH}")
+        return pd.DataFrame()
+
+
+# Funkcja licząca agregacje, na podstawie których rysowane są wykresy
+def compute_chart_aggregates(df):
+    """Agregacje danych z bazy dla wykresów strony"""
+    return {
+        'yearly': df.groupby('Year')['count'].sum().reset_index(),
+        'monthly': df.groupby(['Year', 'Month'])['count'].sum().reset_index(),
+        'hourly': df.groupby('Hour')['count'].sum().reset_index(),
+        'locations': df.groupby('LocationDescription')['count'].sum().reset_index(),
+        'types': df.groupby('PrimaryType').agg({
+            'count': 'sum',
+            'arrests': 'sum'
+        }).reset_index(),
+    }
+
+
+# kolumna z połową przedziału ufności (dane z próbki) albo None dla dokładnych danych
+def error_column(df, column='count'):
+    return f'{column}_error' if f'{column}_error' in df else None
+
+
+# Sumaryczna liczba przestępstw na rok
+def create_yearly_chart(yearly):
+    figure = px.bar(
+        yearly,
+        x='Year', y='count', error_y=error_column(yearly),
         title='Sumaryczna liczba przestępstw na rok'
     )
-    yearly_stats.update_layout(
+    figure.update_layout(
         xaxis=dict(
             tickmode='linear',
-            tick0=df['Year'].min(),
+            tick0=yearly['Year'].min(),
             dtick=1,
             title='Rok'
         ),
@@ -128,146 +263,450 @@ def create_charts(df, include_map):
             title='Liczba przestępstw'
         )
     )
+    return figure
 
-    # Trend miesięczny
-    time_trend = px.line(
-        df.groupby(['Year', 'Month'])['count'].sum().reset_index(),
-        x='Month', y='count', color='Year',
+
+# Trend miesięczny
+def create_monthly_chart(monthly):
+    figure = px.line(
+        monthly,
+        x='Month', y='count', color='Year', error_y=error_column(monthly),
         title='Trend przestępczości'
     )
-    time_trend.update_xaxes(
+    figure.update_xaxes(
         tickmode='array',
         ticktext=['Styczeń', 'Luty', 'Marzec', 'Kwiecień', 'Maj', 'Czerwiec',
                   'Lipiec', 'Sierpień', 'Wrzesień', 'Październik', 'Listopad', 'Grudzień'],
         tickvals=list(range(1, 13)),
         title='Miesiąc'
     )
-    time_trend.update_yaxes(title='Liczba przestępstw')
+    figure.update_yaxes(title='Liczba przestępstw')
+    return figure
+
 
-    # Rozkład godzinowy
-    hourly_trend = px.bar(
-        df.groupby('Hour')['count'].sum().reset_index(),
-        x='Hour', y='count',
+# Rozkład godzinowy
+def create_hourly_chart(hourly):
+    figure = px.bar(
+        hourly,
+        x='Hour', y='count', error_y=error_column(hourly),
         title='Rozkład przestępstw w ciągu doby'
     )
-    hourly_trend.update_xaxes(title='Godzina')
-    hourly_trend.update_yaxes(title='Liczba przestępstw')
+    figure.update_xaxes(title='Godzina')
+    figure.update_yaxes(title='Liczba przestępstw')
+    return figure
+
 
-    # Rozkład lokalizacji
-    location_dist = px.treemap(
-        df.groupby('LocationDescription')['count'].sum().reset_index(),
+# Rozkład lokalizacji
+def create_locations_chart(locations):
+    return px.treemap(
+        locations,
         path=['LocationDescription'],
         values='count',
         title='Rozkład lokalizacji przestępstw'
     )
 
-    # Przestępstwa i aresztowania
-    arrest_stats = px.bar(
-        df.groupby('PrimaryType').agg({
-            'count': 'sum',
-            'arrests': 'sum'
-        }).reset_index().nlargest(10, 'count'),
+
+# Przestępstwa i aresztowania
+def create_arrests_chart(types):
+    top = types.nlargest(10, 'count')
+    figure = px.bar(
+        top,
         x='PrimaryType',
         y=['count', 'arrests'],
         title='Przestępstwa vs Aresztowania',
         barmode='group'
     )
-    arrest_stats.update_xaxes(title='Typ przestępstwa')
-    arrest_stats.update_yaxes(title='Liczba')
+    # słupki w formacie szerokim - przedziały ufności ustawiane osobno dla każdej serii
+    for trace in figure.data:
+        if error_column(top, trace.name):
+            trace.error_y = dict(type='data', array=top[error_column(top, trace.name)])
+    figure.update_xaxes(title='Typ przestępstwa')
+    figure.update_yaxes(title='Liczba')
+    return figure
+
+
+# Mapa przestępstw - punkt na każde miejsce i typ przestępstwa (seria typu to kolor);
+# w podpowiedzi tylko typ (nazwa serii) i liczba, bez powtarzania nazwy typu w każdym punkcie
+def create_map_figure(points, title):
+    figure = px.scatter_mapbox(
+        points,
+        lat="Latitude",
+        lon="Longitude",
+        custom_data=["count"],
+        color="PrimaryType",
+        title=title,
+        mapbox_style="carto-positron",
+        zoom=10
+    )
+    figure.update_traces(hovertemplate="<b>%{fullData.name}</b><br>Liczba: %{customdata[0]}<extra></extra>")
+    return figure
+
+
+# Mapa przestępstw w budżecie rozmiaru figury (layout/figure_budget.py):
+# zaokrąglone współrzędne, a przy zbyt wielu punktach agregacja do siatki
+def create_map_chart(map_df):
+    title = "Mapa przestępstw w Chicago"
+
+    def build(points, step):
+        return create_map_figure(points, f"{title} (zagregowano do siatki {step}°)" if step else title)
+
+    return figure_budget.fit_figure(map_df, ['PrimaryType'], build, "map")
+
+
+# wykresy strony: nazwa -> (klucz agregacji, funkcja tworząca wykres)
+CHARTS = {
+    'yearly': ('yearly', create_yearly_chart),
+    'monthly': ('monthly', create_monthly_chart),
+    'hourly': ('hourly', create_hourly_chart),
+    'locations': ('locations', create_locations_chart),
+    'arrests': ('types', create_arrests_chart),
+    'map': (None, create_map_chart),
+}
+
+MAP_RANGE_MESSAGE = "Mapa przestępstw nie może być wygenerowana dla okresu dłuższego niż rok."
+# najdłuższy zakres dat, dla którego rysowana jest mapa
+MAP_MAX_DAYS = 366
+
+# kolumna filtrowana kliknięciem na wykresie - sam wykres nie jest nią zawężany
+CHART_FILTER_COLUMNS = {
+    'arrests': 'PrimaryType',
+    'locations': 'LocationDescription',
+}
+
+
+# Funkcja tworząca wykresy na podstawie danych
+def create_charts(df, include_map):
+    """Tworzenie wykresów na podstawie danych"""
+    return create_charts_from_aggregates(compute_chart_aggregates(df), df if include_map else None)
+
+
+# Funkcja tworząca wykresy na podstawie gotowych agregacji
+def create_charts_from_aggregates(aggregates, map_df=None):
+    """Tworzenie wykresów z agregacji (mapa tylko, gdy podano punkty)"""
+    figures = {chart: create(aggregates[key]) for chart, (key, create) in CHARTS.items() if key}
 
     components = [
-        dbc.Row(dbc.Col(dcc.Graph(figure=yearly_stats), width=12), className="mb-4"),
-        dbc.Row(dbc.Col(dcc.Graph(figure=time_trend), width=12), className="mb-4"),
+        dbc.Row(dbc.Col(dcc.Graph(figure=figures['yearly']), width=12), className="mb-4"),
+        dbc.Row(dbc.Col(dcc.Graph(figure=figures['monthly']), width=12), className="mb-4"),
         dbc.Row([
-            dbc.Col(dcc.Graph(figure=hourly_trend), width=12),
-            dbc.Col(dcc.Graph(figure=location_dist), width=12)
+            dbc.Col(dcc.Graph(figure=figures['hourly']), width=12),
+            dbc.Col(dcc.Graph(figure=figures['locations']), width=12)
         ], className="mb-4"),
-        dbc.Row(dbc.Col(dcc.Graph(figure=arrest_stats), width=12))
+        dbc.Row(dbc.Col(dcc.Graph(figure=figures['arrests']), width=12))
     ]
 
-    if include_map:
-        crime_map = px.scatter_mapbox(
-            df,
-            lat="Latitude",
-            lon="Longitude",
-            hover_name="PrimaryType",
-            hover_data={"Arrest": True, "count": True},
-            color="PrimaryType",
-            title="Mapa przestępstw w Chicago",
-            mapbox_style="carto-positron",
-            zoom=10
-        )
-        components.append(dbc.Row(dbc.Col(dcc.Graph(figure=crime_map), width=12), className="mb-4"))
+    if map_df is not None:
+        components.append(dbc.Row(dbc.Col(dcc.Graph(figure=create_map_chart(map_df)), width=12), className="mb-4"))
     else:
-        components.append(
-            dbc.Alert("Mapa przestępstw nie może być wygenerowana dla zakresu lat.", color="warning", className="mt-4"))
+        components.append(dbc.Alert(MAP_RANGE_MESSAGE, color="warning", className="mt-4"))
 
     return dbc.Container(components)
 
 
+# Funkcja pobierająca dane jednego wykresu z aktywnego źródła danych
+def chart_data(chart, year_filter, filters=()):
+    """Agregacja wykresu (albo punkty mapy) dla okresu i filtrów krzyżowych"""
+    key, _ = CHARTS[chart]
+    if backend.use_columnar():
+        # filtry krzyżowe to operacje na bitmapach silnika (storage/bitmap.py)
+        engine = backend.get_engine()
+        with timed_stage("columnar"):
+            if key:
+                return engine.chart_aggregates(year_filter, filters)[key]
+            return engine.map_points(year_filter, filters)
+    return query_chart_data(key or chart, year_filter, filters)
+
+
+# Funkcja budująca jeden wykres dla okresu, wynik jest współdzielony przez workery serwera
+@memoize("visual_analysis.chart")
+def build_chart(chart, year_filter, filters=()):
+    """Pobieranie danych i tworzenie jednego wykresu (None, gdy brak danych)"""
+    _, create = CHARTS[chart]
+    data = chart_data(chart, year_filter, filters)
+    if data.empty:
+        return None
+
+    with timed_stage("plotly"):
+        return create(data)
+
+
+# grupowania oszacowań z próbki dla kluczy agregacji: (kolumny grupowania, czy szacować aresztowania)
+APPROXIMATE_GROUPS = {
+    'yearly': (['Year'], False),
+    'monthly': (['Year', 'Month'], False),
+    'hourly': (['Hour'], False),
+    'locations': (['LocationDescription'], False),
+    'types': (['PrimaryType'], True),
+    'map': (['Latitude', 'Longitude', 'PrimaryType'], False),
+}
+
+# słupki błędów na wykresach z próbki to 95% przedziały ufności
+APPROXIMATE_SUFFIX = "(szacunek z próbki)"
+
+
+# Funkcja budująca wykres z próbki warstwowej (storage/sampling.py)
+def build_approximate_chart(chart, year_filter, filters=()):
+    """Przybliżony wykres z przedziałami ufności (None, gdy brak próbki lub danych)"""
+    key, create = CHARTS[chart]
+    sample = sampling.query_sample(year_filter, filters)
+    if sample is None or sample.empty:
+        return None
+
+    group_columns, arrests = APPROXIMATE_GROUPS[key or chart]
+    with timed_stage("sample"):
+        data = sampling.estimate(sample, group_columns, arrests)
+    if data.empty:
+        return None
+
+    with timed_stage("plotly"):
+        figure = create(data)
+    figure.update_layout(title_text=f"{figure.layout.title.text} {APPROXIMATE_SUFFIX}")
+    return figure
+
+
+GRAPH_HIDDEN = {'display': 'none'}
+
+
+# Miejsce na wykres - każdy wykres ma osobne wyjście i własny wskaźnik ładowania;
+# wskaźnik jest pod wykresem, żeby podgląd z próbki był widoczny w trakcie liczenia dokładnego wyniku.
+# Wykres pozostaje zamontowany między zmianami okresu - kolejne figury są wysyłane jako
+# dash.Patch względem sygnatury wyświetlanej figury (layout/figure_patch.py)
+def chart_slot(chart):
+    return html.Div([
+        html.Div(id=f"chart-{chart}"),
+        dcc.Graph(id=f"graph-{chart}", style=GRAPH_HIDDEN),
+        dcc.Loading(html.Div(id=f"chart-{chart}-pending"), type="circle"),
+        dcc.Store(id=f"chart-{chart}-exact"),
+        dcc.Store(id=f"chart-{chart}-signature")
+    ])
+
+
+# wartości wyjść miejsca na wykres: komunikat, figura (albo Patch), styl wykresu, sygnatura figury
+def show_figure(figure, signature):
+    update, signature = figure_update(figure, signature)
+    return [], update, {}, signature
+
+
+# komunikat zamiast wykresu - figura zostaje w przeglądarce (ukryta), więc sygnatura się nie zmienia
+def show_message(message):
+    return message, no_update, GRAPH_HIDDEN, no_update
+
+
 # Funkcja definiująca główny układ aplikacji
 def layout():
     """Główny układ strony"""
     return html.Div([
         html.H1("Analiza Wizualna Danych", className="mb-4 text-center"),
         dbc.Row([
-            dbc.Col(create_year_selector(), width=12)
+            dbc.Col(create_year_selector(), width=12),
+            dbc.Col(create_crossfilter_panel(), width=12)
         ]),
-        html.Div(id="loading-graphs")
+        dcc.Store(id="visual-filter"),
+        dcc.Store(id="visual-crossfilter", data={}),
+        dbc.Container([
+            dbc.Row(dbc.Col(chart_slot('yearly'), width=12), className="mb-4"),
+            dbc.Row(dbc.Col(chart_slot('monthly'), width=12), className="mb-4"),
+            dbc.Row([
+                dbc.Col(chart_slot('hourly'), width=12),
+                dbc.Col(chart_slot('locations'), width=12)
+            ], className="mb-4"),
+            dbc.Row(dbc.Col(chart_slot('arrests'), width=12)),
+            dbc.Row(dbc.Col(chart_slot('map'), width=12), className="mb-4")
+        ])
     ])
 
 
+# filtr okresu i filtry krzyżowe wykresu (bez kolumny filtrowanej kliknięciem na nim samym)
+def chart_arguments(chart, chart_filter, crossfilter):
+    year_filter = period_from_json(chart_filter['period'])
+    filters = normalize_filters({
+        column: values for column, values in (crossfilter or {}).items()
+        if column != CHART_FILTER_COLUMNS.get(chart)
+    })
+    return year_filter, filters
+
+
+# Callback wyświetlający podgląd wykresu z próbki i przekazujący filtry do dokładnego wykresu
+def make_preview_callback(chart):
+    def preview_chart(chart_filter, crossfilter, signature):
+        request = {'filter': chart_filter, 'crossfilter': crossfilter}
+        unchanged = (no_update,) * 4
+        if (not chart_filter or not chart_filter.get('approximate') or backend.use_columnar()
+                or (chart == 'map' and not chart_filter['include_map'])):
+            return *unchanged, request
+
+        year_filter, filters = chart_arguments(chart, chart_filter, crossfilter)
+        # dokładny wynik z cache pojawi się od razu - podgląd niepotrzebny
+        if build_chart.is_cached(chart, year_filter, filters):
+            return *unchanged, request
+
+        figure = build_approximate_chart(chart, year_filter, filters)
+        if figure is None:
+            return *unchanged, request
+        return *show_figure(figure, signature), request
+
+    return preview_chart
+
+
+# Callback wypełniający miejsce jednego wykresu dokładnym wynikiem
+def make_chart_callback(chart):
+    def load_chart(request, signature):
+        if not request or not request['filter']:
+            return *show_message([]), None
+
+        chart_filter = request['filter']
+        if chart_filter['period'] is None:
+            # komunikat o niewybranym zakresie dat wyświetla tylko pierwszy wykres
+            message = dbc.Alert("Wybierz zakres dat.", color="warning", className="mt-3") if chart == 'yearly' else []
+            return *show_message(message), None
+
+        year_filter, filters = chart_arguments(chart, chart_filter, request['crossfilter'])
+
+        if chart == 'map' and not chart_filter['include_map']:
+            return *show_message(dbc.Alert(MAP_RANGE_MESSAGE, color="warning", className="mt-4")), None
+
+        figure = build_chart(chart, year_filter, filters)
+
+        if figure is None:
+            # komunikat o braku danych wyświetla tylko pierwszy wykres
+            message = dbc.Alert("Brak danych dla wybranego okresu.", color="warning") if chart == 'yearly' else []
+            return *show_message(message), None
+
+        return *show_figure(figure, signature), None
+
+    return load_chart
+
+
 # Funkcja rejestrująca callbacki aplikacji
 def register_callbacks(app):
     """Rejestracja callbacków"""
 
     @app.callback(
-        Output('year-range-container', 'style'),
         Output('single-year-container', 'style'),
+        Output('year-range-container', 'style'),
+        Output('date-picker-container', 'style'),
         Input('date-range-type', 'value')
     )
     def toggle_year_selector(selector_type):
-        if selector_type == 'range':
-            return {'display': 'block'}, {'display': 'none'}
-        return {'display': 'none'}, {'display': 'block'}
+        return selector_styles(selector_type)
+
+    register_date_preset_callback(app, '')
 
     @app.callback(
-        Output("loading-graphs", "children"),
+        Output("visual-filter", "data"),
         [Input("generate-button", "n_clicks")],
         [State("single-year-dropdown", "value"),
          State("year-range-slider", "value"),
-         State("date-range-type", "value")]
+         State("date-range-type", "value"),
+         State("date-picker", "start_date"),
+         State("date-picker", "end_date"),
+         State("visual-approximate", "value")]
     )
-    def update_graphs(n_clicks, single_year, year_range, range_type):
+    @instrument_callback("visual_analysis.update_graphs")
+    def update_graphs(n_clicks, single_year, year_range, range_type, start_date, end_date, approximate):
         if n_clicks is None:
-            return []
-
-        return create_loading_message()
-
+            return None
+
+        year_filter = period_filter(range_type, single_year, year_range, start_date, end_date)
+        if year_filter is None:
+            # zakres dat bez wybranych dat - wykresy wyświetlą komunikat zamiast pozostać puste
+            return {'period': None, 'include_map': False, 'approximate': False}
+
+        include_map = range_type == 'single' or (
+            isinstance(year_filter, DateRange) and year_filter.days <= MAP_MAX_DAYS)
+        return {'period': period_to_json(year_filter), 'include_map': include_map,
+                'approximate': bool(approximate)}
+
+    # Niezależne callbacki wykresów - przeglądarka wysyła je równolegle, więc szybkie
+    # wykresy pojawiają się od razu, a mapa dochodzi na końcu.
+    # Każdy wykres to łańcuch: podgląd z próbki (ułamek sekundy), potem dokładny wynik
+    for chart in CHARTS:
+        app.callback(
+            Output(f"chart-{chart}", "children"),
+            Output(f"graph-{chart}", "figure"),
+            Output(f"graph-{chart}", "style"),
+            Output(f"chart-{chart}-signature", "data"),
+            Output(f"chart-{chart}-exact", "data"),
+            Input("visual-filter", "data"),
+            Input("visual-crossfilter", "data"),
+            State(f"chart-{chart}-signature", "data"),
+            prevent_initial_call=True
+        )(instrument_callback(f"visual_analysis.preview_{chart}")(make_preview_callback(chart)))
+
+        app.callback(
+            Output(f"chart-{chart}", "children", allow_duplicate=True),
+            Output(f"graph-{chart}", "figure", allow_duplicate=True),
+            Output(f"graph-{chart}", "style", allow_duplicate=True),
+            Output(f"chart-{chart}-signature", "data", allow_duplicate=True),
+            Output(f"chart-{chart}-pending", "children"),
+            Input(f"chart-{chart}-exact", "data"),
+            State(f"chart-{chart}-signature", "data"),
+            prevent_initial_call=True
+        )(instrument_callback(f"visual_analysis.load_{chart}")(make_chart_callback(chart)))
+
+    # Filtry krzyżowe z list wyboru
     @app.callback(
-        Output("loading-graphs", "children", allow_duplicate=True),
-        [Input("loading-graphs", "children")],
-        [State("single-year-dropdown", "value"),
-         State("year-range-slider", "value"),
-         State("date-range-type", "value")],
+        Output("visual-crossfilter", "data"),
+        Input("crossfilter-district", "value"),
+        Input("crossfilter-arrest", "value"),
+        Input("crossfilter-domestic", "value"),
+        State("visual-crossfilter", "data"),
         prevent_initial_call=True
     )
-    def load_data(loading_children, single_year, year_range, range_type):
-        if not loading_children:
-            return []
-
-        year_filter = None
-        include_map = False
-
-        if range_type == 'single':
-            year_filter = single_year
-            include_map = True
-        else:
-            year_filter = tuple(year_range)
+    def update_crossfilter(districts, arrest, domestic, crossfilter):
+        crossfilter = dict(crossfilter or {})
+        crossfilter['District'] = districts or []
+        crossfilter['Arrest'] = [] if arrest == 'all' else [arrest]
+        crossfilter['Domestic'] = [] if domestic == 'all' else [domestic]
+        return crossfilter
+
+    # Kliknięcie słupka typu przestępstwa lub pola lokalizacji - ponowne kliknięcie zdejmuje filtr
+    def toggle_clicked_value(column, point_key):
+        def toggle(click_data, crossfilter):
+            if not click_data:
+                return no_update
+            value = click_data['points'][0].get(point_key)
+            crossfilter = dict(crossfilter or {})
+            crossfilter[column] = [] if crossfilter.get(column) == [value] else [value]
+            return crossfilter
+
+        return toggle
+
+    app.callback(
+        Output("visual-crossfilter", "data", allow_duplicate=True),
+        Input("graph-arrests", "clickData"),
+        State("visual-crossfilter", "data"),
+        prevent_initial_call=True
+    )(toggle_clicked_value('PrimaryType', 'x'))
 
-        df = query_database(year_filter)
+    app.callback(
+        Output("visual-crossfilter", "data", allow_duplicate=True),
+        Input("graph-locations", "clickData"),
+        State("visual-crossfilter", "data"),
+        prevent_initial_call=True
+    )(toggle_clicked_value('LocationDescription', 'label'))
 
-        if df.empty:
-            return dbc.Alert("Brak danych dla wybranego okresu.", color="warning")
+    @app.callback(
+        Output("visual-crossfilter", "data", allow_duplicate=True),
+        Output("crossfilter-district", "value"),
+        Output("crossfilter-arrest", "value"),
+        Output("crossfilter-domestic", "value"),
+        Input("crossfilter-reset", "n_clicks"),
+        prevent_initial_call=True
+    )
+    def reset_crossfilter(n_clicks):
+        return {}, None, 'all', 'all'
 
-        return create_charts(df, include_map)
+    @app.callback(
+        Output("crossfilter-active", "children"),
+        Input("visual-crossfilter", "data")
+    )
+    def show_crossfilter(crossfilter):
+        labels = {'PrimaryType': 'Typ', 'LocationDescription': 'Lokalizacja', 'District': 'Dystrykt',
+                  'Arrest': 'Aresztowanie', 'Domestic': 'Przemoc domowa'}
+        badges = [
+            dbc.Badge(f"{labels[column]}: {', '.join(str(value) for value in values)}",
+                      color="info", className="me-2")
+            for column, values in normalize_filters(crossfilter)
+        ]
+        return badges or html.Span("Brak aktywnych filtrów.", className="text-muted")
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from storage import database, backend
+from storage.cache import memoize
+from storage.database import DateRange
+from monitoring.metrics import timed_stage
+
+# Wykrywanie anomalii w szeregach liczby przestępstw dla każdej pary PrimaryType × District.
+# Wszystkie szeregi pochodzą z jednego zapytania grupującego i są liczone razem jako
+# macierz (typ, dystrykt, okres) - bez pętli po szeregach i osobnych modeli:
+#   0. pierwszy i ostatni okres są pomijane, jeśli dane nie obejmują ich w całości
+#      (niepełny miesiąc wyglądałby jak duży spadek liczby przestępstw),
+#   1. czynnik sezonowy okresu (miesiąc roku, tydzień roku ISO) liczony dla typu przestępstwa
+#      ze wszystkich dystryktów (stabilniejszy niż dla pojedynczego szeregu),
+#   2. bazowy poziom to średnia i odchylenie z BASELINE_WINDOW poprzednich okresów
+#      szeregu po usunięciu sezonowości (sumy kroczące z np.cumsum),
+#   3. z = (liczba - oczekiwana) / sigma, gdzie oczekiwana to poziom bazowy razy czynnik
+#      sezonowy, a sigma nie jest mniejsza niż odchylenie Poissona sqrt(oczekiwana).
+# Wynik zależy tylko od danych, więc jest zapamiętywany w cache według wersji danych;
+# próg z i okres wybrany na stronie filtrują gotową listę.
+
+BASELINE_WINDOW = int(os.environ.get("ANOMALY_BASELINE_WINDOW", "12"))
+# zapisywane są komórki z |z| od tej wartości - niższych progów nie można wybrać na stronie
+MIN_STORED_Z = 2.0
+# komórki o oczekiwanej liczbie mniejszej niż próg (rzadkie typy w dystrykcie) nie są oceniane -
+# pojedyncze zdarzenia dawałyby tam wysokie z
+MIN_EXPECTED = float(os.environ.get("ANOMALY_MIN_EXPECTED", "5"))
+
+# granulacja -> (numer okresu w SQL, długość sezonu w okresach)
+GRANULARITIES = {
+    'month': ("Year * 12 + Month - 1", 12),
+    'week': (f"(Timestamp - {database.WEEK_ORIGIN}) / {database.SECONDS_PER_WEEK}", 52),
+}
+
+
+# liczba przestępstw według typu, dystryktu i okresu - jedno zapytanie dla wszystkich szeregów
+def query_series_counts(granularity):
+    if backend.use_columnar():
+        with timed_stage("columnar"):
+            return backend.get_engine().type_district_counts(granularity)
+
+    period, _ = GRANULARITIES[granularity]
+    try:
+        return database.read_sql(
+            f"anomalies.series_{granularity}",
+            f"""
+            SELECT PrimaryType, District, {period} AS Period, COUNT(*) AS count
+            FROM ChicagoCrimes
+            WHERE PrimaryType IS NOT NULL AND District IS NOT NULL
+            GROUP BY PrimaryType, District, Period
+            """,
+            merge_by=['PrimaryType', 'District', 'Period']
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Błąd bazy danych: {e}")
+        return pd.DataFrame()
+
+
+# macierz (typ, dystrykt, okres) z liczbami przestępstw; brakujące okresy to zera
+def series_matrix(counts):
+    type_codes, types = pd.factorize(counts['PrimaryType'], sort=True)
+    district_codes, districts = pd.factorize(counts['District'], sort=True)
+    periods = counts['Period'].to_numpy(dtype=np.int64)
+    first = int(periods.min())
+    n_periods = int(periods.max()) - first + 1
+
+    matrix = np.zeros((len(types), len(districts), n_periods))
+    matrix[type_codes, district_codes, periods - first] = counts['count'].to_numpy()
+    return matrix, np.asarray(types), np.asarray(districts), np.arange(first, first + n_periods)
+
+
+# pierwszy i ostatni czas zdarzenia w danych (sekundy od 1970-01-01)
+def data_bounds():
+    if backend.use_columnar():
+        timestamps = backend.get_engine().columns['Timestamp']
+        return int(timestamps[0]), int(timestamps[-1])
+    return database.oldest_timestamp(), database.newest_timestamp()
+
+
+# maska okresów w całości objętych danymi od dnia first do dnia last (włącznie)
+def complete_periods(periods, granularity, first, last):
+    periods = np.asarray(periods, dtype=np.int64)
+    covered_from = pd.Timestamp(first, unit='s').normalize()
+    covered_to = pd.Timestamp(last, unit='s').normalize() + pd.Timedelta(days=1)
+    starts = period_starts(periods, granularity)
+    ends = period_starts(periods + 1, granularity)
+    return np.asarray(starts >= covered_from) & np.asarray(ends <= covered_to)
+
+
+# faza sezonu okresu: miesiąc roku albo tydzień roku ISO (od poniedziałku rozpoczynającego tydzień);
+# rzadki 53. tydzień ISO ma fazę tygodnia 52
+def season_phases(periods, granularity):
+    periods = np.asarray(periods, dtype=np.int64)
+    season_length = GRANULARITIES[granularity][1]
+    if granularity == 'week':
+        weeks = pd.DatetimeIndex(period_starts(periods, granularity)).isocalendar().week.to_numpy(dtype=np.int64)
+        return np.minimum(weeks, season_length) - 1
+    return periods % season_length
+
+
+# czynniki sezonowe (typ, okres): średnia typu w danej fazie sezonu względem średniej typu;
+# phases - faza każdego okresu (season_phases); przy mniej niż dwóch pełnych sezonach
+# danych sezonowość nie jest uwzględniana
+def seasonal_factors(matrix, phases, season_length):
+    pooled = matrix.sum(axis=1)
+    if len(phases) < 2 * season_length:
+        return np.ones_like(pooled)
+
+    phase_matrix = np.eye(season_length)[phases]
+    phase_means = pooled @ phase_matrix / phase_matrix.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profile = phase_means / pooled.mean(axis=1, keepdims=True)
+    profile = np.where(profile > 0, profile, 1.0)
+    return profile[:, phases]
+
+
+# średnia i odchylenie z window poprzednich okresów (bez bieżącego) wzdłuż ostatniej osi;
+# dla pierwszych window okresów NaN
+def rolling_baseline(values, window):
+    padding = np.zeros(values.shape[:-1] + (1,))
+    sums = np.concatenate([padding, np.cumsum(values, axis=-1)], axis=-1)
+    squares = np.concatenate([padding, np.cumsum(values ** 2, axis=-1)], axis=-1)
+
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    if values.shape[-1] > window:
+        mean[..., window:] = (sums[..., window:-1] - sums[..., :-window - 1]) / window
+        variance = (squares[..., window:-1] - squares[..., :-window - 1]) / window - mean[..., window:] ** 2
+        std[..., window:] = np.sqrt(np.maximum(variance, 0.0))
+    return mean, std
+
+
+# data początku okresu (pierwszy dzień miesiąca albo poniedziałek tygodnia)
+def period_starts(periods, granularity):
+    periods = np.asarray(periods, dtype=np.int64)
+    if granularity == 'week':
+        return pd.to_datetime(database.WEEK_ORIGIN + periods * database.SECONDS_PER_WEEK, unit='s')
+    return pd.to_datetime(pd.DataFrame({'year': periods // 12, 'month': periods % 12 + 1, 'day': 1}))
+
+
+# z-score każdej komórki macierzy; zwraca słownik z anomaliami (|z| >= MIN_STORED_Z),
+# liczbą szeregów i okresów - wynik współdzielony przez workery, ważny do zmiany wersji danych
+@memoize("anomalies.scores")
+def score_series(granularity, window=BASELINE_WINDOW):
+    counts = query_series_counts(granularity)
+    if counts.empty:
+        return None
+
+    first, last = data_bounds()
+    with timed_stage("numpy"):
+        matrix, types, districts, periods = series_matrix(counts)
+        complete = complete_periods(periods, granularity, first, last)
+        if not complete.any():
+            return None
+        matrix, periods = matrix[..., complete], periods[complete]
+        factors = seasonal_factors(matrix, season_phases(periods, granularity),
+                                   GRANULARITIES[granularity][1])[:, np.newaxis, :]
+        mean, std = rolling_baseline(matrix / factors, window)
+        expected = mean * factors
+        with np.errstate(invalid='ignore'):
+            sigma = np.maximum(np.maximum(std * factors, np.sqrt(expected)), 1.0)
+            z = (matrix - expected) / sigma
+            flagged = (np.abs(z) >= MIN_STORED_Z) & (expected >= MIN_EXPECTED)
+        type_index, district_index, period_index = np.nonzero(flagged)
+
+    anomalies = pd.DataFrame({
+        'PrimaryType': types[type_index],
+        'District': districts[district_index].astype(np.int64),
+        'Start': period_starts(periods[period_index], granularity),
+        'count': matrix[type_index, district_index, period_index].astype(np.int64),
+        'expected': expected[type_index, district_index, period_index],
+        'z': z[type_index, district_index, period_index],
+    })
+    return {
+        'anomalies': anomalies,
+        'series': int(np.count_nonzero(matrix.sum(axis=2))),
+        'periods': len(periods),
+    }
+
+
+# anomalie z okresów zaczynających się w filtrze okresu (rok, krotka z zakresem lat, DateRange)
+# o |z| nie mniejszym niż threshold, od największych odchyleń
+def select_anomalies(anomalies, year_filter, threshold):
+    start = anomalies['Start']
+    if isinstance(year_filter, DateRange):
+        seconds = (start - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+        mask = (seconds >= year_filter.start) & (seconds < year_filter.end)
+    elif isinstance(year_filter, tuple):
+        mask = start.dt.year.between(year_filter[0], year_filter[1])
+    elif year_filter:
+        mask = start.dt.year == year_filter
+    else:
+        mask = pd.Series(True, index=anomalies.index)
+
+    selected = anomalies[mask & (anomalies['z'].abs() >= threshold)]
+    return selected.reindex(selected['z'].abs().sort_values(ascending=False).index)
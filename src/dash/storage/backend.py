@@ -0,0 +1,110 @@
+import os
+import time
+import sqlite3
+import threading
+
+from storage import database, snapshot
+from storage.columnar import ColumnarEngine
+
+# Wybór źródła danych dla stron:
+#   DATA_BACKEND=sqlite    - zapytania SQL do bazy (domyślnie)
+#   DATA_BACKEND=columnar  - kolumnowy silnik w pamięci (storage/columnar.py);
+#                            jeśli istnieje snapshot (storage/snapshot.py), kolumny są
+#                            mapowane z niego do pamięci zamiast wczytywania z SQLite
+DATA_BACKEND = os.environ.get("DATA_BACKEND", "sqlite")
+
+# co ile sekund sprawdzana jest wersja danych (tabela DataVersion / snapshot)
+VERSION_CHECK_INTERVAL = float(os.environ.get("DATA_VERSION_CHECK_INTERVAL", "1.0"))
+
+_engine = None
+_engine_lock = threading.Lock()
+_engine_checked_at = 0.0
+_reloading = False
+
+_sqlite_version = None
+_sqlite_checked_at = 0.0
+
+
+def use_columnar():
+    return DATA_BACKEND == "columnar"
+
+
+def _load_engine():
+    snapshot_path = snapshot.current_snapshot_path()
+    if snapshot_path is not None:
+        return snapshot.open_snapshot(snapshot_path)
+    return ColumnarEngine.from_sqlite(database.database_paths())
+
+
+# wersja danych, z której zostałby wczytany silnik (snapshot albo baza)
+def _source_version():
+    snapshot_path = snapshot.current_snapshot_path()
+    if snapshot_path is not None:
+        return snapshot.read_meta(snapshot_path)["data_version"]
+    return database.data_version()
+
+
+# zwraca silnik kolumnowy, wczytując tabelę przy pierwszym użyciu;
+# po zmianie wersji danych nowy silnik jest wczytywany w tle, a do tego czasu
+# zapytania obsługuje poprzedni
+def get_engine():
+    global _engine, _engine_checked_at
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _load_engine()
+                _engine_checked_at = time.monotonic()
+        return _engine
+
+    _check_engine_version()
+    return _engine
+
+
+def _check_engine_version():
+    global _engine_checked_at, _reloading
+    if _reloading or time.monotonic() - _engine_checked_at < VERSION_CHECK_INTERVAL:
+        return
+    with _engine_lock:
+        if _reloading or time.monotonic() - _engine_checked_at < VERSION_CHECK_INTERVAL:
+            return
+        _engine_checked_at = time.monotonic()
+        try:
+            if _source_version() == _engine.data_version:
+                return
+        except (sqlite3.OperationalError, OSError, ValueError) as e:
+            print(f"Błąd odczytu wersji danych: {e}")
+            return
+        _reloading = True
+    threading.Thread(target=_reload_engine, daemon=True).start()
+
+
+def _reload_engine():
+    global _engine, _reloading
+    try:
+        engine = _load_engine()
+        with _engine_lock:
+            _engine = engine
+        print(f"Wczytano nową wersję danych: {engine.data_version}")
+    except (sqlite3.OperationalError, OSError, ValueError) as e:
+        print(f"Błąd wczytywania nowej wersji danych: {e}")
+    finally:
+        _reloading = False
+
+
+# wersja danych, na których pracują strony - część kluczy cache
+def data_version():
+    global _sqlite_version, _sqlite_checked_at
+    if use_columnar():
+        return get_engine().data_version
+    if _sqlite_version is None or time.monotonic() - _sqlite_checked_at >= VERSION_CHECK_INTERVAL:
+        _sqlite_version = database.data_version()
+        _sqlite_checked_at = time.monotonic()
+    return _sqlite_version
+
+
+# wczytuje silnik od nowa (np. po zmianie ścieżki bazy danych)
+def reset_engine():
+    global _engine, _sqlite_version
+    with _engine_lock:
+        _engine = None
+        _sqlite_version = None
@@ -0,0 +1,64 @@
+import numpy as np
+
+# Indeksy bitmapowe silnika kolumnowego dla filtrów krzyżowych.
+# Dla każdej wartości kolumny zapisana jest spakowana bitmapa wierszy (np.packbits,
+# 1 bit na wiersz), więc kombinacja filtrów to kilka operacji OR/AND na tablicach
+# bajtów, a agregacja liczy się tylko na wierszach z ustawionym bitem.
+# Rok nie ma bitmap - wiersze są posortowane według czasu, więc okres to wycinek tablicy.
+
+BITMAP_COLUMNS = ['PrimaryType', 'District', 'LocationDescription', 'Arrest', 'Domestic']
+
+# kolumny 0/1 zapisane bez słownika (kod = wartość)
+FLAG_COLUMNS = ['Arrest', 'Domestic']
+
+
+# bitmapy wszystkich wartości kolumny: tablica (liczba wartości, liczba bajtów)
+def build_bitmaps(codes, n_values):
+    bitmaps = np.zeros((n_values, (len(codes) + 7) // 8), dtype=np.uint8)
+    for code in range(n_values):
+        bitmaps[code] = np.packbits(codes == code)
+    return bitmaps
+
+
+class BitmapIndex:
+    """Bitmapy wartości kolumn filtrów krzyżowych"""
+
+    def __init__(self, n_rows, bitmaps, dictionaries):
+        # bitmaps: kolumna -> tablica (kod wartości, bajty bitmapy)
+        # dictionaries: słowniki kolumn kategorycznych silnika (indeks = kod)
+        self.n_rows = n_rows
+        self.bitmaps = bitmaps
+        self.codes = {
+            column: {value: code for code, value in enumerate(dictionaries[column])}
+            for column in BITMAP_COLUMNS if column not in FLAG_COLUMNS
+        }
+
+    @classmethod
+    def build(cls, columns, dictionaries):
+        bitmaps = {}
+        for column in BITMAP_COLUMNS:
+            n_values = 2 if column in FLAG_COLUMNS else len(dictionaries[column])
+            bitmaps[column] = build_bitmaps(columns[column], n_values)
+        return cls(len(columns['Year']), bitmaps, dictionaries)
+
+    def _code(self, column, value):
+        if column in FLAG_COLUMNS:
+            return int(value) if value in (0, 1) else None
+        return self.codes[column].get(value)
+
+    # spakowana bitmapa wierszy spełniających filtry (OR w obrębie kolumny, AND między kolumnami);
+    # byte_range ogranicza operacje do bajtów obejmujących wybrany okres
+    def packed_mask(self, filters, byte_range=slice(None)):
+        result = None
+        for column, values in filters:
+            codes = [code for code in (self._code(column, value) for value in values) if code is not None]
+            column_mask = np.bitwise_or.reduce(self.bitmaps[column][codes, byte_range], axis=0)
+            result = column_mask if result is None else np.bitwise_and(result, column_mask, out=result)
+        return result
+
+    # maska logiczna wierszy z wycinka rows spełniających filtry
+    def mask(self, filters, rows):
+        first_byte = rows.start // 8
+        packed = self.packed_mask(filters, slice(first_byte, (rows.stop + 7) // 8))
+        offset = rows.start - first_byte * 8
+        return np.unpackbits(packed)[offset:offset + rows.stop - rows.start].view(bool)
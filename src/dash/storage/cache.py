@@ -0,0 +1,186 @@
+import os
+import time
+import pickle
+import random
+import hashlib
+import functools
+import tempfile
+
+from storage import backend
+
+# Współdzielony cache wyników na dysku (bez zewnętrznych usług).
+# Każdy wpis to osobny plik z zapisanym przez pickle wynikiem, zapisywany atomowo
+# (plik tymczasowy + os.replace), więc wszystkie procesy serwera korzystają z tych
+# samych wyników, a żaden nie trzyma ich kopii na stałe w pamięci.
+#
+# CACHE_DIR        katalog cache (wspólny dla wszystkich workerów)
+# CACHE_TTL        czas ważności wpisu w sekundach
+# CACHE_MAX_BYTES  maksymalny rozmiar katalogu; najstarsze wpisy są usuwane
+# CACHE_ENABLED    0 wyłącza cache
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(project_root, "cache"))
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "3600"))
+CACHE_MAX_BYTES = int(float(os.environ.get("CACHE_MAX_BYTES", str(1024 ** 3))))
+CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "1") != "0"
+
+# jak długo inne procesy czekają na wynik liczony przez proces, który założył blokadę
+LOCK_TIMEOUT = float(os.environ.get("CACHE_LOCK_TIMEOUT", "120"))
+LOCK_POLL_INTERVAL = 0.05
+CLEANUP_PROBABILITY = 0.05
+
+_MISSING = object()
+
+
+class DiskCache:
+    """Cache klucz-wartość w katalogu współdzielonym przez procesy"""
+
+    def __init__(self, directory, ttl, max_bytes):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".pkl")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return default
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+
+    def contains(self, key):
+        try:
+            return time.time() - os.path.getmtime(self._path(key)) <= self.ttl
+        except OSError:
+            return False
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if random.random() < CLEANUP_PROBABILITY:
+            self.cleanup()
+
+    # blokada między procesami - tylko jeden worker liczy dany wpis
+    def _acquire(self, key):
+        lock_path = self._path(key) + ".lock"
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return lock_path
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_TIMEOUT:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            return None
+
+    def get_or_compute(self, key, compute, should_cache):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        lock_path = self._acquire(key)
+        while lock_path is None and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            lock_path = self._acquire(key)
+
+        try:
+            value = compute()
+            if should_cache(value):
+                self.set(key, value)
+            return value
+        finally:
+            if lock_path is not None and os.path.exists(lock_path):
+                os.remove(lock_path)
+
+    # usuwa wpisy przeterminowane i najstarsze ponad limit rozmiaru
+    def cleanup(self):
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.ttl:
+                    _remove_quietly(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove_quietly(path)
+            total -= size
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                _remove_quietly(os.path.join(root, name))
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+shared_cache = DiskCache(CACHE_DIR, CACHE_TTL, CACHE_MAX_BYTES) if CACHE_ENABLED else None
+
+
+def _default_should_cache(value):
+    return value is not None
+
+
+# dekorator zapamiętujący wynik funkcji we współdzielonym cache;
+# argumenty funkcji muszą mieć stabilną reprezentację (liczby, krotki, napisy),
+# a klucz zawiera wersję danych, więc po wczytaniu nowych danych wpisy przestają pasować
+def memoize(namespace, should_cache=_default_should_cache):
+    def decorator(func):
+        def make_key(args, kwargs):
+            return f"{namespace}:v{backend.data_version()}:{args!r}:{sorted(kwargs.items())!r}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if shared_cache is None:
+                return func(*args, **kwargs)
+            key = make_key(args, kwargs)
+            return shared_cache.get_or_compute(key, lambda: func(*args, **kwargs), should_cache)
+
+        # czy wynik dla tych argumentów jest już w cache (bez wczytywania go)
+        def is_cached(*args, **kwargs):
+            return shared_cache is not None and shared_cache.contains(make_key(args, kwargs))
+
+        wrapper.is_cached = is_cached
+        return wrapper
+
+    return decorator
@@ -0,0 +1,287 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from storage import database
+from storage.bitmap import BitmapIndex
+
+# Kolumnowy silnik zapytań w pamięci.
+# Tabela ChicagoCrimes jest wczytywana raz do tablic NumPy posortowanych według
+# czasu zdarzenia (a więc i roku), więc filtr lat lub dat to wycinek tablicy.
+# Agregacje stron to np.bincount na kodach kolumn kategorycznych, liczony raz dla
+# każdego roku - zapytanie o zakres lat tylko sumuje małe histogramy, a zakres dat
+# liczy na nowo jedynie niepełne lata na brzegach.
+
+CATEGORICAL_COLUMNS = ['PrimaryType', 'LocationDescription', 'District']
+ENGINE_COLUMNS = ['Timestamp', 'Year', 'Month', 'Hour', 'PrimaryType', 'LocationDescription', 'District',
+                  'Arrest', 'Domestic', 'Latitude', 'Longitude']
+MONTHS = 12
+HOURS = 24
+
+
+def _read_database(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        stamp = database.read_version_stamp(conn)
+        df = pd.read_sql_query(f"SELECT {', '.join(ENGINE_COLUMNS)} FROM ChicagoCrimes", conn)
+    finally:
+        conn.close()
+    return df, stamp
+
+
+# wczytuje kolumny silnika i wersję danych (każda baza w jednej transakcji odczytu);
+# db_paths to ścieżka bazy albo lista baz lat - wersja jak w database.data_version
+def read_table(db_paths):
+    if isinstance(db_paths, str):
+        db_paths = [db_paths]
+    parts = database.map_databases(_read_database, db_paths)
+    if not parts:
+        return pd.DataFrame(columns=ENGINE_COLUMNS), 0
+    df = pd.concat([df for df, _ in parts], ignore_index=True) if len(parts) > 1 else parts[0][0]
+    return df, database.combine_versions(db_paths, [stamp for _, stamp in parts])
+
+
+class ColumnarEngine:
+    """Tabela ChicagoCrimes jako tablice NumPy z agregacjami stron"""
+
+    def __init__(self, columns, dictionaries, bitmaps=None):
+        # columns: Timestamp (int64), Year (uint16), Month/Hour/Arrest/Domestic (uint8), kody kategorii,
+        # Latitude/Longitude (float32)
+        # dictionaries: nazwa kolumny kategorycznej -> tablica wartości (indeks = kod)
+        # bitmaps: gotowe bitmapy filtrów krzyżowych (np. ze snapshotu), inaczej liczone tutaj
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.n_rows = len(columns['Year'])
+        self.bitmap_index = (BitmapIndex(self.n_rows, bitmaps, dictionaries) if bitmaps is not None
+                             else BitmapIndex.build(columns, dictionaries))
+        self.data_version = None
+        self._year_cache = {}
+
+        # granice lat w posortowanej kolumnie Year (bez sortowania i kopii danych)
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(columns['Year'])) + 1]) if self.n_rows else []
+        ends = list(starts[1:]) + [self.n_rows]
+        self.year_bounds = {
+            int(columns['Year'][start]): (int(start), int(end)) for start, end in zip(starts, ends)
+        }
+        # histogramy pełnych lat liczone od razu, zapytania tylko je sumują
+        self._year_histograms(None)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Buduje silnik z DataFrame o kolumnach tabeli ChicagoCrimes"""
+        order = np.argsort(df['Timestamp'].to_numpy(), kind='stable')
+        df = df.iloc[order]
+
+        columns = {
+            'Timestamp': df['Timestamp'].to_numpy(dtype=np.int64),
+            'Year': df['Year'].to_numpy(dtype=np.uint16),
+            'Month': df['Month'].to_numpy(dtype=np.uint8),
+            'Hour': df['Hour'].to_numpy(dtype=np.uint8),
+            'Arrest': df['Arrest'].to_numpy(dtype=np.uint8),
+            'Domestic': df['Domestic'].to_numpy(dtype=np.uint8),
+            'Latitude': df['Latitude'].to_numpy(dtype=np.float32),
+            'Longitude': df['Longitude'].to_numpy(dtype=np.float32),
+        }
+        dictionaries = {}
+        for column in CATEGORICAL_COLUMNS:
+            # słownik posortowany - kody zachowują kolejność nazw (jak GROUP BY w SQLite)
+            codes, values = pd.factorize(df[column], sort=True, use_na_sentinel=False)
+            columns[column] = codes.astype(np.uint16)
+            dictionaries[column] = np.asarray(values, dtype=object)
+
+        return cls(columns, dictionaries)
+
+    @classmethod
+    def from_sqlite(cls, db_paths):
+        df, data_version = read_table(db_paths)
+        engine = cls.from_frame(df)
+        engine.data_version = data_version
+        return engine
+
+    # zamienia filtr okresu (rok, krotka z zakresem lat, DateRange) na wycinek posortowanych tablic
+    def _slice(self, year_filter):
+        if isinstance(year_filter, database.DateRange):
+            start = int(np.searchsorted(self.columns['Timestamp'], year_filter.start, side='left'))
+            end = int(np.searchsorted(self.columns['Timestamp'], year_filter.end, side='left'))
+            return slice(start, end)
+        elif isinstance(year_filter, tuple):
+            first, last = year_filter
+        elif year_filter:
+            first = last = year_filter
+        else:
+            return slice(0, self.n_rows)
+
+        start = int(np.searchsorted(self.columns['Year'], first, side='left'))
+        end = int(np.searchsorted(self.columns['Year'], last, side='right'))
+        return slice(start, end)
+
+    def _years_in(self, rows):
+        return [(year, max(start, rows.start), min(end, rows.stop))
+                for year, (start, end) in self.year_bounds.items()
+                if start < rows.stop and end > rows.start]
+
+    def _decode(self, column, counts, extra=None):
+        """Zamienia histogram po kodach na DataFrame z nazwami kategorii"""
+        frame = pd.DataFrame({column: self.dictionaries[column], 'count': counts.astype(np.int64)})
+        for key, array in (extra or {}).items():
+            frame[key] = array.astype(np.int64)
+        frame = frame[(frame['count'] > 0) & frame[column].notna()]
+        return frame.reset_index(drop=True)
+
+    # histogramy potrzebne stronom dla wycinka wierszy (cztery wywołania np.bincount)
+    def _histograms(self, rows):
+        n_types = len(self.dictionaries['PrimaryType'])
+        # kod komórki = typ * 13 + miesiąc
+        cells = self.columns['PrimaryType'][rows].astype(np.int32) * (MONTHS + 1) + self.columns['Month'][rows]
+        return {
+            'hour': np.bincount(self.columns['Hour'][rows], minlength=HOURS),
+            'location': np.bincount(self.columns['LocationDescription'][rows],
+                                    minlength=len(self.dictionaries['LocationDescription'])),
+            'type_month': np.bincount(cells, minlength=n_types * (MONTHS + 1)).reshape(n_types, MONTHS + 1),
+            'type_month_arrests': np.bincount(
+                cells, weights=self.columns['Arrest'][rows], minlength=n_types * (MONTHS + 1)
+            ).astype(np.int64).reshape(n_types, MONTHS + 1),
+        }
+
+    # histogramy dla lat z filtra: pełne lata liczone raz i zapamiętywane,
+    # niepełne (brzegi zakresu dat) liczone dla samego wycinka
+    def _year_histograms(self, year_filter):
+        rows = self._slice(year_filter)
+        result = []
+        for year, start, end in self._years_in(rows):
+            if (start, end) != self.year_bounds[year]:
+                result.append((year, self._histograms(slice(start, end))))
+                continue
+            if year not in self._year_cache:
+                self._year_cache[year] = self._histograms(slice(start, end))
+            result.append((year, self._year_cache[year]))
+        return result
+
+    # wiersze okresu spełniające filtry krzyżowe (indeksy) albo wycinek, gdy filtrów brak
+    def _filtered_rows(self, year_filter, filters):
+        rows = self._slice(year_filter)
+        if not filters:
+            return rows
+        return rows.start + np.flatnonzero(self.bitmap_index.mask(filters, rows))
+
+    # histogramy lat z filtra z uwzględnieniem filtrów krzyżowych (maska z bitmap)
+    def _filtered_year_histograms(self, year_filter, filters):
+        if not filters:
+            return self._year_histograms(year_filter)
+
+        rows = self._filtered_rows(year_filter, filters)
+        result = []
+        for year, (start, end) in self.year_bounds.items():
+            first, last = np.searchsorted(rows, [start, end])
+            if last > first:
+                result.append((year, self._histograms(rows[first:last])))
+        return result
+
+    # agregacje wykresów strony wizualnej (odpowiednik grupowań w create_charts);
+    # filters: filtry krzyżowe jako krotka par (kolumna, krotka wartości)
+    def chart_aggregates(self, year_filter=None, filters=()):
+        histograms = self._filtered_year_histograms(year_filter, filters)
+
+        yearly = pd.DataFrame({
+            'Year': [year for year, _ in histograms],
+            'count': [int(h['type_month'].sum()) for _, h in histograms],
+        }, dtype=np.int64)
+
+        monthly = []
+        for year, h in histograms:
+            counts = h['type_month'].sum(axis=0)
+            months = np.nonzero(counts)[0]
+            monthly.append(pd.DataFrame({'Year': year, 'Month': months, 'count': counts[months]}))
+        monthly = (pd.concat(monthly, ignore_index=True) if monthly
+                   else pd.DataFrame(columns=['Year', 'Month', 'count']))
+
+        if histograms:
+            total = {key: sum(h[key] for _, h in histograms) for key in histograms[0][1]}
+        else:
+            total = self._histograms(slice(0, 0))
+
+        hours = np.nonzero(total['hour'])[0]
+        hourly = pd.DataFrame({'Hour': hours, 'count': total['hour'][hours]})
+
+        return {
+            'yearly': yearly,
+            'monthly': monthly.astype(np.int64),
+            'hourly': hourly.astype(np.int64),
+            'locations': self._decode('LocationDescription', total['location']),
+            'types': self._decode('PrimaryType', total['type_month'].sum(axis=1), {
+                'arrests': total['type_month_arrests'].sum(axis=1),
+            }),
+        }
+
+    # punkty na mapę dla wybranego okresu
+    def map_points(self, year_filter=None, filters=()):
+        rows = self._filtered_rows(year_filter, filters)
+        return pd.DataFrame({
+            'Latitude': self.columns['Latitude'][rows],
+            'Longitude': self.columns['Longitude'][rows],
+            'PrimaryType': self.dictionaries['PrimaryType'][self.columns['PrimaryType'][rows]],
+            'count': 1,
+        })
+
+    # liczba przestępstw i aresztowań według typu, roku i miesiąca (strona statystyczna)
+    def arrest_counts(self, year_filter=None):
+        frame = self._type_month_counts(year_filter, {
+            'type': 'Typ', 'year': 'Rok', 'month': 'Miesiac', 'count': 'Liczba', 'arrests': 'Aresztowania'
+        })
+        return frame.sort_values(['Typ', 'Rok', 'Miesiac']).reset_index(drop=True)
+
+    # miesięczna liczba przestępstw według typu (szereg czasowy ARIMA)
+    def monthly_type_counts(self, year_filter=None):
+        frame = self._type_month_counts(year_filter, {
+            'type': 'PrimaryType', 'year': 'Year', 'month': 'Month', 'count': 'count', 'arrests': None
+        })
+        frame = frame[['Year', 'Month', 'PrimaryType', 'count']]
+        return frame.sort_values(['Year', 'Month'], kind='stable').reset_index(drop=True)
+
+    # liczba przestępstw według typu, dystryktu i okresu (szeregi wykrywania anomalii);
+    # Period to numer miesiąca (Year * 12 + Month - 1) albo tygodnia od database.WEEK_ORIGIN
+    def type_district_counts(self, granularity):
+        if not self.n_rows:
+            return pd.DataFrame(columns=['PrimaryType', 'District', 'Period', 'count'])
+        if granularity == 'week':
+            periods = (self.columns['Timestamp'] - database.WEEK_ORIGIN) // database.SECONDS_PER_WEEK
+        else:
+            periods = self.columns['Year'].astype(np.int64) * MONTHS + self.columns['Month'] - 1
+        first = int(periods.min())
+        n_periods = int(periods.max()) - first + 1
+        n_districts = len(self.dictionaries['District'])
+
+        # kod komórki = (typ * liczba dystryktów + dystrykt) * liczba okresów + okres
+        cells = ((self.columns['PrimaryType'].astype(np.int64) * n_districts + self.columns['District'])
+                 * n_periods + (periods - first))
+        counts = np.bincount(cells)
+        cells = np.flatnonzero(counts)
+        series, offsets = np.divmod(cells, n_periods)
+        types, districts = np.divmod(series, n_districts)
+        frame = pd.DataFrame({
+            'PrimaryType': self.dictionaries['PrimaryType'][types],
+            'District': self.dictionaries['District'][districts],
+            'Period': offsets + first,
+            'count': counts[cells].astype(np.int64),
+        })
+        return frame[frame['PrimaryType'].notna() & frame['District'].notna()].reset_index(drop=True)
+
+    def _type_month_counts(self, year_filter, names):
+        frames = []
+        for year, h in self._year_histograms(year_filter):
+            types, months = np.nonzero(h['type_month'])
+            frame = {
+                names['type']: self.dictionaries['PrimaryType'][types],
+                names['year']: np.full(len(types), year, dtype=np.int64),
+                names['month']: months.astype(np.int64),
+                names['count']: h['type_month'][types, months].astype(np.int64),
+            }
+            if names['arrests']:
+                frame[names['arrests']] = h['type_month_arrests'][types, months]
+            frames.append(pd.DataFrame(frame))
+
+        if not frames:
+            return pd.DataFrame(columns=[name for name in names.values() if name])
+        frame = pd.concat(frames, ignore_index=True)
+        return frame[frame[names['type']].notna()].reset_index(drop=True)
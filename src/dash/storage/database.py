@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+import contextvars
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+from monitoring import metrics
+
+# Konfiguracja ścieżek
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+DB_PATH = os.environ.get("CRIMES_DB_PATH", os.path.join(project_root, 'scripts', 'chicago_crimes.db'))
+
+# Tryb przechowywania danych:
+#   CRIMES_STORAGE=single   - jedna baza CRIMES_DB_PATH (domyślnie)
+#   CRIMES_STORAGE=sharded  - osobna baza na każdy rok (CRIMES_SHARD_DIR/crimes_<rok>.db);
+#                             zapytania wykonywane są równolegle na bazach lat z filtra
+#                             okresu, a częściowe agregacje łączone w read_sql
+STORAGE_MODE = os.environ.get("CRIMES_STORAGE", "single")
+SHARD_DIR = os.environ.get("CRIMES_SHARD_DIR", os.path.join(project_root, 'scripts', 'shards'))
+# liczba wątków wykonujących zapytania na bazach lat
+FANOUT_WORKERS = int(os.environ.get("CRIMES_FANOUT_WORKERS", "8"))
+
+SHARD_NAME = re.compile(r"^crimes_(\d+)\.db$")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def use_shards():
+    return STORAGE_MODE == "sharded"
+
+
+def connect(path=None):
+    return sqlite3.connect(path or DB_PATH)
+
+
+def shard_path(year, shard_dir=None):
+    return os.path.join(shard_dir or SHARD_DIR, f"crimes_{year}.db")
+
+
+# lata, dla których istnieją bazy w katalogu
+def shard_years(shard_dir=None):
+    try:
+        names = os.listdir(shard_dir or SHARD_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(int(match.group(1)) for match in map(SHARD_NAME.match, names) if match)
+
+
+# lata z listy years objęte filtrem okresu (rok, krotka z zakresem lat, DateRange)
+def filter_years(year_filter, years):
+    if isinstance(year_filter, DateRange):
+        first = pd.Timestamp(year_filter.start, unit='s').year
+        last = pd.Timestamp(year_filter.end - 1, unit='s').year
+    elif isinstance(year_filter, tuple):
+        first, last = year_filter
+    elif year_filter:
+        first = last = year_filter
+    else:
+        return list(years)
+    return [year for year in years if first <= year <= last]
+
+
+# pliki baz z danymi dla filtra okresu (w trybie jednej bazy zawsze DB_PATH)
+def database_paths(year_filter=None):
+    if not use_shards():
+        return [DB_PATH]
+    return [shard_path(year) for year in filter_years(year_filter, shard_years())]
+
+
+# wykonuje func(ścieżka) dla każdej bazy w puli wątków, wyniki w kolejności ścieżek;
+# każde zadanie dostaje kopię kontekstu (etykieta callbacku w metrykach)
+def map_databases(func, paths):
+    global _pool
+    if len(paths) <= 1:
+        return [func(path) for path in paths]
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="shard")
+    futures = [_pool.submit(contextvars.copy_context().run, func, path) for path in paths]
+    return [future.result() for future in futures]
+
+
+# wersja danych z tabeli DataVersion (0 dla baz utworzonych przed jej dodaniem)
+def read_data_version(conn):
+    try:
+        row = conn.execute("SELECT version FROM DataVersion WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+
+# znacznik wersji jednej bazy: (numer wersji, czas wczytania)
+def read_version_stamp(conn):
+    try:
+        row = conn.execute("SELECT version, loaded_at FROM DataVersion WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0, None
+    return (row[0], row[1]) if row else (0, None)
+
+
+# wersja danych zbioru baz ze znaczników kolejnych baz: dla jednej bazy jej numer wersji,
+# dla baz lat skrót trójek (baza, wersja, czas wczytania) - suma numerów maleje po usunięciu
+# albo odtworzeniu bazy roku i może powtórzyć wcześniejszą wartość (cache zwracałby stare wyniki)
+def combine_versions(paths, stamps):
+    if len(paths) <= 1:
+        return stamps[0][0] if stamps else 0
+    key = repr([(os.path.basename(path), version, loaded_at)
+                for path, (version, loaded_at) in zip(paths, stamps)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _path_version_stamp(path):
+    conn = connect(path)
+    try:
+        return read_version_stamp(conn)
+    finally:
+        conn.close()
+
+
+# wersja danych, na których pracują strony (numer albo skrót wersji baz lat)
+def data_version():
+    paths = database_paths()
+    return combine_versions(paths, map_databases(_path_version_stamp, paths))
+
+
+# zwiększa wersję danych; wywoływane w transakcji, która wczytuje dane
+def bump_data_version(conn):
+    conn.execute(
+        "UPDATE DataVersion SET version = version + 1, loaded_at = datetime('now') WHERE id = 1"
+    )
+    return read_data_version(conn)
+
+
+# Zakres dat jako przedział [start, end) w sekundach od 1970-01-01 (kolumna Timestamp)
+class DateRange(namedtuple("DateRange", ["start", "end"])):
+    """Filtr okresu z dokładnością do dnia - pierwszy dzień i dzień po ostatnim"""
+
+    @classmethod
+    def from_dates(cls, start_date, end_date):
+        """Zakres z dat 'RRRR-MM-DD' (obie granice włącznie)"""
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+        return cls(_epoch_seconds(start), _epoch_seconds(end))
+
+    @property
+    def days(self):
+        return (self.end - self.start) // SECONDS_PER_DAY
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+# numeracja tygodni od pierwszego poniedziałku po 1970-01-01 (1970-01-05)
+WEEK_ORIGIN = 4 * SECONDS_PER_DAY
+
+
+def _epoch_seconds(timestamp):
+    return int((timestamp - pd.Timestamp(0)) // pd.Timedelta(seconds=1))
+
+
+# Filtry krzyżowe: krotka par (kolumna, krotka wartości) posortowana według kolumny,
+# więc ma stałą reprezentację w kluczach cache
+FILTER_COLUMNS = ['PrimaryType', 'District', 'LocationDescription', 'Arrest', 'Domestic']
+
+
+def normalize_filters(filters):
+    """Słownik kolumna -> lista wartości zamieniony na postać filtrów (bez pustych i nieznanych kolumn)"""
+    return tuple(sorted(
+        (column, tuple(sorted(values)))
+        for column, values in (filters or {}).items()
+        if column in FILTER_COLUMNS and values
+    ))
+
+
+# warunek WHERE dla filtrów krzyżowych (OR w obrębie kolumny, AND między kolumnami)
+def filters_clause(filters):
+    where, params = "", []
+    for column, values in filters:
+        where += f" AND {column} IN ({', '.join('?' * len(values))})"
+        params.extend(values)
+    return where, params
+
+
+def _timestamp_bound(function, paths):
+    def bound(path):
+        conn = connect(path)
+        try:
+            return conn.execute(f"SELECT {function}(Timestamp) FROM ChicagoCrimes").fetchone()[0]
+        finally:
+            conn.close()
+
+    return [value for value in map_databases(bound, paths) if value is not None]
+
+
+# najnowszy zapisany czas zdarzenia - punkt odniesienia dla zakresów "ostatnie N dni"
+def newest_timestamp():
+    # w trybie baz lat najnowsze zdarzenie jest w bazie ostatniego roku
+    values = _timestamp_bound("MAX", database_paths()[-1:])
+    return max(values) if values else None
+
+
+# najstarszy zapisany czas zdarzenia (w trybie baz lat - w bazie pierwszego roku)
+def oldest_timestamp():
+    values = _timestamp_bound("MIN", database_paths()[:1])
+    return min(values) if values else None
+
+
+# buduje warunek WHERE dla filtra okresu: pojedynczy rok, krotka z zakresem lat
+# lub DateRange (przedział po indeksowanej kolumnie Timestamp)
+def year_filter_clause(year_filter, column="Year"):
+    if isinstance(year_filter, DateRange):
+        return " AND Timestamp >= ? AND Timestamp < ?", [year_filter.start, year_filter.end]
+    elif isinstance(year_filter, tuple):
+        return f" AND {column} BETWEEN ? AND ?", [year_filter[0], year_filter[1]]
+    elif year_filter:
+        return f" AND {column} = ?", [year_filter]
+    return "", []
+
+
+# znacznik wersji, wiersze i nazwy kolumn wyniku zapytania z jednej transakcji odczytu
+def _query_database(path, query, params):
+    conn = connect(path)
+    try:
+        conn.execute("BEGIN")
+        stamp = read_version_stamp(conn)
+        cursor = conn.execute(query, params)
+        rows = cursor.fetchall()
+        columns = [column[0] for column in cursor.description]
+    finally:
+        conn.close()
+    return stamp, rows, columns
+
+
+# wykonuje zapytanie i zwraca DataFrame, rejestrując czas SQLite i pandas;
+# wersja danych i wynik pochodzą z jednej transakcji odczytu (spójny stan bazy w trybie WAL),
+# wersja baz zapytania (jak w data_version) jest zapisana w df.attrs['data_version'].
+# W trybie baz lat zapytanie wykonywane jest na bazach lat z year_filter, a wyniki
+# są sklejane; merge_by to kolumny grupowania, według których częściowe agregacje
+# (pozostałe kolumny, np. COUNT i SUM) są sumowane - potrzebne, gdy grupowanie nie zawiera roku
+def read_sql(name, query, params=(), year_filter=None, merge_by=None):
+    paths = database_paths(year_filter)
+    with metrics.timed_stage("sqlite"):
+        start = time.perf_counter()
+        results = map_databases(lambda path: _query_database(path, query, params), paths)
+        duration = time.perf_counter() - start
+
+    rows = [row for result in results for row in result[1]]
+    metrics.record_query(name, query, list(params), duration, len(rows))
+
+    with metrics.timed_stage("pandas"):
+        df = pd.DataFrame.from_records(rows, columns=results[0][2] if results else None)
+        if merge_by and len(results) > 1:
+            df = df.groupby(merge_by, as_index=False, sort=True, dropna=False).sum()
+    df.attrs['data_version'] = combine_versions(paths, [result[0] for result in results])
+    return df
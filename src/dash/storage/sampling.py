@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from storage import database
+from storage.cache import memoize
+
+# Próbka warstwowa tabeli ChicagoCrimes do szybkiego podglądu (tryb przybliżony).
+# Warstwa to para (Year, PrimaryType); z każdej losowany jest ułamek SAMPLE_FRACTION
+# wierszy, ale nie mniej niż MIN_STRATUM_SAMPLE. Każdy wiersz próbki zna liczność
+# swojej warstwy (Population) i liczbę wylosowanych z niej wierszy (SampleSize).
+#
+# Oszacowania to estymator Horvitza-Thompsona dla podzbiorów (grup wykresu, filtrów):
+#   suma = Σ_h N_h / n_h * k_h
+#   wariancja = Σ_h N_h² (1 - n_h / N_h) / n_h * k_h (1 - k_h / n_h) / (n_h - 1)
+# gdzie k_h to liczba wierszy próbki warstwy h należących do grupy (albo aresztowań w grupie).
+# Liczby przestępstw według roku i typu są więc dokładne, szacowane są pozostałe podziały.
+
+SAMPLE_FRACTION = float(os.environ.get("SAMPLE_FRACTION", "0.01"))
+MIN_STRATUM_SAMPLE = 30
+# mnożnik błędu standardowego dla 95% przedziału ufności
+CONFIDENCE_Z = 1.96
+
+SAMPLE_COLUMNS = ['Timestamp', 'Year', 'Month', 'Hour', 'PrimaryType', 'LocationDescription', 'District',
+                  'Arrest', 'Domestic', 'Latitude', 'Longitude']
+
+
+# buduje tabelę próbki od nowa; wywoływane w transakcji wczytywania danych.
+# Tabele są jawnie w schemacie main - do połączenia może być dołączona inna baza (ATTACH)
+def build_sample(conn, fraction=SAMPLE_FRACTION, min_stratum_sample=MIN_STRATUM_SAMPLE):
+    columns = ', '.join(f"c.{column}" for column in SAMPLE_COLUMNS)
+    conn.execute("DROP TABLE IF EXISTS main.ChicagoCrimesSample")
+    # losowanie na wąskich wierszach (rowid i klucz warstwy), pełne kolumny dołączane na końcu
+    conn.execute(f"""
+        CREATE TABLE main.ChicagoCrimesSample AS
+        SELECT {columns}, s.Population, s.SampleSize
+        FROM (
+            SELECT rowid_, Population, MIN(Population, MAX(?, CAST(Population * ? AS INTEGER))) AS SampleSize,
+                RowNumber
+            FROM (
+                SELECT rowid AS rowid_,
+                    ROW_NUMBER() OVER (PARTITION BY Year, PrimaryType ORDER BY random()) AS RowNumber,
+                    COUNT(*) OVER (PARTITION BY Year, PrimaryType) AS Population
+                FROM main.ChicagoCrimes
+            )
+        ) AS s
+        JOIN main.ChicagoCrimes AS c ON c.rowid = s.rowid_
+        WHERE s.RowNumber <= s.SampleSize
+    """, (min_stratum_sample, fraction))
+
+
+# wiersze próbki dla filtra okresu i filtrów krzyżowych; None, gdy próbki nie ma
+@memoize("sampling.sample")
+def query_sample(year_filter=None, filters=()):
+    where, params = database.year_filter_clause(year_filter)
+    filters_where, filters_params = database.filters_clause(filters)
+    try:
+        return database.read_sql(
+            "sampling.query_sample",
+            f"SELECT * FROM ChicagoCrimesSample WHERE 1=1{where}{filters_where}",
+            params + filters_params,
+            year_filter
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Brak próbki do trybu przybliżonego: {e}")
+        return None
+
+
+# oszacowanie sumy i wariancji na podstawie liczności warstw (N, n) i trafień w warstwie (k)
+def _stratum_terms(population, sample_size, hits):
+    population = population.astype(float)
+    sample_size = sample_size.astype(float)
+    hits = hits.astype(float)
+    estimate = population / sample_size * hits
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (population ** 2 * (1 - sample_size / population) / sample_size
+                    * hits * (1 - hits / sample_size) / (sample_size - 1))
+    return estimate, np.nan_to_num(variance, nan=0.0, posinf=0.0)
+
+
+# oszacowania liczby przestępstw (count) i opcjonalnie aresztowań (arrests) w grupach;
+# kolumny *_error to połowa szerokości 95% przedziału ufności
+def estimate(sample, group_columns, arrests=False):
+    strata = ['Year', 'PrimaryType']
+    keys = list(dict.fromkeys(strata + group_columns))
+    grouped = sample.groupby(keys, dropna=False).agg(
+        Population=('Population', 'first'),
+        SampleSize=('SampleSize', 'first'),
+        hits=('Population', 'size'),
+        arrest_hits=('Arrest', 'sum'),
+    ).reset_index()
+
+    values = {}
+    values['count'], values['count_var'] = _stratum_terms(
+        grouped['Population'], grouped['SampleSize'], grouped['hits'])
+    if arrests:
+        values['arrests'], values['arrests_var'] = _stratum_terms(
+            grouped['Population'], grouped['SampleSize'], grouped['arrest_hits'])
+    terms = pd.concat([grouped[group_columns], pd.DataFrame(values)], axis=1)
+
+    # grupy z brakującą wartością klucza są pomijane, tak jak w GROUP BY z warunkiem IS NOT NULL
+    result = terms.groupby(group_columns).sum().reset_index()
+    for column in ['count', 'arrests'] if arrests else ['count']:
+        result[f'{column}_error'] = CONFIDENCE_Z * np.sqrt(result.pop(f'{column}_var'))
+        result[column] = result[column].round().astype(np.int64)
+    return result
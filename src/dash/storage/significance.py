@@ -0,0 +1,51 @@
+import numpy as np
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+# Testy istotności zmian między dwoma okresami liczone naraz dla wszystkich typów
+# przestępstw - argumenty to tablice (jeden element na typ), bez pętli po typach.
+#   - wskaźnik aresztowań: test z dla dwóch proporcji (równoważny testowi chi-kwadrat 2x2),
+#   - liczba przestępstw na miesiąc: dokładny warunkowy test ilorazu intensywności Poissona
+#     (przy ustalonej sumie c1 + c2 liczba c2 ma rozkład dwumianowy z p = t2 / (t1 + t2)),
+#   - korekta na wielokrotne porównania: Benjamini-Hochberg (FDR) osobno dla każdego testu.
+
+ALPHA = 0.05
+
+
+# różnica proporcji x2/n2 - x1/n1 i dwustronne p (NaN, gdy któraś próba jest pusta)
+def two_proportion_test(x1, n1, x2, n2):
+    x1, n1, x2, n2 = (np.asarray(value, dtype=float) for value in (x1, n1, x2, n2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p1, p2 = x1 / n1, x2 / n2
+        pooled = (x1 + x2) / (n1 + n2)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        z = (p2 - p1) / se
+    p_value = 2 * stats.norm.sf(np.abs(z))
+    # identyczne proporcje 0 albo 1 w obu okresach (se = 0) - brak różnicy
+    p_value = np.where((se == 0) & (n1 > 0) & (n2 > 0), 1.0, p_value)
+    return p2 - p1, p_value
+
+
+# iloraz intensywności (c2/t2) / (c1/t1) i dwustronne p dokładnego testu warunkowego
+# (podwojony mniejszy ogon rozkładu dwumianowego - nieco ostrożniejsze niż metoda minlike);
+# t1, t2 - czas obserwacji (liczba miesięcy) okresów
+def poisson_rate_test(c1, t1, c2, t2):
+    c1, c2 = np.asarray(c1, dtype=float), np.asarray(c2, dtype=float)
+    total = c1 + c2
+    share = t2 / (t1 + t2)
+    lower = stats.binom.cdf(c2, total, share)
+    upper = stats.binom.sf(c2 - 1, total, share)
+    p_value = np.minimum(1.0, 2 * np.minimum(lower, upper))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = (c2 / t2) / (c1 / t1)
+    return ratio, np.where(total > 0, p_value, np.nan)
+
+
+# p skorygowane metodą Benjaminiego-Hochberga; NaN (test niewykonalny) pozostaje NaN
+def adjust_pvalues(p_values, method='fdr_bh'):
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    valid = ~np.isnan(p_values)
+    if valid.any():
+        adjusted[valid] = multipletests(p_values[valid], method=method)[1]
+    return adjusted
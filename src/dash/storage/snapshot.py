@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+
+from storage.columnar import ColumnarEngine, read_table
+
+# Kolumnowy snapshot tabeli ChicagoCrimes mapowany do pamięci.
+#
+# Układ katalogu:
+#   CURRENT                     nazwa aktualnej wersji (np. "v3")
+#   v<wersja>/meta.json         nagłówek: wersja danych, liczba wierszy, typy kolumn
+#   v<wersja>/<kolumna>.bin     kolumna jako tablica o stałej szerokości elementu
+#   v<wersja>/<kolumna>.dict.json  słownik kolumny kategorycznej (indeks = kod)
+#   v<wersja>/<kolumna>.bitmap.bin  bitmapy wartości kolumny dla filtrów krzyżowych (storage/bitmap.py)
+#
+# Workery otwierają pliki przez np.memmap tylko do odczytu, więc wszystkie procesy
+# współdzielą te same strony pamięci (page cache), a start nie wymaga skanu SQL.
+
+FORMAT_VERSION = 3
+KEEP_VERSIONS = 2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join(project_root, 'scripts', 'snapshot'))
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _json_value(value):
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# zapisuje snapshot z DataFrame o kolumnach tabeli ChicagoCrimes;
+# data_version to wersja danych baz, z których pochodzą dane (database.data_version)
+def write_snapshot(df, root=None, data_version=0):
+    root = root or SNAPSHOT_DIR
+    engine = ColumnarEngine.from_frame(df)
+
+    name = f"v{data_version}"
+    target = os.path.join(root, name)
+    staging = target + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "data_version": data_version,
+        "n_rows": engine.n_rows,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "columns": {},
+        "dictionaries": {},
+        "bitmaps": {},
+    }
+    for column, array in engine.columns.items():
+        file_name = f"{column}.bin"
+        np.ascontiguousarray(array).tofile(os.path.join(staging, file_name))
+        meta["columns"][column] = {"file": file_name, "dtype": array.dtype.str}
+    for column, values in engine.dictionaries.items():
+        file_name = f"{column}.dict.json"
+        _write_json(os.path.join(staging, file_name), [_json_value(v) for v in values])
+        meta["dictionaries"][column] = file_name
+    for column, bitmaps in engine.bitmap_index.bitmaps.items():
+        file_name = f"{column}.bitmap.bin"
+        bitmaps.tofile(os.path.join(staging, file_name))
+        meta["bitmaps"][column] = {"file": file_name, "shape": list(bitmaps.shape)}
+    _write_json(os.path.join(staging, "meta.json"), meta)
+
+    # publikacja: gotowy katalog wersji, potem atomowa podmiana wskaźnika CURRENT
+    if os.path.exists(target):
+        # ponowny zapis tej samej wersji - stary katalog usuwany dopiero po podmianie
+        shutil.rmtree(target + ".old", ignore_errors=True)
+        os.replace(target, target + ".old")
+    os.replace(staging, target)
+    shutil.rmtree(target + ".old", ignore_errors=True)
+    with open(os.path.join(root, "CURRENT.tmp"), "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(os.path.join(root, "CURRENT.tmp"), os.path.join(root, "CURRENT"))
+
+    _remove_old_versions(root, keep=name)
+    return target
+
+
+# zapisuje snapshot na podstawie całej tabeli w bazie SQLite (z wersją danych z tej samej transakcji);
+# db_paths to ścieżka bazy albo lista baz lat
+def write_snapshot_from_sqlite(db_paths, root=None):
+    df, data_version = read_table(db_paths)
+    return write_snapshot(df, root, data_version)
+
+
+def _remove_old_versions(root, keep):
+    versions = sorted(
+        (entry for entry in os.listdir(root) if entry.startswith("v") and "." not in entry),
+        key=lambda entry: os.path.getmtime(os.path.join(root, entry)),
+    )
+    others = [entry for entry in versions if entry != keep]
+    for entry in others[:max(0, len(others) - (KEEP_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+# ścieżka aktualnej wersji snapshotu albo None, gdy snapshot nie istnieje
+# lub został zapisany w innej wersji formatu
+def current_snapshot_path(root=None):
+    root = root or SNAPSHOT_DIR
+    try:
+        with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+            path = os.path.join(root, f.read().strip())
+        if read_meta(path)["format_version"] != FORMAT_VERSION:
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return path
+
+
+def read_meta(path):
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+# otwiera snapshot jako silnik kolumnowy; kolumny są mapowane do pamięci tylko do odczytu
+def open_snapshot(path):
+    meta = read_meta(path)
+    if meta["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja formatu snapshotu: {meta['format_version']}")
+
+    columns = {}
+    for column, info in meta["columns"].items():
+        if meta["n_rows"]:
+            columns[column] = np.memmap(os.path.join(path, info["file"]), dtype=np.dtype(info["dtype"]),
+                                        mode="r", shape=(meta["n_rows"],))
+        else:
+            columns[column] = np.empty(0, dtype=np.dtype(info["dtype"]))
+
+    dictionaries = {}
+    for column, file_name in meta["dictionaries"].items():
+        with open(os.path.join(path, file_name), encoding="utf-8") as f:
+            dictionaries[column] = np.asarray(json.load(f), dtype=object)
+
+    bitmaps = {}
+    for column, info in meta["bitmaps"].items():
+        shape = tuple(info["shape"])
+        if meta["n_rows"] and shape[0]:
+            bitmaps[column] = np.memmap(os.path.join(path, info["file"]), dtype=np.uint8, mode="r", shape=shape)
+        else:
+            bitmaps[column] = np.zeros(shape, dtype=np.uint8)
+
+    engine = ColumnarEngine(columns, dictionaries, bitmaps)
+    engine.data_version = meta["data_version"]
+    return engine
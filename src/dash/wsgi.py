@@ -0,0 +1,14 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from app import server
+
+# Punkt wejścia WSGI dla serwera produkcyjnego z wieloma procesami i wątkami, np.:
+#   gunicorn --chdir src/dash --workers 4 --threads 8 --timeout 120 wsgi:application
+# Wyniki zapytań i wykresy są współdzielone przez workery w katalogu CACHE_DIR
+# (storage/cache.py), więc każdy wynik liczony jest raz dla wszystkich procesów.
+application = server
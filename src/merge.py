@@ -51,12 +51,13 @@ def preprocess_and_merge(input_file1, input_file2, output_file):
         return None
 
 
-input_csv1 = "../data/raw/Chicago_Crimes_2008_to_2011.csv"
-input_csv2 = "../data/raw/Chicago_Crimes_2012_to_2017.csv"
-output_csv = "../data/processed/Chicago_Crimes_2008_to_2017.csv"
+if __name__ == "__main__":
+    input_csv1 = "../data/raw/Chicago_Crimes_2008_to_2011.csv"
+    input_csv2 = "../data/raw/Chicago_Crimes_2012_to_2017.csv"
+    output_csv = "../data/processed/Chicago_Crimes_2008_to_2017.csv"
 
-merged_df = preprocess_and_merge(input_csv1, input_csv2, output_csv)
+    merged_df = preprocess_and_merge(input_csv1, input_csv2, output_csv)
 
-if merged_df is not None:
-    print("Przykładowe dane połączone i przetworzone:")
-    print(merged_df.head())
+    if merged_df is not None:
+        print("Przykładowe dane połączone i przetworzone:")
+        print(merged_df.head())
@@ -32,16 +32,55 @@ CREATE TABLE IF NOT EXISTS ChicagoCrimes (
     Hour INTEGER,
     XCoordinate REAL,
     YCoordinate REAL,
-    Location TEXT
+    Location TEXT,
+    Timestamp INTEGER
 );
 
     """
 
+    # Wersja danych - zwiększana w tej samej transakcji co każde wczytanie danych,
+    # dashboard po jej zmianie unieważnia cache i przeładowuje dane
+    create_version_table_query = """
+CREATE TABLE IF NOT EXISTS DataVersion (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    loaded_at TEXT
+);
+    """
+
+    # WAL - wczytywanie danych nie blokuje odczytów dashboardu
+    cursor.execute("PRAGMA journal_mode=WAL")
     cursor.execute(create_table_query)
+    cursor.execute(create_version_table_query)
+    cursor.execute("INSERT OR IGNORE INTO DataVersion (id, version) VALUES (1, 0)")
     conn.commit()
+
+    migrate_timestamp(conn)
     conn.close()
 
 
+# Kolumna Timestamp (sekundy od 1970-01-01 dla czasu lokalnego z kolumny Date) i indeksy
+# filtrów okresu; dla istniejącej bazy kolumna jest dodawana i wypełniana na podstawie Date
+def migrate_timestamp(conn):
+    cursor = conn.cursor()
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(ChicagoCrimes)")]
+    if 'Timestamp' not in columns:
+        print("Dodawanie kolumny Timestamp...")
+        cursor.execute("ALTER TABLE ChicagoCrimes ADD COLUMN Timestamp INTEGER")
+
+    cursor.execute("""
+        UPDATE ChicagoCrimes SET Timestamp = CAST(strftime('%s', Date) AS INTEGER)
+        WHERE Timestamp IS NULL
+    """)
+    if cursor.rowcount > 0:
+        # zmiana danych - dashboard przeładowuje dane po zmianie wersji
+        cursor.execute("UPDATE DataVersion SET version = version + 1, loaded_at = datetime('now') WHERE id = 1")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_crimes_timestamp ON ChicagoCrimes (Timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_crimes_year ON ChicagoCrimes (Year)")
+    conn.commit()
+
+
 if __name__ == "__main__":
     create_table()
     print("Tabela utworzona pomyślnie.")
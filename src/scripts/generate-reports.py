@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dash_dir = os.path.join(os.path.dirname(current_dir), 'dash')
+if dash_dir not in sys.path:
+    sys.path.append(dash_dir)
+
+import pandas as pd
+from dash import html
+from storage import database
+from layout.static_html import render_page
+import pages.visual_analysis as visual_analysis
+import pages.statistical_analysis as statistical_analysis
+import pages.advanced_analysis as advanced_analysis
+
+# Statyczne raporty HTML (jeden plik na rok i na zakres lat) z wykresami strony wizualnej,
+# tabelami strony statystycznej i prognozą ARIMA - generowane w puli procesów.
+# Baza jest czytana raz na rok: proces roku pobiera dane roku, zapisuje raport roku
+# i zwraca małe agregaty (wykresy, liczby według typu i miesiąca), z których
+# powstają raporty zakresów bez ponownych zapytań.
+#
+#   python generate-reports.py --ranges 2008-2012 2013-2017 --workers 4
+
+# Katalog raportów
+REPORT_DIR = "reports"
+
+# kolumny wartości agregatów - pozostałe kolumny to klucze grupowania
+VALUE_COLUMNS = ['count', 'arrests', 'Liczba', 'Aresztowania']
+
+
+# agregaty strony statystycznej (typ, rok, miesiąc) z danych strony wizualnej
+def arrest_counts(df):
+    counts = df.groupby(['PrimaryType', 'Year', 'Month'])[['count', 'arrests']].sum().reset_index()
+    counts.columns = ['Typ', 'Rok', 'Miesiac', 'Liczba', 'Aresztowania']
+    return counts
+
+
+# treść raportu: wykresy, statystyki i prognoza dla zbioru agregatów
+def report_body(title, aggregates, arrests, map_df=None):
+    monthly = arrests.rename(columns={'Rok': 'Year', 'Miesiac': 'Month', 'Liczba': 'count'})
+    return html.Div([
+        html.H1(title),
+        html.P(f"Wygenerowano {time.strftime('%Y-%m-%d %H:%M')}"),
+        html.H2("Analiza wizualna"),
+        visual_analysis.create_charts_from_aggregates(aggregates, map_df),
+        html.H2("Analiza statystyczna"),
+        statistical_analysis.create_statistics_dashboard(arrests),
+        html.H2("Prognoza"),
+        advanced_analysis.create_time_series_analysis(monthly)
+    ])
+
+
+def write_report(path, title, body):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_page(title, body))
+
+
+# raport roku - jedyne zapytanie do bazy dla tego roku; zwraca agregaty dla raportów zakresów.
+# write=False - rok potrzebny tylko do raportów zakresów
+def year_report(year, output_dir, write=True):
+    df = visual_analysis.query_database(year)
+    if df.empty:
+        return None
+
+    aggregates = visual_analysis.compute_chart_aggregates(df)
+    arrests = arrest_counts(df)
+    if write:
+        write_report(os.path.join(output_dir, f"raport_{year}.html"), f"Raport przestępczości {year}",
+                     report_body(f"Raport przestępczości w Chicago - {year}", aggregates, arrests, df))
+    return {'aggregates': aggregates, 'arrests': arrests}
+
+
+# sumuje agregaty kilku lat według ich kolumn grupowania
+def merge_frames(frames):
+    frame = pd.concat(frames, ignore_index=True)
+    keys = [column for column in frame.columns if column not in VALUE_COLUMNS]
+    return frame.groupby(keys, as_index=False).sum()
+
+
+def range_report(first, last, parts, output_dir):
+    aggregates = {key: merge_frames([part['aggregates'][key] for part in parts]) for key in parts[0]['aggregates']}
+    arrests = merge_frames([part['arrests'] for part in parts])
+    write_report(os.path.join(output_dir, f"raport_{first}-{last}.html"), f"Raport przestępczości {first}-{last}",
+                 report_body(f"Raport przestępczości w Chicago - {first}-{last}", aggregates, arrests))
+
+
+def available_years():
+    df = database.read_sql("generate_reports.years",
+                           "SELECT DISTINCT Year FROM ChicagoCrimes WHERE Year IS NOT NULL ORDER BY Year",
+                           merge_by=['Year'])
+    return [int(year) for year in df['Year']]
+
+
+def parse_range(value):
+    first, _, last = value.partition('-')
+    return int(first), int(last or first)
+
+
+# spis raportów z odnośnikami
+def write_index(output_dir, names):
+    links = html.Ul([html.Li(html.A(name, href=name)) for name in sorted(names)])
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(render_page("Raporty przestępczości", html.Div([html.H1("Raporty przestępczości"), links]),
+                            include_plotlyjs=False))
+
+
+# years - lata raportów rocznych (domyślnie wszystkie); ranges - lista par (od, do),
+# domyślnie jeden zakres od pierwszego do ostatniego roku
+def generate_reports(years=None, ranges=None, output_dir=None, workers=None):
+    output_dir = output_dir or REPORT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    years = years or available_years()
+    ranges = ranges or [(min(years), max(years))]
+    # raporty zakresów potrzebują agregatów wszystkich swoich lat
+    needed = sorted(set(years) | {year for first, last in ranges for year in range(first, last + 1)})
+
+    parts = {}
+    names = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(year_report, year, output_dir, year in years): year for year in needed}
+        for future in as_completed(futures):
+            year = futures[future]
+            parts[year] = future.result()
+            if parts[year] is None:
+                print(f"Rok {year}: brak danych")
+            elif year in years:
+                names.append(f"raport_{year}.html")
+                print(f"Rok {year}: raport zapisany")
+
+        futures = {}
+        for first, last in ranges:
+            range_parts = [parts[year] for year in range(first, last + 1) if parts.get(year)]
+            if not range_parts:
+                print(f"Zakres {first}-{last}: brak danych")
+                continue
+            futures[pool.submit(range_report, first, last, range_parts, output_dir)] = (first, last)
+        for future in as_completed(futures):
+            first, last = futures[future]
+            future.result()
+            names.append(f"raport_{first}-{last}.html")
+            print(f"Zakres {first}-{last}: raport zapisany")
+
+    write_index(output_dir, names)
+    return names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generowanie statycznych raportów HTML dla lat i zakresów lat")
+    parser.add_argument('--years', type=int, nargs='+', help="lata raportów rocznych (domyślnie wszystkie)")
+    parser.add_argument('--ranges', type=parse_range, nargs='+', metavar='OD-DO',
+                        help="zakresy lat, np. 2008-2012 (domyślnie cały zakres danych)")
+    parser.add_argument('--output-dir', default=REPORT_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    args = parser.parse_args()
+    names = generate_reports(args.years, args.ranges, args.output_dir, args.workers)
+    print(f"Zapisano {len(names)} raportów w katalogu {args.output_dir}.")
@@ -1,14 +1,37 @@
+import os
+import sys
 import sqlite3
+import argparse
+import itertools
+import importlib.util
 import pandas as pd
 
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dash_dir = os.path.join(os.path.dirname(current_dir), 'dash')
+if dash_dir not in sys.path:
+    sys.path.append(dash_dir)
+
+from storage.database import bump_data_version, shard_path, shard_years
+from storage.snapshot import write_snapshot_from_sqlite
+from storage.sampling import build_sample
+
 # Nazwa pliku CSV i bazy danych
 CSV_FILE = "../../data/processed/Chicago_Crimes_2008_to_2017.csv"
 DB_NAME = "chicago_crimes.db"
+# Katalog kolumnowego snapshotu tabeli (mapowany do pamięci przez dashboard)
+SNAPSHOT_DIR = "snapshot"
+
+# Osobna baza na każdy rok (odpowiada CRIMES_STORAGE=sharded w dashboardzie): wiersze trafiają
+# do SHARD_DIR/crimes_<rok>.db, a wczytanie roku zastępuje zawartość jego bazy bez otwierania
+# baz pozostałych lat - lata można wczytywać równolegle osobnymi procesami
+SHARDED = os.environ.get("CRIMES_STORAGE", "single") == "sharded"
+SHARD_DIR = "shards"
+
+# Liczba wierszy przekazywanych naraz do executemany
+CHUNK_SIZE = 100_000
 
-def load_data():
-    print("Wczytywanie danych...")
-    conn = sqlite3.connect(DB_NAME)
 
+def read_csv_frame():
     # Wczytanie danych z CSV
     df = pd.read_csv(CSV_FILE)
 
@@ -18,15 +41,84 @@ def load_data():
     # Usuwanie duplikatów na podstawie kolumny CaseNumber
     df = df.drop_duplicates(subset=["CaseNumber"])
 
+    # Czas zdarzenia jako liczba całkowita (sekundy od 1970-01-01) - indeksowany filtr dat
+    df['Timestamp'] = (pd.to_datetime(df['Date']) - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
     # Zastąpienie wartości True/False na 1/0 w kolumnach Arrest i Domestic
     df['Arrest'] = df['Arrest'].apply(lambda x: 1 if x else 0)
     df['Domestic'] = df['Domestic'].apply(lambda x: 1 if x else 0)
+    return df
+
+
+# Wstawianie danych, próbka do trybu przybliżonego i zwiększenie wersji danych w jednej transakcji;
+# replace usuwa wcześniejszą zawartość bazy (przebudowa roku)
+def load_database(db_path, df, replace=False):
+    conn = sqlite3.connect(db_path, timeout=60)
+    # WAL - dashboard czyta poprzednią wersję danych, dopóki wczytywanie nie zostanie zatwierdzone
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    insert_query = (f"INSERT INTO ChicagoCrimes ({', '.join(df.columns)}) "
+                    f"VALUES ({', '.join('?' * len(df.columns))})")
+    rows = df.itertuples(index=False, name=None)
+    try:
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM ChicagoCrimes")
+            for _ in range(0, len(df), CHUNK_SIZE):
+                conn.executemany(insert_query, itertools.islice(rows, CHUNK_SIZE))
+            print("Losowanie próbki warstwowej...")
+            build_sample(conn)
+            return bump_data_version(conn)
+    except sqlite3.OperationalError as e:
+        print(f"Błąd bazy danych: {e} (czy baza została utworzona przez create-db.py?)")
+        raise
+    finally:
+        conn.close()
+
+
+def _load_create_db_module():
+    spec = importlib.util.spec_from_file_location("create_db", os.path.join(current_dir, "create-db.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Rozdzielenie wierszy na bazy lat; baza roku jest tworzona przy pierwszym wczytaniu
+def load_shards(df):
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    create_db = _load_create_db_module()
+    for year, year_df in df.groupby('Year'):
+        db_path = shard_path(year, SHARD_DIR)
+        create_db.DB_NAME = db_path
+        create_db.create_table()
+        version = load_database(db_path, year_df, replace=True)
+        print(f"Rok {year}: {len(year_df):,} wierszy, wersja danych {version}")
+    return [shard_path(year, SHARD_DIR) for year in shard_years(SHARD_DIR)]
+
+
+# years - opcjonalna lista lat z pliku CSV do wczytania (pozostałe wiersze są pomijane)
+def load_data(years=None):
+    print("Wczytywanie danych...")
+    df = read_csv_frame()
+    if years:
+        df = df[df['Year'].isin(years)]
+
+    if SHARDED:
+        db_paths = load_shards(df)
+    else:
+        version = load_database(DB_NAME, df)
+        print(f"Wersja danych: {version}")
+        db_paths = DB_NAME
 
-    # Wstawianie danych do bazy
-    df.to_sql('ChicagoCrimes', conn, if_exists='append', index=False)
+    # Snapshot kolumnowy całej tabeli - workery dashboardu nie skanują bazy przy starcie
+    print("Zapisywanie snapshotu kolumnowego...")
+    write_snapshot_from_sqlite(db_paths, SNAPSHOT_DIR)
 
-    conn.close()
 
 if __name__ == "__main__":
-    load_data()
+    parser = argparse.ArgumentParser(description="Wczytanie przetworzonego pliku CSV do bazy SQLite")
+    parser.add_argument('--years', type=int, nargs='+',
+                        help="wczytaj tylko wybrane lata (w trybie baz lat przebudowuje tylko ich bazy)")
+    args = parser.parse_args()
+    load_data(args.years)
     print("Dane wczytane do bazy SQLite.")
@@ -0,0 +1,88 @@
+import os
+import sys
+import sqlite3
+import argparse
+import importlib.util
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dash_dir = os.path.join(os.path.dirname(current_dir), 'dash')
+if dash_dir not in sys.path:
+    sys.path.append(dash_dir)
+
+from storage.database import bump_data_version, shard_path, shard_years
+from storage.sampling import build_sample
+from storage.snapshot import write_snapshot_from_sqlite
+
+# Podział istniejącej bazy na osobne bazy lat (tryb CRIMES_STORAGE=sharded).
+# Każdy rok jest przepisywany w osobnej transakcji, bazy innych lat nie są otwierane.
+# Na koniec snapshot kolumnowy jest zapisywany od nowa ze wszystkich baz lat.
+
+# Nazwa bazy źródłowej i katalog baz lat
+DB_NAME = "chicago_crimes.db"
+SHARD_DIR = "shards"
+# Katalog kolumnowego snapshotu tabeli (mapowany do pamięci przez dashboard)
+SNAPSHOT_DIR = "snapshot"
+
+
+def _load_create_db_module():
+    spec = importlib.util.spec_from_file_location("create_db", os.path.join(current_dir, "create-db.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def split_database(db_path=None, shard_dir=None, years=None, snapshot_dir=None):
+    db_path = db_path or DB_NAME
+    shard_dir = shard_dir or SHARD_DIR
+    source = sqlite3.connect(db_path)
+    try:
+        all_years = [row[0] for row in source.execute(
+            "SELECT DISTINCT Year FROM ChicagoCrimes WHERE Year IS NOT NULL ORDER BY Year")]
+        columns = ', '.join(row[1] for row in source.execute("PRAGMA table_info(ChicagoCrimes)"))
+    finally:
+        source.close()
+
+    os.makedirs(shard_dir, exist_ok=True)
+    create_db = _load_create_db_module()
+    for year in all_years:
+        if years and year not in years:
+            continue
+        path = shard_path(year, shard_dir)
+        create_db.DB_NAME = path
+        create_db.create_table()
+
+        conn = sqlite3.connect(path, timeout=60, uri=True)
+        try:
+            # baza źródłowa tylko do odczytu
+            conn.execute("ATTACH DATABASE ? AS source", (f"file:{os.path.abspath(db_path)}?mode=ro",))
+            # wiersze roku, próbka i wersja danych w jednej transakcji
+            with conn:
+                conn.execute("DELETE FROM main.ChicagoCrimes")
+                conn.execute(f"""
+                    INSERT INTO main.ChicagoCrimes ({columns})
+                    SELECT {columns} FROM source.ChicagoCrimes WHERE Year = ?
+                """, (year,))
+                build_sample(conn)
+                version = bump_data_version(conn)
+        except sqlite3.OperationalError as e:
+            print(f"Błąd bazy danych: {e} | Rok: {year}")
+            raise
+        finally:
+            conn.close()
+        print(f"Rok {year}: {path} (wersja danych {version})")
+
+    # Snapshot kolumnowy ze wszystkich baz lat - stary snapshot ma wersję danych sprzed podziału
+    print("Zapisywanie snapshotu kolumnowego...")
+    write_snapshot_from_sqlite([shard_path(year, shard_dir) for year in shard_years(shard_dir)],
+                               snapshot_dir or SNAPSHOT_DIR)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Podział bazy SQLite na osobne bazy lat")
+    parser.add_argument('--db', default=DB_NAME, help="baza źródłowa")
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help="katalog baz lat")
+    parser.add_argument('--years', type=int, nargs='+', help="przepisz tylko wybrane lata")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR, help="katalog snapshotu kolumnowego")
+    args = parser.parse_args()
+    split_database(args.db, args.shard_dir, args.years, args.snapshot_dir)
+    print("Baza podzielona na lata.")
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# moduły dashboardu importowane tak jak w aplikacji (katalog src/dash w sys.path);
+# testy nie korzystają ze współdzielonego cache na dysku
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dash_dir = os.path.join(os.path.dirname(current_dir), 'src', 'dash')
+if dash_dir not in sys.path:
+    sys.path.append(dash_dir)
+
+os.environ.setdefault("CACHE_ENABLED", "0")
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import anomalies, cache
+
+
+# rolling_baseline: średnia i odchylenie z window poprzednich okresów jak w pandas
+@pytest.mark.parametrize("window", [1, 3, 12])
+def test_rolling_baseline_matches_pandas(window):
+    values = np.random.default_rng(0).poisson(50, size=(3, 40)).astype(float)
+    mean, std = anomalies.rolling_baseline(values, window)
+
+    for row, series in enumerate(values):
+        rolling = pd.Series(series).rolling(window)
+        np.testing.assert_allclose(mean[row], rolling.mean().shift(1), equal_nan=True)
+        np.testing.assert_allclose(std[row], rolling.std(ddof=0).shift(1), equal_nan=True, atol=1e-9)
+
+
+def test_rolling_baseline_shorter_than_window():
+    mean, std = anomalies.rolling_baseline(np.ones((2, 5)), 12)
+    assert np.isnan(mean).all() and np.isnan(std).all()
+
+
+# seasonal_factors: znany profil miesięczny odtwarzany z sumy dystryktów
+def test_seasonal_factors_known_profile():
+    profile = np.array([0.6, 0.7, 0.9, 1.0, 1.1, 1.3, 1.4, 1.3, 1.1, 1.0, 0.9, 0.7])
+    periods = np.arange(2008 * 12, 2011 * 12)
+    phases = anomalies.season_phases(periods, 'month')
+    # typ x dystrykt x okres, dystrykty o różnej skali
+    matrix = np.stack([
+        np.stack([100 * profile[phases], 40 * profile[phases]]),
+        np.stack([10 * profile[phases], 30 * profile[phases]]),
+    ])
+
+    factors = anomalies.seasonal_factors(matrix, phases, 12)
+    assert factors.shape == (2, len(periods))
+    np.testing.assert_allclose(factors, np.tile(profile[phases] / profile.mean(), (2, 1)))
+
+
+def test_seasonal_factors_need_two_seasons():
+    periods = np.arange(20)
+    matrix = np.random.default_rng(1).poisson(20, size=(2, 3, 20)).astype(float)
+    factors = anomalies.seasonal_factors(matrix, anomalies.season_phases(periods, 'month'), 12)
+    np.testing.assert_array_equal(factors, np.ones((2, 20)))
+
+
+# faza tygodnia to tydzień roku ISO poniedziałku rozpoczynającego tydzień
+def test_week_phases_follow_iso_weeks():
+    mondays = pd.to_datetime(['2016-01-04', '2016-06-27', '2015-12-28', '2017-01-02'])
+    periods = (mondays - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    periods = (periods - anomalies.database.WEEK_ORIGIN) // anomalies.database.SECONDS_PER_WEEK
+
+    np.testing.assert_array_equal(anomalies.period_starts(periods, 'week'), mondays)
+    # 2015-12-28 to 53. tydzień ISO - ta sama faza co tydzień 52
+    np.testing.assert_array_equal(anomalies.season_phases(periods, 'week'), [0, 25, 51, 0])
+
+
+def _seconds(date):
+    return int((pd.Timestamp(date) - pd.Timestamp(0)) // pd.Timedelta(seconds=1))
+
+
+def test_complete_periods_drop_partial_edges():
+    periods = np.arange(2015 * 12, 2017 * 12 + 1)
+    complete = anomalies.complete_periods(periods, 'month', _seconds('2015-01-03 10:00'),
+                                          _seconds('2017-01-18 22:00'))
+    assert not complete[0] and not complete[-1]
+    assert complete[1:-1].all()
+
+    complete = anomalies.complete_periods(periods, 'month', _seconds('2015-01-01'), _seconds('2017-01-31 23:59'))
+    assert complete.all()
+
+
+# szeregi o stałym poziomie z danymi kończącymi się 18 stycznia: niepełny styczeń nie jest spadkiem
+def test_score_series_ignores_incomplete_last_month(monkeypatch):
+    months = np.arange(2014 * 12, 2017 * 12 + 1)
+    rng = np.random.default_rng(2)
+    rows = []
+    for district in range(1, 7):
+        counts = rng.poisson(300, size=len(months))
+        counts[-1] = rng.poisson(300 * 18 / 31)
+        rows += [('THEFT', district, month, count) for month, count in zip(months, counts)]
+    counts = pd.DataFrame(rows, columns=['PrimaryType', 'District', 'Period', 'count'])
+
+    monkeypatch.setattr(cache, 'shared_cache', None)
+    monkeypatch.setattr(anomalies, 'query_series_counts', lambda granularity: counts)
+    monkeypatch.setattr(anomalies, 'data_bounds',
+                        lambda: (_seconds('2014-01-01'), _seconds('2017-01-18 23:00')))
+
+    result = anomalies.score_series('month')
+    assert result['periods'] == len(months) - 1
+    assert (result['anomalies']['Start'] < pd.Timestamp('2017-01-01')).all()
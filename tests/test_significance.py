@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+from storage import significance
+
+# (c1, t1, c2, t2) - liczby przestępstw i czasy obserwacji dwóch okresów
+POISSON_CELLS = [(120, 12, 150, 12), (0, 24, 5, 12), (7, 60, 3, 60), (1000, 60, 1100, 48), (40, 5.5, 40, 5.5)]
+# (x1, n1, x2, n2) - aresztowania i liczby przestępstw dwóch okresów
+PROPORTION_CELLS = [(30, 100, 45, 110), (200, 1000, 180, 1000), (5, 40, 0, 35), (999, 1000, 990, 1000)]
+
+
+# dokładny test warunkowy: podwojony mniejszy ogon testu dwumianowego scipy
+def test_poisson_rate_test_matches_binomtest():
+    c1, t1, c2, t2 = (np.array(column, dtype=float) for column in zip(*POISSON_CELLS))
+    ratio, p_values = significance.poisson_rate_test(c1, t1, c2, t2)
+
+    for i, (a, s, b, u) in enumerate(POISSON_CELLS):
+        share = u / (s + u)
+        less = stats.binomtest(b, a + b, share, alternative='less').pvalue
+        greater = stats.binomtest(b, a + b, share, alternative='greater').pvalue
+        assert p_values[i] == pytest.approx(min(1.0, 2 * min(less, greater)))
+        # podwojony ogon nie jest mniejszy niż p metody minlike
+        assert p_values[i] >= stats.binomtest(b, a + b, share).pvalue - 1e-12
+        if a > 0:
+            assert ratio[i] == pytest.approx((b / u) / (a / s))
+
+
+def test_poisson_rate_test_without_events():
+    ratio, p_values = significance.poisson_rate_test([0, 10], 12, [0, 10], 12)
+    assert np.isnan(p_values[0]) and p_values[1] == pytest.approx(1.0)
+    assert ratio[1] == pytest.approx(1.0)
+
+
+# test z dla dwóch proporcji jest równoważny testowi chi-kwadrat tabeli 2x2 bez poprawki Yatesa
+def test_two_proportion_test_matches_chi2_contingency():
+    x1, n1, x2, n2 = (np.array(column) for column in zip(*PROPORTION_CELLS))
+    difference, p_values = significance.two_proportion_test(x1, n1, x2, n2)
+
+    for i, (a, m, b, n) in enumerate(PROPORTION_CELLS):
+        table = [[a, m - a], [b, n - b]]
+        expected = stats.chi2_contingency(table, correction=False).pvalue
+        assert p_values[i] == pytest.approx(expected, rel=1e-9)
+        assert difference[i] == pytest.approx(b / n - a / m)
+
+
+def test_two_proportion_test_degenerate_samples():
+    difference, p_values = significance.two_proportion_test([0, 10, 0], [10, 10, 0], [0, 20, 3], [20, 20, 5])
+    # identyczne proporcje 0 i 1 - brak różnicy; pusta próba - test niewykonalny
+    np.testing.assert_array_equal(p_values[:2], [1.0, 1.0])
+    assert np.isnan(p_values[2]) and np.isnan(difference[2])
+
+
+def test_adjust_pvalues_keeps_nan_positions():
+    p_values = np.array([0.01, np.nan, 0.04, 0.03, np.nan, 0.5])
+    adjusted = significance.adjust_pvalues(p_values)
+
+    valid = ~np.isnan(p_values)
+    np.testing.assert_array_equal(np.isnan(adjusted), ~valid)
+    np.testing.assert_allclose(adjusted[valid], multipletests(p_values[valid], method='fdr_bh')[1])
+
+
+def test_adjust_pvalues_all_nan():
+    adjusted = significance.adjust_pvalues([np.nan, np.nan])
+    assert adjusted.shape == (2,) and np.isnan(adjusted).all()